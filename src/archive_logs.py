@@ -0,0 +1,32 @@
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the script directory to sys.path to allow imports
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from integrated_app import app
+from backend.log_store import archive_logs
+from backend.models import log_writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old operation logs into compressed archive segments")
+    parser.add_argument('--days', type=int, default=app.config['OPERATION_LOG_RETENTION_DAYS'],
+                        help="Keep logs newer than this many days in the database")
+    parser.add_argument('--archive-dir', default=app.config['OPERATION_LOG_ARCHIVE_DIR'],
+                        help="Directory for the archive segments")
+    parser.add_argument('--segment-size', type=int, default=50000,
+                        help="Maximum number of logs per segment")
+    args = parser.parse_args()
+
+    older_than = datetime.utcnow() - timedelta(days=args.days)
+    with app.app_context():
+        log_writer.flush()
+        archived = archive_logs(args.archive_dir, older_than, segment_size=args.segment_size)
+    print(f"Archived {archived} logs older than {older_than.isoformat()} into {args.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Weight of the newest hold time in the running average behind Retry-After
+AVERAGE_WEIGHT = 0.2
+
+
+class Overloaded(Exception):
+    """
+    An expensive request was turned away; answered with `status` (429 or
+    503) and a Retry-After header of `retry_after` seconds.
+    """
+
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Lets concurrent calls with the same key share one execution.
+
+    The first caller runs the function; callers arriving while it runs wait
+    for it and get the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Returns:
+        - (result, shared): shared is True when the result came from another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AdmissionController:
+    """
+    Concurrency cap with a bounded wait queue for expensive requests.
+
+    Up to `max_concurrent` requests run at once. Further ones wait in a
+    queue of at most `max_queued`. When the queue is full, a request is
+    rejected immediately with 429. When it waits longer than
+    `queue_timeout` seconds, it is rejected with 503. Either way it gets a
+    Retry-After estimated from the recent hold times and the current
+    backlog, so saturation answers quickly instead of tying up every
+    server thread.
+    """
+
+    def __init__(self, max_concurrent=4, max_queued=32, queue_timeout=5.0):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._active = 0
+        self._queued = 0
+        self._average_seconds = None
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+
+    def configure(self, max_concurrent, max_queued, queue_timeout):
+        with self._lock:
+            self.max_concurrent = max_concurrent
+            self.max_queued = max_queued
+            self.queue_timeout = queue_timeout
+            self._slot_free.notify_all()
+
+    def _retry_after(self):
+        average = self._average_seconds if self._average_seconds is not None else 1.0
+        backlog = (self._active + self._queued) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(average * backlog))
+
+    def acquire(self):
+        """
+        Take a slot, waiting in the queue if needed.
+
+        Returns:
+        - A token to hand back to release()
+
+        Raises:
+        - Overloaded when the queue is full (429) or the wait timed out (503)
+        """
+        with self._slot_free:
+            # Requests already waiting go first
+            if self._active >= self.max_concurrent or self._queued:
+                if self._queued >= self.max_queued:
+                    self.rejected += 1
+                    raise Overloaded(429, "Too many path searches are waiting, retry later", self._retry_after())
+                self._queued += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self._active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            raise Overloaded(503, f"No path search slot was free within {self.queue_timeout} s",
+                                             self._retry_after())
+                        self._slot_free.wait(remaining)
+                finally:
+                    self._queued -= 1
+            self._active += 1
+            self.admitted += 1
+            return time.monotonic()
+
+    def release(self, token):
+        held = time.monotonic() - token
+        with self._slot_free:
+            self._active -= 1
+            if self._average_seconds is None:
+                self._average_seconds = held
+            else:
+                self._average_seconds += AVERAGE_WEIGHT * (held - self._average_seconds)
+            self._slot_free.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for the duration of the `with` block."""
+        token = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(token)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': self._active,
+                'queued': self._queued,
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'average_seconds': round(self._average_seconds, 4) if self._average_seconds is not None else None,
+            }
+
+
+path_admission = AdmissionController()
+path_flights = SingleFlight()
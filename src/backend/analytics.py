@@ -0,0 +1,197 @@
+from collections import defaultdict
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend.models import db, Node, Edge, Visitor, VisitorMovement, NodeVisitStat, EdgeTraversalStat, VisitorStat
+
+BUCKETS = ('hour', 'day', 'total')
+
+
+def _deleted_label(kind, entity_id):
+    # Counters outlive the rows they count; a deleted one is reported under this name
+    return f"(deleted {kind} {entity_id})"
+
+
+def bucket_start(timestamp):
+    """Truncate a timestamp to the start of its hourly bucket."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _upsert(model, rows, keys, counters, latest=()):
+    if not rows:
+        return
+    statement = sqlite_insert(model)
+    updates = {name: getattr(model, name) + statement.excluded[name] for name in counters}
+    for name in latest:
+        updates[name] = func.max(func.coalesce(getattr(model, name), statement.excluded[name]), statement.excluded[name])
+    db.session.execute(statement.on_conflict_do_update(index_elements=keys, set_=updates), rows)
+
+
+def record_movements(movements):
+    """
+    Add movements to the traversal counters, in the caller's transaction.
+
+    Movements without an edge (initial placement, administrative moves)
+    count as a node visit only. Several movements are folded into one
+    upsert per counter row, so a batch costs three statements.
+
+    Parameters:
+    - movements: Iterable of (visitor_id, node_id, edge_id, edge_weight, timestamp)
+    """
+    node_visits = defaultdict(int)
+    edge_traversals = defaultdict(lambda: [0, 0.0])
+    visitor_totals = {}
+
+    for visitor_id, node_id, edge_id, weight, timestamp in movements:
+        bucket = bucket_start(timestamp)
+        node_visits[node_id, bucket] += 1
+        totals = visitor_totals.setdefault(visitor_id, [0, 0.0, timestamp])
+        totals[2] = max(totals[2], timestamp)
+        if edge_id is not None:
+            edge_totals = edge_traversals[edge_id, bucket]
+            edge_totals[0] += 1
+            edge_totals[1] += weight or 0.0
+            totals[0] += 1
+            totals[1] += weight or 0.0
+
+    _upsert(NodeVisitStat, [
+        {'node_id': node_id, 'bucket_start': bucket, 'visits': visits}
+        for (node_id, bucket), visits in node_visits.items()
+    ], ['node_id', 'bucket_start'], ['visits'])
+    _upsert(EdgeTraversalStat, [
+        {'edge_id': edge_id, 'bucket_start': bucket, 'traversals': traversals, 'total_weight': weight}
+        for (edge_id, bucket), (traversals, weight) in edge_traversals.items()
+    ], ['edge_id', 'bucket_start'], ['traversals', 'total_weight'])
+    _upsert(VisitorStat, [
+        {'visitor_id': visitor_id, 'moves': moves, 'total_weight': weight, 'last_move_at': last_move_at}
+        for visitor_id, (moves, weight, last_move_at) in visitor_totals.items()
+    ], ['visitor_id'], ['moves', 'total_weight'], latest=['last_move_at'])
+
+
+def rebuild_stats(batch_size=10000):
+    """
+    Recompute every counter from visitor_movements, e.g. for a database that
+    had movements before the analytics tables existed. Commits when done.
+
+    Returns:
+    - Number of movements read
+    """
+    for model in (NodeVisitStat, EdgeTraversalStat, VisitorStat):
+        db.session.execute(delete(model))
+
+    rows = db.session.execute(
+        db.select(VisitorMovement.visitor_id, VisitorMovement.node_id, VisitorMovement.edge_id,
+                  Edge.weight, VisitorMovement.timestamp)
+        .outerjoin(Edge, VisitorMovement.edge_id == Edge.id)
+        .where(VisitorMovement.timestamp.is_not(None))
+        .order_by(VisitorMovement.id)
+        .execution_options(yield_per=batch_size)
+    )
+    count = 0
+    for batch in rows.partitions():
+        record_movements(batch)
+        count += len(batch)
+    db.session.commit()
+    return count
+
+
+def _bucket_key(bucket, granularity):
+    if granularity == 'total':
+        return None
+    if granularity == 'day':
+        bucket = bucket.replace(hour=0)
+    return bucket.isoformat()
+
+
+def _bucket_filters(model, since, until):
+    filters = []
+    if since is not None:
+        filters.append(model.bucket_start >= bucket_start(since))
+    if until is not None:
+        filters.append(model.bucket_start < until)
+    return filters
+
+
+def node_visit_rollup(granularity='total', since=None, until=None):
+    """
+    Visits per node, summed per hour, per day or over the whole range.
+
+    Reads the hourly counters only, so the cost depends on the number of
+    nodes and buckets in the range, not on the number of movements. The
+    range works on whole hours: `since` is rounded down to the start of its
+    hour and the hour `until` falls in is counted whole, as if `until` were
+    rounded up to the next hour. Nodes deleted since are still counted,
+    named by _deleted_label().
+
+    Returns:
+    - List of dicts ordered by bucket, then by visits (most visited first)
+    """
+    rows = db.session.execute(
+        db.select(NodeVisitStat.node_id, Node.name, NodeVisitStat.bucket_start, NodeVisitStat.visits)
+        .outerjoin(Node, NodeVisitStat.node_id == Node.id)
+        .where(*_bucket_filters(NodeVisitStat, since, until))
+    )
+    totals = defaultdict(int)
+    names = {}
+    for node_id, name, bucket, visits in rows:
+        names[node_id] = name if name is not None else _deleted_label('node', node_id)
+        totals[_bucket_key(bucket, granularity), node_id] += visits
+
+    result = [{'bucket_start': bucket, 'node_id': node_id, 'node_name': names[node_id], 'visits': visits}
+              for (bucket, node_id), visits in totals.items()]
+    result.sort(key=lambda row: (row['bucket_start'] or '', -row['visits'], row['node_id']))
+    return result
+
+
+def edge_traversal_rollup(granularity='total', since=None, until=None):
+    """
+    Traversals and summed weight per edge, bucketed like node_visit_rollup().
+
+    Edges deleted since are still counted, with no source and target.
+    """
+    rows = db.session.execute(
+        db.select(EdgeTraversalStat.edge_id, Edge.name, Edge.source_id, Edge.target_id,
+                  EdgeTraversalStat.bucket_start, EdgeTraversalStat.traversals, EdgeTraversalStat.total_weight)
+        .outerjoin(Edge, EdgeTraversalStat.edge_id == Edge.id)
+        .where(*_bucket_filters(EdgeTraversalStat, since, until))
+    )
+    totals = defaultdict(lambda: [0, 0.0])
+    edges = {}
+    for edge_id, name, source_id, target_id, bucket, traversals, weight in rows:
+        edges[edge_id] = (name if name is not None else _deleted_label('edge', edge_id), source_id, target_id)
+        edge_totals = totals[_bucket_key(bucket, granularity), edge_id]
+        edge_totals[0] += traversals
+        edge_totals[1] += weight
+
+    result = [{
+        'bucket_start': bucket,
+        'edge_id': edge_id,
+        'edge_name': edges[edge_id][0],
+        'source_id': edges[edge_id][1],
+        'target_id': edges[edge_id][2],
+        'traversals': traversals,
+        'total_weight': weight
+    } for (bucket, edge_id), (traversals, weight) in totals.items()]
+    result.sort(key=lambda row: (row['bucket_start'] or '', -row['traversals'], row['edge_id']))
+    return result
+
+
+def visitor_totals(visitor_id=None):
+    """
+    Path length (edge moves) and total weight travelled per visitor.
+
+    Visitors deleted since (e.g. along with their node) are still reported.
+    """
+    query = (db.select(VisitorStat.visitor_id, Visitor.name, VisitorStat.moves,
+                       VisitorStat.total_weight, VisitorStat.last_move_at)
+             .outerjoin(Visitor, VisitorStat.visitor_id == Visitor.id)
+             .order_by(VisitorStat.visitor_id))
+    if visitor_id is not None:
+        query = query.where(VisitorStat.visitor_id == visitor_id)
+    return [{
+        'visitor_id': stat_visitor_id,
+        'visitor_name': name if name is not None else _deleted_label('visitor', stat_visitor_id),
+        'path_length': moves,
+        'total_weight': weight,
+        'last_move_at': last_move_at.isoformat() if last_move_at else None
+    } for stat_visitor_id, name, moves, weight, last_move_at in db.session.execute(query)]
@@ -0,0 +1,94 @@
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se ofrece gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain')
+
+
+def available_encodings():
+    """Content codings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def etag_variants(etag):
+    """Every tag a response with `etag` can carry: the identity one and one per coding."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in available_encodings()]
+
+
+def choose_encoding(accept_encodings):
+    """Pick the preferred coding the client accepts, or None to send it as is."""
+    for encoding in available_encodings():
+        if accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESSION_BROTLI_QUALITY'])
+    # mtime=0 keeps the output identical for identical input, as the ETag promises
+    return gzip.compress(data, compresslevel=config['COMPRESSION_LEVEL'], mtime=0)
+
+
+def _compress_stream(chunks, encoding, config):
+    # Each chunk is flushed so streamed lines still reach the client right away
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['COMPRESSION_BROTLI_QUALITY'])
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(config['COMPRESSION_LEVEL'], zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def compress_response(response):
+    """
+    Compress a response with gzip or brotli when the client accepts it.
+
+    Whole responses smaller than COMPRESSION_MIN_SIZE are left alone.
+    Streamed responses are compressed chunk by chunk. A strong ETag gets the
+    coding appended, because the compressed bytes are a different
+    representation (see etag_variants()).
+    """
+    config = current_app.config
+    if (not config['COMPRESSION_ENABLED'] or response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.set_data(_compress(data, encoding, config))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def init_compression(app):
+    """Compress the app's responses according to its COMPRESSION_* settings."""
+    app.after_request(compress_response)
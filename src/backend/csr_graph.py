@@ -0,0 +1,594 @@
+import time
+from array import array
+from datetime import datetime, timedelta
+from heapq import heappop, heappush
+from itertools import count
+
+# Timestamps are kept as microseconds since the epoch; this marks a missing one
+NO_TIMESTAMP = -2 ** 63
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _index_typecode(limit):
+    # 4-byte indexes while they fit, 8-byte ones for anything bigger
+    return 'i' if limit < 2 ** 31 else 'q'
+
+
+def _to_micros(value):
+    return NO_TIMESTAMP if value is None else (value - _EPOCH) // _MICROSECOND
+
+
+def _isoformat(micros):
+    return None if micros == NO_TIMESTAMP else (_EPOCH + micros * _MICROSECOND).isoformat()
+
+
+class PackedStrings:
+    """Read-only sequence of strings stored as one string plus offsets."""
+
+    __slots__ = ('_text', '_offsets')
+
+    def __init__(self, strings):
+        offsets = array(_index_typecode(sum(map(len, strings))), [0])
+        total = 0
+        for string in strings:
+            total += len(string)
+            offsets.append(total)
+        self._text = ''.join(strings)
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def nbytes(self):
+        return len(self._text.encode('utf-8')) + self._offsets.itemsize * len(self._offsets)
+
+
+class _NodeView:
+    # graph.nodes: iterates node ids, graph.nodes[node_id]['name'] as in networkx
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.node_ids)
+
+    def __iter__(self):
+        return iter(self._graph.node_ids)
+
+    def __contains__(self, node_id):
+        return node_id in self._graph.index_of
+
+    def __getitem__(self, node_id):
+        return {'name': self._graph.node_names[self._graph.index_of[node_id]]}
+
+
+class _EdgeView:
+    # graph.edges[source_id, target_id] returns the edge attributes
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.targets)
+
+    def __getitem__(self, endpoints):
+        data = self._graph.get_edge_data(*endpoints)
+        if data is None:
+            raise KeyError(endpoints)
+        return data
+
+
+class _AdjacencyView:
+    # graph.adj[node_id] maps each successor to the edge attributes
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node_id):
+        graph = self._graph
+        index = graph.index_of[node_id]
+        return {graph.node_ids[graph.targets[position]]: graph.edge_data(position)
+                for position in range(graph.offsets[index], graph.offsets[index + 1])}
+
+
+class CSRGraph:
+    """
+    Read-only directed graph stored as compressed sparse row arrays.
+
+    Nodes are numbered 0..n-1 in load order. The out-edges of node i are the
+    positions offsets[i]..offsets[i+1] of the `targets`, `weights`,
+    `edge_ids`, `edge_names` and timestamp arrays, in the order the edges
+    were loaded; `in_offsets`/`in_positions` index the same edges by target,
+    each target's incoming edges ordered by source.
+    Everything lives in a handful of `array` buffers and packed strings
+    instead of one dict per node and per edge, so a large map takes a
+    fraction of the memory of a networkx DiGraph.
+
+    The path routines follow the networkx algorithms step by step, with the
+    same adjacency order and tie-breaking, so they return exactly the paths
+    (and the order) the networkx backend returns for the same data. The
+    graph also answers the read-only part of the DiGraph interface used by
+    the rest of the app (nodes, edges, adj, has_node, get_edge_data...).
+
+    Parameters:
+    - nodes: Iterable of (node_id, name)
+    - edges: Iterable of (edge_id, source_id, target_id, name, weight,
+      created_at, updated_at); edges whose endpoints are unknown are skipped
+    """
+
+    def __init__(self, nodes, edges):
+        node_ids = array('q')
+        names = []
+        index_of = {}
+        for node_id, name in nodes:
+            index_of[node_id] = len(node_ids)
+            node_ids.append(node_id)
+            names.append(name)
+        n = len(node_ids)
+
+        edges = [edge for edge in edges if edge[1] in index_of and edge[2] in index_of]
+        m = len(edges)
+        sources = array('i', (index_of[edge[1]] for edge in edges))
+        target_of_edge = array('i', (index_of[edge[2]] for edge in edges))
+        offsets = array('q', [0]) * (n + 1)
+        in_offsets = array('q', [0]) * (n + 1)
+        for source, target in zip(sources, target_of_edge):
+            offsets[source + 1] += 1
+            in_offsets[target + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+            in_offsets[i + 1] += in_offsets[i]
+
+        # Counting sort by source; stable, so every node keeps the load order of its edges
+        order = array('q', [0]) * m
+        cursor = offsets[:n]
+        for load_index, source in enumerate(sources):
+            order[cursor[source]] = load_index
+            cursor[source] += 1
+
+        targets = array('i', (target_of_edge[i] for i in order))
+        del sources, target_of_edge
+
+        # Incoming edges by target, pointing at the positions above. They are
+        # filled walking the sources in order, which is the order of the
+        # predecessors in the DiGraph.copy() the networkx backend searches on
+        in_sources = array('i', [0]) * m
+        in_positions = array(_index_typecode(m), [0]) * m
+        cursor = in_offsets[:n]
+        for source in range(n):
+            for position in range(offsets[source], offsets[source + 1]):
+                target = targets[position]
+                in_sources[cursor[target]] = source
+                in_positions[cursor[target]] = position
+                cursor[target] += 1
+        del cursor
+
+        self.node_ids = node_ids
+        self.node_names = PackedStrings(names)
+        self.index_of = index_of
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = array('d', (float('nan') if edges[i][4] is None else edges[i][4] for i in order))
+        self.edge_ids = array('q', (edges[i][0] for i in order))
+        self.edge_names = PackedStrings([edges[i][3] for i in order])
+        self.created_at = array('q', (_to_micros(edges[i][5]) for i in order))
+        self.updated_at = array('q', (_to_micros(edges[i][6]) for i in order))
+        self.in_offsets = in_offsets
+        self.in_sources = in_sources
+        self.in_positions = in_positions
+        self._add_views()
+
+    def _add_views(self):
+        self.nodes = _NodeView(self)
+        self.edges = _EdgeView(self)
+        self.adj = _AdjacencyView(self)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """
+        Build a CSRGraph from a DiGraph loaded by the graph cache.
+
+        The graph cache updates its DiGraph in place, so the order of the
+        incoming edges of a node may differ from the order of the outgoing
+        ones; both are copied as they are, and searches on the copy still
+        match networkx's exactly.
+        """
+        def timestamp(value):
+            return None if value is None else datetime.fromisoformat(value)
+
+        csr = cls(graph.nodes(data='name'), (
+            (data['id'], source_id, target_id, data['name'], data['weight'],
+             timestamp(data['created_at']), timestamp(data['updated_at']))
+            for source_id, target_id, data in graph.edges(data=True)
+        ))
+        index_of = csr.index_of
+        cursor = 0
+        for target_id, predecessors in graph.pred.items():
+            target = index_of[target_id]
+            for source_id in predecessors:
+                source = index_of[source_id]
+                csr.in_sources[cursor] = source
+                csr.in_positions[cursor] = csr._position(source, target)
+                cursor += 1
+        return csr
+
+    # The id -> index dict and the views are rebuilt on load instead of pickled
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('index_of', 'nodes', 'edges', 'adj'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.index_of = {node_id: index for index, node_id in enumerate(self.node_ids)}
+        self._add_views()
+
+    # Read-only DiGraph interface
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def __iter__(self):
+        return iter(self.node_ids)
+
+    def __contains__(self, node_id):
+        return node_id in self.index_of
+
+    def has_node(self, node_id):
+        return node_id in self.index_of
+
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        return len(self.targets)
+
+    def successors(self, node_id):
+        index = self.index_of[node_id]
+        node_ids = self.node_ids
+        return (node_ids[target] for target in self.targets[self.offsets[index]:self.offsets[index + 1]])
+
+    def _position(self, source, target):
+        # Position of the edge between two node indexes, or -1; O(out-degree)
+        targets = self.targets
+        for position in range(self.offsets[source], self.offsets[source + 1]):
+            if targets[position] == target:
+                return position
+        return -1
+
+    def edge_data(self, position):
+        """Attributes of the edge at `position`, shaped like the networkx backend's edge data."""
+        weight = self.weights[position]
+        return {
+            'id': self.edge_ids[position],
+            'name': self.edge_names[position],
+            'weight': None if weight != weight else weight,
+            'created_at': _isoformat(self.created_at[position]),
+            'updated_at': _isoformat(self.updated_at[position]),
+        }
+
+    def has_edge(self, source_id, target_id):
+        return self.get_edge_data(source_id, target_id) is not None
+
+    def get_edge_data(self, source_id, target_id, default=None):
+        source = self.index_of.get(source_id)
+        target = self.index_of.get(target_id)
+        if source is None or target is None:
+            return default
+        position = self._position(source, target)
+        return default if position < 0 else self.edge_data(position)
+
+    def nbytes(self):
+        """Size of the array buffers and packed strings, without the id -> index dict."""
+        buffers = (self.node_ids, self.offsets, self.targets, self.weights, self.edge_ids, self.created_at,
+                   self.updated_at, self.in_offsets, self.in_sources, self.in_positions)
+        return (sum(buffer.itemsize * len(buffer) for buffer in buffers)
+                + self.node_names.nbytes() + self.edge_names.nbytes())
+
+    # Path routines, over node indexes
+
+    def simple_paths(self, source_id, target_id, cutoff, deadline=None, stats=None):
+        """
+        Generate the simple paths between two nodes, in the order of
+        backend.utils.iter_simple_paths (and nx.all_simple_paths).
+
+        Parameters:
+        - source_id, target_id: Node IDs
+        - cutoff: Maximum path length, in edges
+        - deadline: Optional time.monotonic() value after which the search stops
+        - stats: Optional dict that receives 'nodes_expanded' and, when the
+          deadline is hit, 'timed_out' = True
+
+        Returns:
+        - Generator of paths, where each path is a list of node IDs
+        """
+        if stats is None:
+            stats = {}
+        stats.setdefault('nodes_expanded', 0)
+        if source_id not in self.index_of or target_id not in self.index_of:
+            return
+        if source_id == target_id:
+            yield [source_id]
+            return
+        if cutoff < 1:
+            return
+
+        offsets, targets, node_ids = self.offsets, self.targets, self.node_ids
+        source = self.index_of[source_id]
+        target = self.index_of[target_id]
+        path = [source]
+        on_path = bytearray(len(node_ids))
+        on_path[source] = 1
+        stack = [iter(targets[offsets[source]:offsets[source + 1]])]
+        steps = 0
+
+        while stack:
+            steps += 1
+            if deadline is not None and steps % 256 == 0 and time.monotonic() > deadline:
+                stats['timed_out'] = True
+                return
+
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                on_path[path.pop()] = 0
+                continue
+            if on_path[child]:
+                continue
+            if child == target:
+                yield [node_ids[index] for index in path] + [target_id]
+                continue
+            if len(path) < cutoff:
+                path.append(child)
+                on_path[child] = 1
+                stack.append(iter(targets[offsets[child]:offsets[child + 1]]))
+                stats['nodes_expanded'] += 1
+
+    def _bidirectional_dijkstra(self, source, target, ignore_nodes=None, ignore_edges=None):
+        # Port of networkx's _bidirectional_dijkstra, returning (length, path) or None.
+        # Paths are kept as predecessors instead of one list per node; a node's
+        # predecessor only changes until it is settled, and every node behind it
+        # is settled already, so the best meeting point can be rebuilt at the end.
+        if ignore_nodes and (source in ignore_nodes or target in ignore_nodes):
+            return None
+        if source == target:
+            return 0, [source]
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        in_offsets, in_sources, in_positions = self.in_offsets, self.in_sources, self.in_positions
+        ignore_nodes = ignore_nodes or ()
+        ignore_edges = ignore_edges or ()
+        dists = [{}, {}]
+        preds = [{source: None}, {target: None}]
+        fringe = [[], []]
+        seen = [{source: 0}, {target: 0}]
+        forward_seen, backward_seen = seen
+        counter = count()
+        heappush(fringe[0], (0, next(counter), source))
+        heappush(fringe[1], (0, next(counter), target))
+        final_dist = None
+        final = None
+        direction = 1
+
+        while fringe[0] and fringe[1]:
+            direction = 1 - direction
+            dist, _, v = heappop(fringe[direction])
+            own_dists = dists[direction]
+            if v in own_dists:
+                continue
+            own_dists[v] = dist
+            if v in dists[1 - direction]:
+                break
+
+            own_seen, own_preds, own_fringe = seen[direction], preds[direction], fringe[direction]
+            if direction == 0:
+                neighbors = [(targets[p], weights[p]) for p in range(offsets[v], offsets[v + 1])
+                             if not ignore_edges or (v, targets[p]) not in ignore_edges]
+            else:
+                neighbors = [(in_sources[p], weights[in_positions[p]]) for p in range(in_offsets[v], in_offsets[v + 1])
+                             if not ignore_edges or (in_sources[p], v) not in ignore_edges]
+            for w, weight in neighbors:
+                if w in ignore_nodes or weight != weight:
+                    continue  # Edges without weight are skipped, like networkx does
+                length = dist + weight
+                if w in own_dists:
+                    if length < own_dists[w]:
+                        raise ValueError("Contradictory paths found: negative weights?")
+                elif w not in own_seen or length < own_seen[w]:
+                    own_seen[w] = length
+                    heappush(own_fringe, (length, next(counter), w))
+                    own_preds[w] = v
+                    if w in forward_seen and w in backward_seen:
+                        total = forward_seen[w] + backward_seen[w]
+                        if final is None or final_dist > total:
+                            final_dist = total
+                            final = (w, preds[0][w], preds[1][w])
+        else:
+            return None
+
+        if final is None:
+            return final_dist, []
+        meeting, forward_pred, backward_pred = final
+        path = [meeting]
+        while forward_pred is not None:
+            path.append(forward_pred)
+            forward_pred = preds[0][forward_pred]
+        path.reverse()
+        while backward_pred is not None:
+            path.append(backward_pred)
+            backward_pred = preds[1][backward_pred]
+        return final_dist, path
+
+    def shortest_simple_paths(self, source_id, target_id):
+        """
+        Generate the simple paths between two nodes, cheapest first.
+
+        Same algorithm as nx.shortest_simple_paths (Yen's, with bidirectional
+        Dijkstra for the spur paths), so paths of equal weight come out in
+        the same order too.
+
+        Returns:
+        - Generator of paths, where each path is a list of node IDs
+        """
+        if source_id not in self.index_of or target_id not in self.index_of:
+            return
+        source = self.index_of[source_id]
+        target = self.index_of[target_id]
+        node_ids, weights = self.node_ids, self.weights
+
+        accepted = []
+        candidates = []
+        candidate_keys = set()
+        counter = count()
+
+        def push(cost, path):
+            key = tuple(path)
+            if key not in candidate_keys:
+                heappush(candidates, (cost, next(counter), path))
+                candidate_keys.add(key)
+
+        previous = None
+        while True:
+            if not previous:
+                found = self._bidirectional_dijkstra(source, target)
+                if found is None:
+                    return
+                push(*found)
+            else:
+                ignore_nodes = set()
+                ignore_edges = set()
+                root_length = 0
+                for i in range(1, len(previous)):
+                    root = previous[:i]
+                    if i > 1:
+                        # Added left to right, as sum() does over the whole root
+                        root_length += weights[self._position(previous[i - 2], previous[i - 1])]
+                    for path in accepted:
+                        if path[:i] == root:
+                            ignore_edges.add((path[i - 1], path[i]))
+                    found = self._bidirectional_dijkstra(root[-1], target, ignore_nodes, ignore_edges)
+                    if found is not None:
+                        length, spur = found
+                        push(root_length + length, root[:-1] + spur)
+                    ignore_nodes.add(root[-1])
+
+            if not candidates:
+                return
+            _, _, path = heappop(candidates)
+            candidate_keys.remove(tuple(path))
+            yield [node_ids[index] for index in path]
+            accepted.append(path)
+            previous = path
+
+    def shortest_path_lengths(self, source_id):
+        """
+        Weighted distance from a node to every node it reaches, as
+        nx.single_source_dijkstra_path_length computes it.
+
+        Returns:
+        - Dict of node ID -> distance
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        source = self.index_of[source_id]
+        dist = {}
+        seen = {source: 0}
+        counter = count()
+        fringe = [(0, next(counter), source)]
+        while fringe:
+            d, _, v = heappop(fringe)
+            if v in dist:
+                continue
+            dist[v] = d
+            for position in range(offsets[v], offsets[v + 1]):
+                cost = weights[position]
+                if cost != cost:
+                    continue
+                u = targets[position]
+                length = d + cost
+                if u in dist:
+                    if length < dist[u]:
+                        raise ValueError("Contradictory paths found: negative weights?")
+                elif u not in seen or length < seen[u]:
+                    seen[u] = length
+                    heappush(fringe, (length, next(counter), u))
+        node_ids = self.node_ids
+        return {node_ids[v]: d for v, d in dist.items()}
+
+    def condensation(self):
+        """
+        Strongly connected components, found with an iterative Tarjan search.
+
+        Returns:
+        - (component_of, successors, order): the component of every node ID,
+          the set of successor components of each component, and the
+          components in topological order
+        """
+        offsets, targets = self.offsets, self.targets
+        n = len(self.node_ids)
+        index = array('q', [-1]) * n
+        low = array('q', [0]) * n
+        component = array('q', [-1]) * n
+        on_stack = bytearray(n)
+        stack = []
+        visited = 0
+        components = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = visited
+            visited += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+            while work:
+                v, position = work[-1]
+                end = offsets[v + 1]
+                while position < end:
+                    w = targets[position]
+                    position += 1
+                    if index[w] == -1:
+                        # Descend into w and come back to the rest of v's edges later
+                        work[-1] = (v, position)
+                        index[w] = low[w] = visited
+                        visited += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        work.append((w, offsets[w]))
+                        break
+                    if on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                else:
+                    work.pop()
+                    if low[v] == index[v]:
+                        while True:
+                            w = stack.pop()
+                            on_stack[w] = 0
+                            component[w] = components
+                            if w == v:
+                                break
+                        components += 1
+                    if work:
+                        parent = work[-1][0]
+                        if low[v] < low[parent]:
+                            low[parent] = low[v]
+
+        successors = [set() for _ in range(components)]
+        for v in range(n):
+            own = component[v]
+            for w in targets[offsets[v]:offsets[v + 1]]:
+                if component[w] != own:
+                    successors[own].add(component[w])
+        node_ids = self.node_ids
+        component_of = {node_ids[v]: component[v] for v in range(n)}
+        # Tarjan completes a component after everything it reaches
+        return component_of, successors, list(range(components - 1, -1, -1))
@@ -0,0 +1,74 @@
+import os
+
+from sqlalchemy import event
+
+# Engine profiles, selected with DATABASE_PROFILE. The production profile lets
+# readers proceed while a writer commits (WAL), only fsyncs at checkpoints
+# (synchronous=NORMAL), waits for the write lock instead of failing right away
+# and keeps a pool of connections per process.
+ENGINE_PROFILES = {
+    'development': {
+        'pragmas': {},
+        'engine_options': {},
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -65536,  # 64 MiB
+            'mmap_size': 268435456,  # 256 MiB
+            'temp_store': 'MEMORY',
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_pre_ping': True,
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+        },
+    },
+}
+
+
+def configure_engine(app):
+    """
+    Fill SQLALCHEMY_ENGINE_OPTIONS and SQLITE_PRAGMAS from the DATABASE_PROFILE.
+
+    Values already present in the app config win over the profile. Must be
+    called before init_db().
+    """
+    profile_name = app.config.get('DATABASE_PROFILE', 'development')
+    if profile_name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE '{profile_name}', expected one of {', '.join(ENGINE_PROFILES)}")
+    profile = ENGINE_PROFILES[profile_name]
+
+    options = dict(profile['engine_options'])
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        # In-memory databases use a single static connection
+        options = {}
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    pragmas = dict(profile['pragmas'])
+    pragmas.update(app.config.get('SQLITE_PRAGMAS', {}))
+    app.config['SQLITE_PRAGMAS'] = pragmas
+
+
+def install_engine_hooks(engine, pragmas):
+    """
+    Apply the SQLite pragmas to every new connection of `engine`, and make the
+    pool safe to use in processes forked after it was created (e.g. a
+    pre-forking WSGI server with the app preloaded).
+    """
+    if engine.dialect.name == 'sqlite' and pragmas:
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    # Los hijos no deben reutilizar las conexiones abiertas por el padre
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import func
+from backend.admission import Overloaded
+from backend.models import db, DROPPED_LOGS, OperationLog
+
+logger = logging.getLogger(__name__)
+
+# Operation log types published as events: visitor movements and graph changes
+EVENT_TYPES = (
+    'CREATE_VISITOR', 'UPDATE_VISITOR', 'MOVE_VISITOR',
+    'CREATE_NODE', 'UPDATE_NODE', 'EDIT_NODE', 'DELETE_NODE',
+    'CREATE_EDGE', 'UPDATE_EDGE', 'EDIT_EDGE', 'DELETE_EDGE',
+    'BULK_IMPORT',
+)
+# Log types the stream reads: the events plus the note of records the log writer
+# dropped, which every subscriber gets since it may have missed events
+STREAM_TYPES = EVENT_TYPES + (DROPPED_LOGS,)
+# Detail keys that refer to a node, for the node_id filter
+NODE_KEYS = ('node_id', 'from_node_id', 'to_node_id', 'source_id', 'target_id')
+# Log rows read per query, when tailing the log or catching a subscriber up
+READ_BATCH_SIZE = 500
+# Seconds a client is told to wait before opening another stream when all are taken
+RETRY_AFTER_SECONDS = 5
+
+
+class EventFilter:
+    """Which events a subscriber wants: some event types, and optionally one visitor, node or edge."""
+
+    def __init__(self, types=None, visitor_id=None, node_id=None, edge_id=None):
+        self.types = tuple(types) if types else EVENT_TYPES
+        self.read_types = self.types + (DROPPED_LOGS,)
+        self.visitor_id = visitor_id
+        self.node_id = node_id
+        self.edge_id = edge_id
+
+    def matches(self, event):
+        if event['type'] == DROPPED_LOGS:
+            return True
+        if event['type'] not in self.types:
+            return False
+        data = event['data']
+        if self.visitor_id is not None and data.get('visitor_id') != self.visitor_id:
+            return False
+        if self.edge_id is not None and data.get('edge_id') != self.edge_id:
+            return False
+        if self.node_id is not None and all(data.get(key) != self.node_id for key in NODE_KEYS):
+            return False
+        return True
+
+
+def _to_event(log_id, operation_type, details, timestamp):
+    try:
+        data = json.loads(details) if details else {}
+    except ValueError:
+        data = {'details': details}
+    if not isinstance(data, dict):
+        data = {'details': data}
+    return {
+        'id': log_id,
+        'type': operation_type,
+        'timestamp': timestamp.isoformat() if timestamp else None,
+        'data': data,
+    }
+
+
+def read_events(types, after_id, limit=READ_BATCH_SIZE):
+    """
+    Read the logged events of the given types with an id above `after_id`, oldest first.
+
+    Returns:
+    - Tuple (events, last_id, complete): last_id is the id of the last row
+      read (or after_id), complete is False if there may be more rows
+    """
+    rows = db.session.execute(
+        db.select(OperationLog.id, OperationLog.operation_type, OperationLog.details, OperationLog.timestamp)
+        .where(OperationLog.id > after_id, OperationLog.operation_type.in_(types))
+        .order_by(OperationLog.id)
+        .limit(limit)
+    ).all()
+    events = [_to_event(*row) for row in rows]
+    return events, events[-1]['id'] if events else after_id, len(rows) < limit
+
+
+def last_log_id():
+    return db.session.execute(db.select(func.max(OperationLog.id))).scalar() or 0
+
+
+class Subscription:
+    """
+    One subscriber's position in the event stream.
+
+    New events are pushed onto a bounded queue by the broker. A subscriber
+    that falls `queue_size` events behind has its queue dropped and reads
+    what it missed straight from the log table, `READ_BATCH_SIZE` rows at a
+    time, until it has caught up. A slow consumer thus never holds memory
+    for more than `queue_size` events and never loses any.
+    """
+
+    def __init__(self, event_filter, last_id, lagging, queue_size):
+        self.filter = event_filter
+        # Id of the last log row this subscriber has been through
+        self.last_id = last_id
+        self.queue_size = queue_size
+        self.overflows = 0
+        self._lagging = lagging
+        self._pending = deque()
+        self._ready = threading.Condition()
+
+    @property
+    def lagging(self):
+        return self._lagging
+
+    def _push(self, event):
+        # Returns True if the queue overflowed
+        with self._ready:
+            overflowed = len(self._pending) >= self.queue_size
+            if overflowed:
+                # Demasiado lento: se descarta la cola y se relee desde la tabla de logs
+                self._pending.clear()
+                self._lagging = True
+                self.overflows += 1
+            else:
+                self._pending.append(event)
+            self._ready.notify()
+            return overflowed
+
+    def next_events(self, timeout):
+        """
+        Wait up to `timeout` seconds for events after `last_id`.
+
+        Must be called with an application context, to read from the log
+        table when catching up.
+
+        Returns:
+        - List of events in id order, empty if none arrived in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._ready:
+                while not self._lagging and not self._pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    self._ready.wait(remaining)
+                lagging = self._lagging
+                overflows = self.overflows
+                if not lagging:
+                    pending, self._pending = self._pending, deque()
+
+            if lagging:
+                events, last_id, complete = read_events(self.filter.read_types, self.last_id)
+                # A long-lived stream must not keep its read transaction open
+                db.session.close()
+                self.last_id = last_id
+                # Back to the queue only if it did not overflow again during the read
+                if complete:
+                    with self._ready:
+                        if self.overflows == overflows:
+                            self._lagging = False
+            else:
+                # After a catch-up the queue can still hold events already read from the table
+                events = [event for event in pending if event['id'] > self.last_id]
+                if events:
+                    self.last_id = events[-1]['id']
+
+            events = [event for event in events if self.filter.matches(event)]
+            if events or time.monotonic() >= deadline:
+                return events
+
+
+class EventBroker:
+    """
+    Publishes visitor movements and graph changes to subscribed clients.
+
+    Events are the operation log rows of the EVENT_TYPES, and an event's id
+    is its log id. Every process tails the log table with one background
+    thread, which reads the rows added since its last poll every
+    `poll_interval` seconds and hands them to the matching subscribers.
+    Because all processes share the table, a subscriber sees the writes
+    made through any WSGI worker, and can resume after a reconnection
+    from the id of the last event it received, on any worker, for as long
+    as the rows are kept (see OPERATION_LOG_RETENTION_DAYS).
+
+    Events show up once their log rows are written, i.e. up to the
+    operation log writer's flush interval plus `poll_interval` after the
+    change. When the writer had to drop records, every subscriber gets a
+    DROPPED_LOGS event with their number, so it knows to resynchronize.
+    The thread only runs while the process has subscribers.
+    """
+
+    def __init__(self):
+        self.poll_interval = 0.5
+        self.queue_size = 1000
+        self.max_subscribers = 100
+        self.published = 0
+        self.overflows = 0
+        self._app = None
+        self._reset()
+        # The tailing thread does not survive a fork; each process starts its own
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._last_id = 0
+        self._thread = None
+
+    def configure(self, app, poll_interval, queue_size, max_subscribers):
+        self._app = app
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+
+    def subscribe(self, event_filter, last_event_id=None):
+        """
+        Start delivering events to a new subscriber. Must be called with an application context.
+
+        Parameters:
+        - event_filter: EventFilter of the events to deliver
+        - last_event_id: Id of the last event the client already has, to
+          resume after it; None to start with the next new event
+
+        Raises:
+        - Overloaded (503) when `max_subscribers` streams are open already
+        """
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                raise Overloaded(503, f"Too many event subscribers ({self.max_subscribers}), retry later",
+                                 RETRY_AFTER_SECONDS)
+            if self._thread is None:
+                self._last_id = last_log_id()
+                self._thread = threading.Thread(target=self._run, name='event-broker', daemon=True)
+                self._thread.start()
+            if last_event_id is None or last_event_id >= self._last_id:
+                # The client can be ahead of this process' broker, if it got events through another worker
+                start_id = self._last_id if last_event_id is None else last_event_id
+                subscription = Subscription(event_filter, start_id, False, self.queue_size)
+            else:
+                subscription = Subscription(event_filter, last_event_id, True, self.queue_size)
+            self._subscriptions.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+                last_id = self._last_id
+            try:
+                with self._app.app_context():
+                    events, last_id, complete = read_events(STREAM_TYPES, last_id)
+            except Exception:
+                logger.exception("Could not read new events from the operation log")
+                events, complete = [], True
+
+            with self._lock:
+                self._last_id = last_id
+                self.published += len(events)
+                for event in events:
+                    for subscription in self._subscriptions:
+                        if subscription.filter.matches(event) and subscription._push(event):
+                            self.overflows += 1
+            if complete:
+                time.sleep(self.poll_interval)
+
+    def stats(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            return {
+                'subscribers': len(subscriptions),
+                'lagging': sum(1 for subscription in subscriptions if subscription.lagging),
+                'overflows': self.overflows,
+                'last_event_id': self._last_id,
+                'published': self.published,
+            }
+
+
+event_broker = EventBroker()
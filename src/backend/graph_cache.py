@@ -0,0 +1,375 @@
+import os
+import threading
+import time
+import uuid
+
+import networkx as nx
+from backend.csr_graph import CSRGraph
+from backend.models import db, Node, Edge
+from backend.reachability import ReachabilityIndex
+
+# 'networkx' keeps a DiGraph updated in place; 'csr' keeps a compact read-only CSRGraph
+BACKENDS = ('networkx', 'csr')
+
+
+def _edge_attributes(edge_id, name, weight, created_at, updated_at):
+    # Timestamps are kept pre-serialized so paths can be formatted straight from the graph
+    return {
+        'id': edge_id,
+        'name': name,
+        'weight': weight,
+        'created_at': created_at.isoformat() if created_at else None,
+        'updated_at': updated_at.isoformat() if updated_at else None,
+    }
+
+
+class GraphCache:
+    """
+    Process-wide, versioned in-memory copy of the navigation graph.
+
+    The graph is loaded from the database on first use and then kept up to
+    date in place by the node and edge write handlers. Every mutation bumps
+    the version counter, so readers can tell when the graph they hold is stale.
+    Readers get a frozen snapshot that is rebuilt at most once per version,
+    which lets path searches run without holding the lock or touching the
+    database.
+
+    A ReachabilityIndex over the live graph is built on first use and kept in
+    step by the same write hooks; see reachable() and distance().
+
+    Each process has its own cache. With enable_sync(), processes share a
+    stamp file: writers touch it after every mutation and readers drop their
+    copy when it changes, so a write in one WSGI worker reaches the others
+    within `check_interval` seconds.
+
+    etag() turns the current state into a strong validator for responses
+    derived from the graph, so unchanged reads can be answered with a 304.
+
+    With set_backend('csr') the graph is held as a CSRGraph instead: several
+    times smaller and faster to search, but read-only, so a node or edge
+    write drops it and the next read reloads it from the database. It suits
+    large maps that change rarely.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._graph = None
+        self._ids_by_name = {}
+        self._edge_endpoints = {}
+        self._snapshot = None
+        self._snapshot_version = None
+        self._reachability = None
+        self._sync_path = None
+        self._sync_interval = 1.0
+        self._sync_seen = None
+        self._sync_next_check = 0.0
+        self._instance = uuid.uuid4().hex[:12]
+        self.backend = 'networkx'
+        self.version = 0
+        # Forked workers count versions on their own, so each needs its own prefix
+        os.register_at_fork(after_in_child=self._new_instance)
+
+    def _new_instance(self):
+        self._instance = uuid.uuid4().hex[:12]
+
+    def set_backend(self, backend):
+        """Select the in-memory representation, one of BACKENDS; the graph is reloaded on next use."""
+        if backend not in BACKENDS:
+            raise ValueError(f"graph backend must be one of {BACKENDS}, not {backend!r}")
+        with self._lock:
+            if backend != self.backend:
+                self.backend = backend
+                self._drop()
+
+    def enable_sync(self, path, check_interval=1.0):
+        """Share invalidations with other processes through the stamp file at `path`."""
+        with self._lock:
+            self._sync_path = path
+            self._sync_interval = check_interval
+            self._sync_seen = self._read_stamp()
+            self._sync_next_check = time.monotonic() + check_interval
+
+    def _read_stamp(self):
+        try:
+            return os.stat(self._sync_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _check_sync(self):
+        now = time.monotonic()
+        if self._sync_path is None or now < self._sync_next_check:
+            return
+        self._sync_next_check = now + self._sync_interval
+        stamp = self._read_stamp()
+        if stamp != self._sync_seen:
+            self._sync_seen = stamp
+            if self._graph is not None:
+                self._drop()
+
+    def _publish(self):
+        if self._sync_path is None:
+            return
+        stamp = time.time_ns()
+        with open(self._sync_path, 'a'):
+            pass
+        os.utime(self._sync_path, ns=(stamp, stamp))
+        current = self._read_stamp()
+        if current != stamp and self._graph is not None:
+            # Another process wrote at the same time; reload to pick up its change
+            self._drop()
+        self._sync_seen = current
+
+    def _drop(self):
+        self._graph = None
+        self._ids_by_name = {}
+        self._edge_endpoints = {}
+        self._snapshot = None
+        self._snapshot_version = None
+        self._reachability = None
+        self.version += 1
+
+    def _ensure_loaded(self):
+        self._check_sync()
+        if self._graph is not None:
+            return
+
+        edge_columns = (Edge.id, Edge.source_id, Edge.target_id, Edge.name, Edge.weight, Edge.created_at, Edge.updated_at)
+        if self.backend == 'csr':
+            nodes = db.session.execute(db.select(Node.id, Node.name)).all()
+            self._graph = CSRGraph(nodes, db.session.execute(db.select(*edge_columns)))
+            self._ids_by_name = {name: node_id for node_id, name in nodes}
+            self.version += 1
+            return
+
+        graph = nx.DiGraph()
+        ids_by_name = {}
+        edge_endpoints = {}
+
+        for node_id, name in db.session.execute(db.select(Node.id, Node.name)):
+            graph.add_node(node_id, name=name)
+            ids_by_name[name] = node_id
+
+        edges = db.session.execute(db.select(*edge_columns))
+        for edge_id, source_id, target_id, name, weight, created_at, updated_at in edges:
+            graph.add_edge(source_id, target_id, **_edge_attributes(edge_id, name, weight, created_at, updated_at))
+            edge_endpoints[edge_id] = (source_id, target_id)
+
+        self._graph = graph
+        self._ids_by_name = ids_by_name
+        self._edge_endpoints = edge_endpoints
+        self.version += 1
+
+    def get_graph(self):
+        """
+        Return a read-only snapshot of the current graph.
+
+        The snapshot is shared between readers until the next mutation.
+        """
+        return self.get_snapshot()[0]
+
+    def get_snapshot(self):
+        """Return the read-only snapshot together with the version it was taken at."""
+        with self._lock:
+            self._ensure_loaded()
+            if self._snapshot_version != self.version:
+                # A CSRGraph is read-only already and can be shared as is
+                self._snapshot = self._graph if isinstance(self._graph, CSRGraph) else nx.freeze(self._graph.copy())
+                self._snapshot_version = self.version
+            return self._snapshot, self._snapshot_version
+
+    def get_node_id(self, name):
+        """Return the id of the node called `name`, or None if there is none."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._ids_by_name.get(name)
+
+    def has_node(self, node_id):
+        with self._lock:
+            self._ensure_loaded()
+            return self._graph.has_node(node_id)
+
+    def neighbors(self, node_id):
+        """
+        Return the outgoing edges of a node, read from the adjacency of the graph.
+
+        Costs O(out-degree) and never touches the database once the graph is
+        loaded.
+
+        Returns:
+        - List of dicts with the edge and its target node, or None if the node does not exist
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if not self._graph.has_node(node_id):
+                return None
+            nodes = self._graph.nodes
+            return [{
+                'edge_id': data['id'],
+                'edge_name': data['name'],
+                'target_node_id': target_id,
+                'target_node_name': nodes[target_id]['name'],
+                'weight': data['weight'],
+            } for target_id, data in self._graph.adj[node_id].items()]
+
+    def _index(self):
+        self._ensure_loaded()
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self._graph)
+        return self._reachability
+
+    def reachable(self, source_id, target_id):
+        """Return True if there is a directed path from source_id to target_id."""
+        with self._lock:
+            return self._index().reachable(source_id, target_id)
+
+    def distance(self, source_id, target_id):
+        """Return the weighted shortest distance between two nodes, or None if unreachable."""
+        with self._lock:
+            return self._index().distance(source_id, target_id)
+
+    def etag(self):
+        """
+        Return a strong ETag for the current state of the graph.
+
+        With sync enabled the tag is the shared stamp of the last write, so
+        every process holding the same data hands out the same tag. Otherwise
+        it is this process' version counter, prefixed with a per-process id.
+        """
+        with self._lock:
+            # Loading bumps the version, so load first to hand out a lasting tag
+            self._ensure_loaded()
+            if self._sync_path is not None and self._sync_seen is not None:
+                return f"graph-s{self._sync_seen}"
+            return f"graph-{self._instance}-{self.version}"
+
+    def invalidate(self):
+        """Drop the cached graph so it is reloaded from the database on next use."""
+        with self._lock:
+            self._drop()
+            self._publish()
+
+    def _editable(self):
+        # True when there is a loaded graph to update in place. A CSRGraph
+        # cannot be changed, so it is dropped and reloaded on next use instead.
+        if isinstance(self._graph, CSRGraph):
+            self._drop()
+        return self._graph is not None
+
+    # Write hooks, to be called after the corresponding change is committed.
+    #
+    # Two writes of the same row can commit in one order and reach their hooks
+    # in the other, so the hooks do not apply the caller's values: under the
+    # lock they read the row as it is committed now and apply that.
+
+    def _read_node(self, node_id):
+        return db.session.execute(db.select(Node.name).where(Node.id == node_id)).scalar_one_or_none()
+
+    def _read_edge(self, edge_id):
+        return db.session.execute(
+            db.select(Edge.source_id, Edge.target_id, Edge.name, Edge.weight, Edge.created_at, Edge.updated_at)
+            .where(Edge.id == edge_id)
+        ).one_or_none()
+
+    def _put_node(self, node_id, name):
+        is_new = not self._graph.has_node(node_id)
+        if not is_new:
+            old_name = self._graph.nodes[node_id]['name']
+            if self._ids_by_name.get(old_name) == node_id:
+                del self._ids_by_name[old_name]
+        self._graph.add_node(node_id, name=name)
+        if is_new and self._reachability is not None:
+            self._reachability.node_added(node_id)
+        self._ids_by_name[name] = node_id
+
+    def _remove_node(self, node_id):
+        if not self._graph.has_node(node_id):
+            return
+        name = self._graph.nodes[node_id]['name']
+        if self._ids_by_name.get(name) == node_id:
+            del self._ids_by_name[name]
+        # Edges are removed along with the node, as in the database cascade
+        edges = []
+        for source_id, target_id, data in list(self._graph.in_edges(node_id, data=True)) + \
+                list(self._graph.out_edges(node_id, data=True)):
+            self._edge_endpoints.pop(data['id'], None)
+            edges.append((source_id, target_id, data['weight']))
+        self._graph.remove_node(node_id)
+        if self._reachability is not None:
+            self._reachability.node_removed(node_id, edges)
+
+    def _put_edge(self, edge_id, row):
+        source_id, target_id, name, weight, created_at, updated_at = row
+        if not (self._graph.has_node(source_id) and self._graph.has_node(target_id)):
+            # An endpoint this copy has not seen yet; reload instead of guessing its name
+            self._drop()
+            return
+        endpoints = (source_id, target_id)
+        old_endpoints = self._edge_endpoints.get(edge_id)
+        old_weight = self._graph.edges[old_endpoints]['weight'] if old_endpoints else None
+        if old_endpoints and old_endpoints != endpoints:
+            self._graph.remove_edge(*old_endpoints)
+            if self._reachability is not None:
+                self._reachability.edge_removed(*old_endpoints, old_weight)
+        self._graph.add_edge(*endpoints, **_edge_attributes(edge_id, name, weight, created_at, updated_at))
+        self._edge_endpoints[edge_id] = endpoints
+        if self._reachability is not None:
+            if old_endpoints == endpoints:
+                self._reachability.edge_weight_changed(*endpoints, old_weight, weight)
+            else:
+                self._reachability.edge_added(*endpoints, weight)
+
+    def _remove_edge(self, edge_id):
+        endpoints = self._edge_endpoints.pop(edge_id, None)
+        if endpoints and self._graph.has_edge(*endpoints):
+            weight = self._graph.edges[endpoints]['weight']
+            self._graph.remove_edge(*endpoints)
+            if self._reachability is not None:
+                self._reachability.edge_removed(*endpoints, weight)
+
+    def node_saved(self, node):
+        with self._lock:
+            if self._editable():
+                name = self._read_node(node.id)
+                if name is None:
+                    # Deleted by a write that committed after this one
+                    self._remove_node(node.id)
+                else:
+                    self._put_node(node.id, name)
+            # The version moves even when the graph is not loaded, for etag()
+            self.version += 1
+            self._publish()
+
+    def node_deleted(self, node_id):
+        with self._lock:
+            if self._editable():
+                if self._read_node(node_id) is None:
+                    self._remove_node(node_id)
+                else:
+                    # The id was taken again by a newer node; reload rather than patch
+                    self._drop()
+            self.version += 1
+            self._publish()
+
+    def edge_saved(self, edge):
+        with self._lock:
+            if self._editable():
+                row = self._read_edge(edge.id)
+                if row is None:
+                    self._remove_edge(edge.id)
+                else:
+                    self._put_edge(edge.id, row)
+            self.version += 1
+            self._publish()
+
+    def edge_deleted(self, edge_id):
+        with self._lock:
+            if self._editable():
+                row = self._read_edge(edge_id)
+                if row is None:
+                    self._remove_edge(edge_id)
+                else:
+                    self._put_edge(edge_id, row)
+            self.version += 1
+            self._publish()
+
+graph_cache = GraphCache()
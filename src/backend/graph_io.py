@@ -0,0 +1,264 @@
+import csv
+import io
+import json
+
+from sqlalchemy import insert
+from sqlalchemy.orm import aliased
+from backend.models import db, Node, Edge
+from backend.serialization import dumps_line
+
+FORMATS = ('ndjson', 'csv')
+CSV_COLUMNS = ['type', 'name', 'description', 'source', 'target', 'weight']
+DEFAULT_BATCH_SIZE = 5000
+# Values per IN (...) lookup, below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+class InvalidEncoding(ValueError):
+    """
+    A line of the input is not valid UTF-8. Unlike a malformed record it
+    stops the import; `summary` holds what was imported before that line.
+    """
+
+    def __init__(self, line_number):
+        super().__init__(f"line {line_number}: invalid UTF-8")
+        self.line_number = line_number
+        self.summary = None
+
+
+def decode_lines(stream):
+    """Decode a binary stream line by line as UTF-8, raising InvalidEncoding with the line number."""
+    for line_number, line in enumerate(stream, 1):
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            raise InvalidEncoding(line_number) from None
+
+
+def read_records(stream, fmt):
+    """
+    Read graph records from a text stream, one at a time.
+
+    NDJSON lines look like {"type": "node", "name": ..., "description": ...}
+    or {"type": "edge", "name": ..., "source": ..., "target": ..., "weight": ...},
+    where source and target are node names. CSV files use the columns in
+    CSV_COLUMNS. Lines that cannot be parsed are yielded as {'error': ...}.
+    `stream` can be any iterable of lines, e.g. decode_lines() of a binary one.
+    """
+    if fmt == 'csv':
+        for record in csv.DictReader(stream):
+            yield record
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield {'error': f"line {line_number}: invalid JSON"}
+            continue
+        yield record if isinstance(record, dict) else {'error': f"line {line_number}: expected an object"}
+
+
+def _chunks(values, size=LOOKUP_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _node_ids_by_name(names):
+    ids = {}
+    for chunk in _chunks(names):
+        ids.update({name: node_id for node_id, name in
+                    db.session.execute(db.select(Node.id, Node.name).where(Node.name.in_(chunk)))})
+    return ids
+
+
+class _GraphImport:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.nodes = []
+        self.edges = []
+        self.summary = {
+            'nodes_created': 0,
+            'nodes_skipped': 0,
+            'edges_created': 0,
+            'edges_skipped': 0,
+            'error_count': 0,
+            'errors': []
+        }
+
+    def error(self, message):
+        self.summary['error_count'] += 1
+        if len(self.summary['errors']) < MAX_REPORTED_ERRORS:
+            self.summary['errors'].append(message)
+
+    def add(self, record):
+        if 'error' in record:
+            self.error(record['error'])
+            return
+
+        kind = record.get('type')
+        if kind == 'node':
+            if not record.get('name'):
+                self.error(f"node without name: {record}")
+                return
+            self.nodes.append({'name': record['name'], 'description': record.get('description') or None})
+            if len(self.nodes) >= self.batch_size:
+                self.flush_nodes()
+        elif kind == 'edge':
+            if not record.get('name') or not record.get('source') or not record.get('target'):
+                self.error(f"edge needs name, source and target: {record}")
+                return
+            try:
+                weight = float(record['weight']) if record.get('weight') not in (None, '') else 1.0
+            except (TypeError, ValueError):
+                self.error(f"edge '{record['name']}' has an invalid weight")
+                return
+            self.edges.append({'name': record['name'], 'source': record['source'],
+                               'target': record['target'], 'weight': weight})
+            if len(self.edges) >= self.batch_size:
+                self.flush()
+        else:
+            self.error(f"unknown record type '{kind}'")
+
+    def flush_nodes(self):
+        if not self.nodes:
+            return
+        # Dentro del lote gana la primera aparición de cada nombre
+        batch = {}
+        for node in self.nodes:
+            batch.setdefault(node['name'], node)
+        self.summary['nodes_skipped'] += len(self.nodes) - len(batch)
+        self.nodes = []
+
+        existing = _node_ids_by_name(batch)
+        rows = [node for name, node in batch.items() if name not in existing]
+        self.summary['nodes_skipped'] += len(existing)
+        if rows:
+            db.session.execute(insert(Node), rows)
+        db.session.commit()
+        self.summary['nodes_created'] += len(rows)
+
+    def flush_edges(self):
+        if not self.edges:
+            return
+        batch, self.edges = self.edges, []
+
+        ids = _node_ids_by_name({edge['source'] for edge in batch} | {edge['target'] for edge in batch})
+        resolved = []
+        for edge in batch:
+            source_id, target_id = ids.get(edge['source']), ids.get(edge['target'])
+            if source_id is None or target_id is None:
+                self.error(f"edge '{edge['name']}' references an unknown node")
+                continue
+            resolved.append({'source_id': source_id, 'target_id': target_id,
+                             'name': edge['name'], 'weight': edge['weight']})
+
+        existing = set()
+        for chunk in _chunks({edge['source_id'] for edge in resolved}):
+            existing.update(tuple(row) for row in db.session.execute(
+                db.select(Edge.source_id, Edge.target_id).where(Edge.source_id.in_(chunk))
+            ))
+
+        rows = []
+        for edge in resolved:
+            pair = (edge['source_id'], edge['target_id'])
+            if pair in existing:
+                self.summary['edges_skipped'] += 1
+                continue
+            existing.add(pair)
+            rows.append(edge)
+        if rows:
+            db.session.execute(insert(Edge), rows)
+        db.session.commit()
+        self.summary['edges_created'] += len(rows)
+
+    def flush(self):
+        # Nodes go first so edges in the same batch can reference them
+        self.flush_nodes()
+        self.flush_edges()
+
+
+def import_graph(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bulk load nodes and edges, committing one transaction per batch.
+
+    Node names are resolved to ids with one lookup per batch. Nodes whose
+    name already exists and edges between already connected nodes are
+    skipped, as are duplicates within the input. Edges must come after the
+    nodes they reference, or refer to nodes already in the database.
+
+    Parameters:
+    - records: Iterable of record dicts, e.g. from read_records()
+    - batch_size: Number of nodes or edges written per transaction
+
+    Returns:
+    - Summary dict with created/skipped counts and the first errors found
+
+    Raises:
+    - InvalidEncoding when `records` hits a line that is not UTF-8, after
+      importing the records before it
+    """
+    graph_import = _GraphImport(batch_size)
+    try:
+        for record in records:
+            graph_import.add(record)
+    except InvalidEncoding as error:
+        # Se guarda todo lo anterior a la línea ilegible, para poder reanudar tras ella
+        graph_import.flush()
+        error.summary = graph_import.summary
+        raise
+    graph_import.flush()
+    return graph_import.summary
+
+
+def export_graph(fmt='ndjson', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream the whole graph in the import format: every node, then every edge.
+
+    Rows are fetched in batches of `batch_size`, so memory stays flat no
+    matter how large the graph is.
+
+    Returns:
+    - Generator of text chunks (lines)
+    """
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+
+        def take():
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return line
+
+        def encode(record):
+            writer.writerow(record)
+            return take()
+
+        writer.writeheader()
+        yield take()
+    else:
+        encode = dumps_line
+
+    nodes = db.session.execute(
+        db.select(Node.name, Node.description).order_by(Node.id).execution_options(yield_per=batch_size)
+    )
+    for name, description in nodes:
+        yield encode({'type': 'node', 'name': name, 'description': description})
+
+    source = aliased(Node)
+    target = aliased(Node)
+    edges = db.session.execute(
+        db.select(Edge.name, source.name, target.name, Edge.weight)
+        .join(source, Edge.source_id == source.id)
+        .join(target, Edge.target_id == target.id)
+        .order_by(Edge.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for name, source_name, target_name, weight in edges:
+        yield encode({'type': 'edge', 'name': name, 'source': source_name, 'target': target_name, 'weight': weight})
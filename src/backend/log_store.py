@@ -0,0 +1,212 @@
+import gzip
+import json
+import os
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import and_, delete, or_
+from backend.models import db, OperationLog
+from backend.pagination import encode_cursor
+
+MANIFEST_NAME = 'manifest.json'
+# Rows deleted per statement, below SQLite's bound parameter limit
+DELETE_CHUNK_SIZE = 500
+
+
+def query_logs(operation_type=None, since=None, until=None, cursor=None, limit=None, as_dicts=False):
+    """
+    Read a page of operation logs, newest first.
+
+    Pages are addressed with a keyset cursor on (timestamp, id), so each page
+    is an index range scan no matter how deep into the log it is.
+
+    Parameters:
+    - operation_type: Only return logs of this type
+    - since, until: Only return logs with since <= timestamp < until
+    - cursor: Decoded cursor [timestamp, id] of the last log of the previous page
+    - limit: Page size, or None for every matching log
+    - as_dicts: Read plain columns and return dicts shaped like OperationLog.to_dict()
+      instead of entities, for API responses
+
+    Returns:
+    - Tuple (logs, next_cursor), where next_cursor is None on the last page
+    """
+    if as_dicts:
+        query = db.select(OperationLog.id, OperationLog.operation_type, OperationLog.details, OperationLog.timestamp)
+    else:
+        query = db.select(OperationLog)
+    query = query.order_by(OperationLog.timestamp.desc(), OperationLog.id.desc())
+    if operation_type:
+        query = query.where(OperationLog.operation_type == operation_type)
+    if since is not None:
+        query = query.where(OperationLog.timestamp >= since)
+    if until is not None:
+        query = query.where(OperationLog.timestamp < until)
+    if cursor is not None:
+        timestamp, log_id = cursor
+        query = query.where(or_(
+            OperationLog.timestamp < timestamp,
+            and_(OperationLog.timestamp == timestamp, OperationLog.id < log_id)
+        ))
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    result = db.session.execute(query)
+    logs = result.all() if as_dicts else result.scalars().all()
+    next_cursor = None
+    if limit is not None and len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1].timestamp, logs[-1].id)
+    if as_dicts:
+        logs = [{
+            'id': log_id,
+            'operation_type': operation_type,
+            'details': details,
+            'timestamp': timestamp.isoformat() if timestamp else None
+        } for log_id, operation_type, details, timestamp in logs]
+    return logs, next_cursor
+
+
+def _load_manifest(archive_dir):
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'segments': []}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _save_manifest(archive_dir, manifest):
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def archive_logs(archive_dir, older_than, segment_size=50000):
+    """
+    Move operation logs older than `older_than` into compressed archive segments.
+
+    Each segment is a gzip'd NDJSON file of up to `segment_size` logs in
+    (timestamp, id) order, listed in the archive manifest with its id and
+    timestamp range and the operation types it contains. A segment is written
+    and registered before its rows are deleted, so an interrupted run can
+    leave duplicates but never loses logs.
+
+    Parameters:
+    - archive_dir: Directory holding the segments and the manifest
+    - older_than: Naive UTC datetime; logs with an earlier timestamp are archived
+    - segment_size: Maximum number of logs per segment
+
+    Returns:
+    - Number of logs archived
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    manifest = _load_manifest(archive_dir)
+    archived = 0
+
+    while True:
+        rows = db.session.execute(
+            db.select(OperationLog.id, OperationLog.operation_type, OperationLog.details, OperationLog.timestamp)
+            .where(OperationLog.timestamp < older_than)
+            .order_by(OperationLog.timestamp, OperationLog.id)
+            .limit(segment_size)
+        ).all()
+        if not rows:
+            break
+
+        records = [{
+            'id': log_id,
+            'operation_type': operation_type,
+            'details': details,
+            'timestamp': timestamp.isoformat()
+        } for log_id, operation_type, details, timestamp in rows]
+
+        file_name = f"operation_logs-{records[0]['timestamp'][:10]}-{records[0]['id']}-{records[-1]['id']}.ndjson.gz"
+        path = os.path.join(archive_dir, file_name)
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+        os.replace(path + '.tmp', path)
+
+        manifest['segments'].append({
+            'file': file_name,
+            'count': len(records),
+            'min_id': min(record['id'] for record in records),
+            'max_id': max(record['id'] for record in records),
+            'min_timestamp': records[0]['timestamp'],
+            'max_timestamp': records[-1]['timestamp'],
+            'operation_types': sorted({record['operation_type'] for record in records}),
+        })
+        _save_manifest(archive_dir, manifest)
+
+        ids = [record['id'] for record in records]
+        for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+            db.session.execute(delete(OperationLog).where(OperationLog.id.in_(ids[start:start + DELETE_CHUNK_SIZE])))
+        db.session.commit()
+        archived += len(records)
+
+    return archived
+
+
+def query_archived_logs(archive_dir, operation_type=None, since=None, until=None, cursor=None, limit=None):
+    """
+    Read a page of archived operation logs, newest first.
+
+    Takes the same filters and cursor as query_logs. Segments whose time range
+    or operation types cannot match are skipped using the manifest alone.
+    Segments hold their logs oldest first, so a segment is read up to the
+    cursor (or `until`) only, and at most `limit` + 1 of its matches are kept;
+    segments are read newest first until none can hold a log of the page.
+
+    Returns:
+    - Tuple (logs, next_cursor), where logs are dicts shaped like OperationLog.to_dict()
+    """
+    segments = sorted(
+        _load_manifest(archive_dir)['segments'],
+        key=lambda segment: (segment['max_timestamp'], segment['max_id']),
+        reverse=True
+    )
+    cursor_key = tuple(cursor) if cursor is not None else None
+    keep = limit + 1 if limit is not None else None
+    logs = []
+
+    for segment in segments:
+        min_timestamp = datetime.fromisoformat(segment['min_timestamp'])
+        max_timestamp = datetime.fromisoformat(segment['max_timestamp'])
+        # The page is full and this segment (and every later one) only has older logs
+        if keep is not None and len(logs) == keep and (max_timestamp, segment['max_id']) < logs[-1][:2]:
+            break
+        if since is not None and max_timestamp < since:
+            continue
+        if until is not None and min_timestamp >= until:
+            continue
+        if cursor_key is not None and (min_timestamp, segment['min_id']) >= cursor_key:
+            continue
+        if operation_type and operation_type not in segment['operation_types']:
+            continue
+
+        # Only the newest matches of the segment can make it into the page
+        matches = deque(maxlen=keep)
+        with gzip.open(os.path.join(archive_dir, segment['file']), 'rt', encoding='utf-8') as file:
+            for line in file:
+                record = json.loads(line)
+                timestamp = datetime.fromisoformat(record['timestamp'])
+                if cursor_key is not None and (timestamp, record['id']) >= cursor_key:
+                    break
+                if until is not None and timestamp >= until:
+                    break
+                if operation_type and record['operation_type'] != operation_type:
+                    continue
+                if since is not None and timestamp < since:
+                    continue
+                matches.append((timestamp, record['id'], record))
+        logs.extend(matches)
+        logs.sort(key=lambda match: match[:2], reverse=True)
+        if keep is not None:
+            del logs[keep:]
+
+    next_cursor = None
+    if limit is not None and len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1][0], logs[-1][1])
+    return [record for _, _, record in logs], next_cursor
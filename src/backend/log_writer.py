@@ -0,0 +1,154 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FULL_POLICIES = ('block', 'drop')
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class OperationLogWriter:
+    """
+    Background writer that stores operation log records in batches.
+
+    Records are put on a bounded in-process queue and a worker thread inserts
+    them with one bulk INSERT per batch, either when `batch_size` records are
+    waiting or when `flush_interval` seconds have passed since the first one.
+    When the queue is full, the 'block' policy makes the caller wait (up to
+    `block_timeout` seconds, then drop) and the 'drop' policy discards the
+    record right away. Pending records are flushed on stop().
+
+    Parameters:
+    - write_batch: Callable that inserts a list of record dicts; it runs
+      inside an application context
+    - dropped_record: Optional callable that turns a number of dropped
+      records into a record noting the loss, written with the next batch
+    """
+
+    def __init__(self, write_batch, queue_size=10000, batch_size=500, flush_interval=1.0,
+                 full_policy='block', block_timeout=None, dropped_record=None):
+        self.write_batch = write_batch
+        self.dropped_record = dropped_record
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written = 0
+        self._dropped_noted = 0
+        self._app = None
+        self._queue = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self, app):
+        if self.running:
+            return
+        if self.full_policy not in FULL_POLICIES:
+            raise ValueError(f"full_policy must be one of {FULL_POLICIES}")
+        self._app = app
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Queue a record for writing. Returns False if it had to be dropped."""
+        try:
+            if self.full_policy == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Operation log queue is full, %d records dropped so far", self.dropped)
+            return False
+
+    def flush(self, timeout=None):
+        """Wait until every record queued so far has been written."""
+        if not self.running:
+            return
+        request = _FlushRequest()
+        self._queue.put(request)
+        request.done.wait(timeout)
+
+    def stop(self, timeout=10):
+        """Flush pending records and stop the worker thread."""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            waiters = []
+            item = self._queue.get()
+
+            # Juntar registros hasta llenar el lote o vencer el intervalo
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, _FlushRequest):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stopping or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            # Drain what is already queued on shutdown so nothing is lost
+            while stopping:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, _FlushRequest):
+                    waiters.append(item)
+                elif item is not _STOP:
+                    batch.append(item)
+
+            self._write(batch)
+            for waiter in waiters:
+                waiter.done.set()
+
+    def _write(self, batch):
+        dropped = self.dropped
+        if self.dropped_record is not None and dropped > self._dropped_noted:
+            batch.append(self.dropped_record(dropped - self._dropped_noted))
+            self._dropped_noted = dropped
+        if not batch:
+            return
+        try:
+            with self._app.app_context():
+                for start in range(0, len(batch), self.batch_size):
+                    self.write_batch(batch[start:start + self.batch_size])
+            self.written += len(batch)
+        except Exception:
+            logger.exception("Could not write %d operation log records", len(batch))
@@ -0,0 +1,216 @@
+import heapq
+import logging
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500, 1000)
+SEARCH_SIZE_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+# Slowest statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 20
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                     for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        # Por cada combinación de etiquetas: [conteos por cubeta..., suma, total]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted((label_values, list(series)) for label_values, series in self._series.items())
+        for label_values, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labels + ('le',), label_values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels + ('le',), label_values + ('+Inf',))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(float(series[-2]))}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Metrics:
+    """
+    In-process request and path-search metrics, rendered in the Prometheus
+    text exposition format.
+
+    init_app() times every request per endpoint and counts the SQL
+    statements it runs through engine events; statements outside a request
+    (the background log writer) are counted separately. Each process keeps
+    its own numbers, as with any Prometheus client without a shared store.
+
+    With `slow_request_ms` set, requests slower than that are logged with
+    their slowest statements.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'graphtracker_http_request_duration_seconds', "Time to build the response, per endpoint",
+            LATENCY_BUCKETS, ('endpoint', 'method', 'status'))
+        self.request_statements = Histogram(
+            'graphtracker_sql_statements_per_request', "SQL statements run by one request",
+            STATEMENT_BUCKETS, ('endpoint',))
+        self.request_sql_duration = Histogram(
+            'graphtracker_sql_duration_per_request_seconds', "Time spent in SQL by one request",
+            LATENCY_BUCKETS, ('endpoint',))
+        self.statements = Counter(
+            'graphtracker_sql_statements_total', "SQL statements run, inside or outside a request",
+            ('context',))
+        self.path_nodes_expanded = Histogram(
+            'graphtracker_path_search_nodes_expanded', "Nodes expanded by one simple path search",
+            SEARCH_SIZE_BUCKETS)
+        self.path_paths_found = Histogram(
+            'graphtracker_path_search_paths_found', "Paths returned by one path search",
+            SEARCH_SIZE_BUCKETS, ('mode',))
+        self.path_truncated = Counter(
+            'graphtracker_path_search_truncated_total', "Path searches cut short, by reason",
+            ('reason',))
+        self.slow_request_ms = None
+        self._gauges = []
+
+    def add_gauge(self, name, help_text, read, kind='gauge'):
+        """Register a metric whose value is read by calling `read()` at scrape time."""
+        self._gauges.append((name, help_text, read, kind))
+
+    def observe_path_search(self, mode, paths_found, nodes_expanded=None, truncated=None):
+        self.path_paths_found.observe(paths_found, mode)
+        if nodes_expanded is not None:
+            self.path_nodes_expanded.observe(nodes_expanded)
+        if truncated:
+            self.path_truncated.inc(truncated)
+
+    def render(self):
+        lines = []
+        for metric in (self.request_duration, self.request_statements, self.request_sql_duration,
+                       self.statements, self.path_nodes_expanded, self.path_paths_found, self.path_truncated):
+            lines.extend(metric.render())
+        for name, help_text, read, kind in self._gauges:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {_format_value(read())}"])
+        return '\n'.join(lines) + '\n'
+
+    def response(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    # Request instrumentation
+
+    def init_app(self, app, engine):
+        self.slow_request_ms = app.config.get('METRICS_SLOW_REQUEST_MS')
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql = [0, 0.0]
+        g.metrics_statements = [] if self.slow_request_ms is not None else None
+
+    def _after_request(self, response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        count, sql_seconds = g.metrics_sql
+        self.request_duration.observe(elapsed, endpoint, request.method, response.status_code)
+        self.request_statements.observe(count, endpoint)
+        self.request_sql_duration.observe(sql_seconds, endpoint)
+
+        if self.slow_request_ms is not None and elapsed * 1000 >= self.slow_request_ms:
+            slowest = sorted(g.metrics_statements, reverse=True)[:5]
+            logger.warning(
+                "Slow request: %s %s took %.1f ms, %d SQL statements in %.1f ms%s",
+                request.method, request.full_path.rstrip('?'), elapsed * 1000, count, sql_seconds * 1000,
+                ''.join(f"\n    {seconds * 1000:.1f} ms  {statement}" for seconds, statement in slowest)
+            )
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_started'].pop()
+        if has_request_context() and 'metrics_sql' in g:
+            self.statements.inc('request')
+            g.metrics_sql[0] += 1
+            g.metrics_sql[1] += elapsed
+            statements = g.metrics_statements
+            # Min-heap of the slowest statements so far; the text is only normalized when kept
+            if statements is not None:
+                if len(statements) < MAX_LOGGED_STATEMENTS:
+                    heapq.heappush(statements, (elapsed, ' '.join(statement.split())[:500]))
+                elif elapsed > statements[0][0]:
+                    heapq.heapreplace(statements, (elapsed, ' '.join(statement.split())[:500]))
+        else:
+            self.statements.inc('background')
+
+    def _handle_error(self, context):
+        # A failed statement never reaches after_cursor_execute; its start time must not
+        # stay on the connection, or the next statement would be timed from it
+        connection = context.connection
+        if connection is not None and not connection.invalidated:
+            started = connection.info.get('metrics_started')
+            if started:
+                started.pop()
+
+
+metrics = Metrics()
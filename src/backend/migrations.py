@@ -0,0 +1,86 @@
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+
+try:
+    import fcntl
+except ImportError:  # fcntl solo existe en Unix; sin él no hay varios workers que coordinar
+    fcntl = None
+
+
+@contextmanager
+def schema_lock(path):
+    """
+    Hold an exclusive lock on the file at `path` while the schema is created or upgraded.
+
+    Every WSGI worker runs the upgrade when it starts; without the lock two
+    of them can both see a column or index missing and both try to add it.
+    The second one, once it gets the lock, inspects the upgraded schema and
+    finds nothing left to do. With no path, or no fcntl, nothing is locked.
+    """
+    if path is None or fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def upgrade_schema(db):
+    """
+    Bring an existing database up to date with the models.
+
+    db.create_all() only creates missing tables, so columns and indexes
+    declared on the models after a database was first created have to be
+    added here. New columns must be nullable or have a server default.
+    Tables declared with sqlite_autoincrement that were created without it
+    are rebuilt with it. Must be called inside an application context, and
+    under schema_lock() when several processes may start at once.
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=db.engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                connection.execute(text(ddl))
+
+        if db.engine.dialect.name == 'sqlite':
+            for table in db.metadata.sorted_tables:
+                if table.dialect_options['sqlite']['autoincrement'] and not _has_autoincrement(connection, table):
+                    _rebuild_with_autoincrement(connection, table)
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def _has_autoincrement(connection, table):
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table.name}
+    ).scalar()
+    return 'AUTOINCREMENT' in (sql or '').upper()
+
+
+def _rebuild_with_autoincrement(connection, table):
+    # SQLite cannot add AUTOINCREMENT to an existing table, so the rows are
+    # copied into a new one; the ids are kept and the sequence continues after them
+    old_name = f"{table.name}_without_autoincrement"
+    for index in table.indexes:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+    table.create(bind=connection)
+    columns = ', '.join(column.name for column in table.columns)
+    connection.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}"))
+    connection.execute(text(f"DROP TABLE {old_name}"))
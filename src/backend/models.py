@@ -1,17 +1,25 @@
+import atexit
+import os
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import pytz
 import json
 from typing import Optional, List
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, UniqueConstraint, String, Integer, Float, Text, DateTime
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, String, Integer, Float, Text, DateTime, insert
+from backend.engine import install_engine_hooks
+from backend.log_writer import OperationLogWriter
+from backend.migrations import schema_lock, upgrade_schema
 
 db = SQLAlchemy()
 
 def init_db(app):
     db.init_app(app)
     with app.app_context():
-        db.create_all()
+        install_engine_hooks(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        with schema_lock(app.config.get('SCHEMA_LOCK_FILE')):
+            db.create_all()
+            upgrade_schema(db)
+    start_log_writer(app)
 
 
 class Node(db.Model):
@@ -54,7 +62,12 @@ class Edge(db.Model):
     target: Mapped["Node"] = relationship('Node', foreign_keys=[target_id], back_populates='incoming_edges')
 
     # Ensure that combination of source_id and target_id is unique
-    __table_args__ = (UniqueConstraint('source_id', 'target_id', name='_source_target_uc'),)
+    __table_args__ = (
+        UniqueConstraint('source_id', 'target_id', name='_source_target_uc'),
+        # Incoming edges (node delete cascade) and edge lookups by name from a node
+        Index('ix_edges_target_id', 'target_id'),
+        Index('ix_edges_source_id_name', 'source_id', 'name'),
+    )
 
     def to_dict(self):
         return {
@@ -74,6 +87,7 @@ class Visitor(db.Model):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     current_node_id: Mapped[int] = mapped_column(Integer, ForeignKey('nodes.id'), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default='1')
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -81,11 +95,18 @@ class Visitor(db.Model):
     current_node: Mapped["Node"] = relationship('Node', back_populates='visitors')
     movement_history: Mapped[List["VisitorMovement"]] = relationship('VisitorMovement', back_populates='visitor', cascade='all, delete-orphan')
 
+    __table_args__ = (Index('ix_visitors_current_node_id', 'current_node_id'),)
+
+    # Optimistic concurrency: every UPDATE checks and bumps the version, and
+    # raises StaleDataError if another transaction changed the visitor first
+    __mapper_args__ = {'version_id_col': version}
+
     def to_dict(self):
         return {
             'id': self.id,
             'name': self.name,
             'current_node_id': self.current_node_id,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -98,13 +119,16 @@ class VisitorMovement(db.Model):
     visitor_id: Mapped[int] = mapped_column(Integer, ForeignKey('visitors.id'), nullable=False)
     node_id: Mapped[int] = mapped_column(Integer, ForeignKey('nodes.id'), nullable=False)
     edge_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('edges.id'), nullable=True)  # Null for initial placement
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(pytz.UTC))
+    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
     visitor: Mapped["Visitor"] = relationship('Visitor', back_populates='movement_history')
     node: Mapped["Node"] = relationship('Node')
     edge: Mapped[Optional["Edge"]] = relationship('Edge')
 
+    # A visitor's history, in order
+    __table_args__ = (Index('ix_visitor_movements_visitor_id_timestamp', 'visitor_id', 'timestamp'),)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -117,6 +141,43 @@ class VisitorMovement(db.Model):
         }
 
 
+# Traversal analytics, kept up to date as visitors move (see backend/analytics.py).
+# Counts are bucketed by hour; ids are not foreign keys so the history outlives deletions.
+
+class NodeVisitStat(db.Model):
+    __tablename__ = 'node_visit_stats'
+
+    node_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    visits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index('ix_node_visit_stats_bucket_start', 'bucket_start'),)
+
+
+class EdgeTraversalStat(db.Model):
+    __tablename__ = 'edge_traversal_stats'
+
+    edge_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    traversals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (Index('ix_edge_traversal_stats_bucket_start', 'bucket_start'),)
+
+
+class VisitorStat(db.Model):
+    __tablename__ = 'visitor_stats'
+
+    visitor_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    moves: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    last_move_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+# Operation type of the record noting that the background writer dropped records
+DROPPED_LOGS = 'DROPPED_LOGS'
+
+
 class OperationLog(db.Model):
     __tablename__ = 'operation_logs'
 
@@ -125,6 +186,15 @@ class OperationLog(db.Model):
     details: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    # Serve the log viewer's newest-first pages and type filters from indexes.
+    # AUTOINCREMENT keeps ids from being reused once archiving has emptied the
+    # table, since the event stream uses them as event ids
+    __table_args__ = (
+        Index('ix_operation_logs_timestamp', 'timestamp'),
+        Index('ix_operation_logs_operation_type_timestamp', 'operation_type', 'timestamp'),
+        {'sqlite_autoincrement': True},
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -134,12 +204,70 @@ class OperationLog(db.Model):
         }
 
 
+def _write_log_batch(rows):
+    db.session.execute(insert(OperationLog), rows)
+    db.session.commit()
+
+
+def _dropped_log_record(count):
+    # Lets readers of the log, such as the event stream, know that records are missing
+    return {
+        'operation_type': DROPPED_LOGS,
+        'details': json.dumps({'count': count}),
+        'timestamp': datetime.utcnow()
+    }
+
+
+log_writer = OperationLogWriter(_write_log_batch, dropped_record=_dropped_log_record)
+
+
+def start_log_writer(app):
+    """Start the background operation log writer if OPERATION_LOG_ASYNC is enabled"""
+    if not app.config.get('OPERATION_LOG_ASYNC', False):
+        return
+    log_writer.queue_size = app.config.get('OPERATION_LOG_QUEUE_SIZE', log_writer.queue_size)
+    log_writer.batch_size = app.config.get('OPERATION_LOG_BATCH_SIZE', log_writer.batch_size)
+    log_writer.flush_interval = app.config.get('OPERATION_LOG_FLUSH_INTERVAL', log_writer.flush_interval)
+    log_writer.full_policy = app.config.get('OPERATION_LOG_FULL_POLICY', log_writer.full_policy)
+    log_writer.block_timeout = app.config.get('OPERATION_LOG_BLOCK_TIMEOUT', log_writer.block_timeout)
+    log_writer.start(app)
+    atexit.register(log_writer.stop)
+    # The writer thread does not survive a fork; each worker process gets its own
+    os.register_at_fork(after_in_child=lambda: log_writer.start(app))
+
+
 def log_operation(operation_type, details):
-    """Utility function to log operations"""
-    log = OperationLog(
-        operation_type=operation_type,
-        details=json.dumps(details) if isinstance(details, dict) else str(details)
-    )
+    """
+    Utility function to log operations
+
+    With the background writer running the record is queued and written in a
+    later batch, and None is returned; otherwise it is committed right away.
+    """
+    details = json.dumps(details) if isinstance(details, dict) else str(details)
+    if log_writer.running:
+        log_writer.submit({
+            'operation_type': operation_type,
+            'details': details,
+            'timestamp': datetime.utcnow()
+        })
+        return None
+
+    log = OperationLog(operation_type=operation_type, details=details)
     db.session.add(log)
     db.session.commit()
     return log
+
+
+def log_operations(entries):
+    """Log several (operation_type, details) pairs, committing at most once"""
+    if log_writer.running:
+        for operation_type, details in entries:
+            log_operation(operation_type, details)
+        return
+
+    for operation_type, details in entries:
+        db.session.add(OperationLog(
+            operation_type=operation_type,
+            details=json.dumps(details) if isinstance(details, dict) else str(details)
+        ))
+    db.session.commit()
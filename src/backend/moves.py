@@ -0,0 +1,175 @@
+from backend.analytics import record_movements
+from backend.graph_cache import graph_cache
+from backend.models import db, Edge, Node, Visitor, VisitorMovement, log_operations
+
+MAX_BATCH_MOVES = 1000
+# Ids per IN (...) lookup, below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _load_visitors(visitor_ids):
+    visitors = {}
+    visitor_ids = list(visitor_ids)
+    for start in range(0, len(visitor_ids), LOOKUP_CHUNK_SIZE):
+        chunk = visitor_ids[start:start + LOOKUP_CHUNK_SIZE]
+        for visitor in db.session.execute(db.select(Visitor).where(Visitor.id.in_(chunk))).scalars():
+            visitors[visitor.id] = visitor
+    return visitors
+
+
+def _cached_edge_ids(graph, moves, visitors):
+    # Fast path: the edges the graph cache expects the batch to use, following
+    # each visitor along its moves. They still have to be confirmed in the database
+    positions = {visitor_id: visitor.current_node_id for visitor_id, visitor in visitors.items()}
+    edge_ids = set()
+    for move in moves:
+        if not isinstance(move, dict) or move.get('visitor_id') not in positions \
+                or not isinstance(move.get('target_node_name'), str):
+            continue
+        target_node_id = graph_cache.get_node_id(move.get('target_node_name'))
+        if target_node_id is None:
+            continue
+        edge = graph.get_edge_data(positions[move['visitor_id']], target_node_id)
+        if edge is not None and edge['name'] == move.get('edge_name'):
+            edge_ids.add(edge['id'])
+            positions[move['visitor_id']] = target_node_id
+    return edge_ids
+
+
+def _edge_columns():
+    return (Edge.id, Edge.source_id, Edge.target_id, Edge.name, Edge.weight, Node.name)
+
+
+def _load_edges(edge_ids):
+    """Committed edges by (source_id, edge name, target node name), with one query per chunk of ids."""
+    edges = {}
+    edge_ids = list(edge_ids)
+    for start in range(0, len(edge_ids), LOOKUP_CHUNK_SIZE):
+        chunk = edge_ids[start:start + LOOKUP_CHUNK_SIZE]
+        rows = db.session.execute(
+            db.select(*_edge_columns()).join(Node, Node.id == Edge.target_id).where(Edge.id.in_(chunk))
+        )
+        for row in rows:
+            edges[(row[1], row[3], row[5])] = row
+    return edges
+
+
+def _lookup_edge(source_id, edge_name, target_node_name):
+    # Same lookup as a single move, for moves the graph cache could not resolve
+    return db.session.execute(
+        db.select(*_edge_columns()).join(Node, Node.id == Edge.target_id)
+        .where(Edge.source_id == source_id, Edge.name == edge_name, Node.name == target_node_name)
+    ).first()
+
+
+def move_visitors(moves):
+    """
+    Apply a batch of visitor moves in a single transaction.
+
+    Each move is a dict with visitor_id, edge_name and target_node_name and
+    is checked exactly like a single move: the target node must exist and the
+    visitor's current node must have an edge with that name leading to it.
+    Moves are applied in order, so a visitor can move more than once in the
+    same batch. Invalid moves are reported and skipped; the rest are committed
+    together. If another request changes one of the visitors in the meantime,
+    StaleDataError is raised and nothing is applied.
+
+    Visitors are loaded with one query per chunk of ids. The graph cache
+    proposes the edge of each move and one query per chunk of edge ids
+    confirms them in the database, since the cache of this process can lag
+    behind writes made through other processes. Moves the cache cannot
+    resolve are looked up in the database one by one, like a single move.
+
+    Parameters:
+    - moves: List of move dicts
+
+    Returns:
+    - List with one result dict per move, in the same order, with a 'status'
+      of 200, 400, 404 or 409 (when the move's optional `version` is stale)
+    """
+    visitors = _load_visitors({move['visitor_id'] for move in moves
+                               if isinstance(move, dict) and isinstance(move.get('visitor_id'), int)})
+    edges = _load_edges(_cached_edge_ids(graph_cache.get_graph(), moves, visitors))
+    results = []
+    applied = []
+
+    for index, move in enumerate(moves):
+        if not isinstance(move, dict) or not isinstance(move.get('visitor_id'), int) \
+                or not isinstance(move.get('edge_name'), str) or not isinstance(move.get('target_node_name'), str):
+            results.append({'index': index, 'status': 400,
+                            'error': "Se requiere visitor_id, el nombre de la arista y el nombre del nodo destino"})
+            continue
+
+        visitor = visitors.get(move['visitor_id'])
+        edge_name = move['edge_name']
+        target_node_name = move['target_node_name']
+        if visitor is None:
+            results.append({'index': index, 'visitor_id': move['visitor_id'], 'status': 404,
+                            'error': f"No se encontró el visitante {move['visitor_id']}"})
+            continue
+
+        if move.get('version') is not None and move['version'] != visitor.version:
+            results.append({'index': index, 'visitor_id': visitor.id, 'status': 409,
+                            'error': f"El visitante {visitor.id} está en la versión {visitor.version}, no en la {move['version']}"})
+            continue
+
+        # Buscar la arista que conecta el nodo actual del visitante con el nodo destino
+        old_node_id = visitor.current_node_id
+        edge = edges.get((old_node_id, edge_name, target_node_name))
+        if edge is None:
+            edge = _lookup_edge(old_node_id, edge_name, target_node_name)
+        if edge is None:
+            target_exists = db.session.execute(
+                db.select(Node.id).where(Node.name == target_node_name)
+            ).first() is not None
+            if not target_exists:
+                results.append({'index': index, 'visitor_id': visitor.id, 'status': 404,
+                                'error': f"No se encontró el nodo destino '{target_node_name}'"})
+            else:
+                results.append({'index': index, 'visitor_id': visitor.id, 'status': 404,
+                                'error': f"No existe una arista llamada '{edge_name}' desde la ubicación actual hacia '{target_node_name}'"})
+            continue
+
+        edge_id, _, target_node_id, edge_name, weight, node_name = edge
+        edge = {'id': edge_id, 'name': edge_name, 'weight': weight, 'node_name': node_name}
+        visitor.current_node_id = target_node_id
+        movement = VisitorMovement(visitor_id=visitor.id, node_id=target_node_id, edge_id=edge['id'])
+        db.session.add(movement)
+        result = {'index': index, 'visitor_id': visitor.id, 'status': 200}
+        results.append(result)
+        applied.append((result, visitor, movement, old_node_id, target_node_id, edge))
+
+    if not applied:
+        return results
+
+    # Flush first so ids and timestamps are known without reloading every row after commit
+    db.session.flush()
+    log_entries = []
+    for result, visitor, movement, old_node_id, target_node_id, edge in applied:
+        node_name = edge['node_name']
+        result['visitor'] = dict(visitor.to_dict(), current_node_id=target_node_id)
+        result['movement'] = {
+            'id': movement.id,
+            'visitor_id': visitor.id,
+            'node_id': target_node_id,
+            'node_name': node_name,
+            'edge_id': edge['id'],
+            'edge_name': edge['name'],
+            'timestamp': movement.timestamp.isoformat() if movement.timestamp else None
+        }
+        result['message'] = f"Visitante '{visitor.name}' movido al nodo '{node_name}' por la arista '{edge['name']}'"
+        log_entries.append(('MOVE_VISITOR', {
+            'visitor_id': visitor.id,
+            'visitor_name': visitor.name,
+            'from_node_id': old_node_id,
+            'to_node_id': target_node_id,
+            'to_node_name': node_name,
+            'edge_id': edge['id'],
+            'edge_name': edge['name']
+        }))
+    record_movements((visitor.id, target_node_id, edge['id'], edge['weight'], movement.timestamp)
+                     for _, visitor, movement, _, target_node_id, edge in applied)
+    db.session.commit()
+
+    log_operations(log_entries)
+    return results
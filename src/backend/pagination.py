@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+from backend.models import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values):
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    Datetimes are stored as ISO strings and turned back into datetimes by
+    decode_cursor.
+    """
+    payload = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a (timestamp, id) cursor made by encode_cursor.
+
+    Raises ValueError if it is malformed, e.g. tampered with by the client.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(payload, list) or len(payload) != 2:
+            raise ValueError
+        timestamp, row_id = payload
+        timestamp = datetime.fromisoformat(timestamp['dt'])
+        # Timestamps are stored naive; an aware one could not be compared with them
+        if timestamp.tzinfo is not None or not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise ValueError
+        return [timestamp, row_id]
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_limit(value, default=None, maximum=MAX_PAGE_SIZE):
+    """Validate a page size parameter. Raises ValueError if it is not a positive integer."""
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a positive integer")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into a naive UTC datetime, as stored in the database."""
+    if value is None or value == '':
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid timestamp '{value}', expected ISO 8601")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_fields(model, value):
+    """
+    Parse a comma separated `fields` projection into column names of `model`.
+
+    Returns None when no projection was requested. Raises ValueError on
+    unknown fields.
+    """
+    if not value:
+        return None
+    available = model.__table__.columns.keys()
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}")
+    return fields
+
+
+def select_rows_page(model, fields=None, after=None, limit=None):
+    """
+    Read a page of rows of `model` as plain dicts, ordered by id.
+
+    Only the requested columns are selected and rows are never hydrated into
+    ORM entities. Without a projection every column is returned, matching
+    the model's to_dict() output.
+
+    Parameters:
+    - model: Model class with an integer `id` primary key
+    - fields: Column names to return, or None for all of them
+    - after: Only return rows with an id greater than this one
+    - limit: Page size, or None for every row
+
+    Returns:
+    - Tuple (rows, next_after), where next_after is None on the last page
+    """
+    fields = fields or model.__table__.columns.keys()
+    # The id is always read because the cursor is built from it
+    names = fields if 'id' in fields else ['id'] + list(fields)
+    query = db.select(*[getattr(model, name) for name in names]).order_by(model.id)
+    if after is not None:
+        query = query.where(model.id > after)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    result = db.session.execute(query).all()
+    next_after = None
+    if limit is not None and len(result) > limit:
+        result = result[:limit]
+        next_after = result[-1][names.index('id')]
+
+    rows = []
+    for row in result:
+        values = dict(zip(names, row))
+        rows.append({
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in values.items() if name in fields
+        })
+    return rows, next_after
+
+
+def select_entities_page(model, after=None, limit=None, options=()):
+    """
+    Read a page of `model` entities ordered by id. Returns (entities, next_after).
+
+    `options` are loader options such as joinedload(), so related objects a
+    view needs come with the page instead of one lazy load per row.
+    """
+    query = db.select(model).options(*options).order_by(model.id)
+    if after is not None:
+        query = query.where(model.id > after)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    entities = db.session.execute(query).scalars().all()
+    next_after = None
+    if limit is not None and len(entities) > limit:
+        entities = entities[:limit]
+        next_after = entities[-1].id
+    return entities, next_after
+
+
+def parse_after(value):
+    """Validate an `after` id cursor. Raises ValueError if it is not an integer."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("after must be an integer id")
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+
+class PathResultCache:
+    """
+    LRU cache of encoded path search responses, bounded by their total size.
+
+    Entries are stored for the graph cache version they were computed on.
+    As soon as a newer version is seen every entry is dropped, so a node or
+    edge mutation can never be answered from a stale result. Results larger
+    than `max_entry_bytes` are not cached at all, so one huge enumeration
+    cannot flush everything else.
+
+    Parameters:
+    - max_bytes: Total size of the cached bodies; 0 disables the cache
+    - max_entry_bytes: Largest single body that is cached, by default an
+      eighth of max_bytes
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        # Returns False for results of a version older than the cached one
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+        return True
+
+    def get(self, version, key):
+        """Return the cached (body, paths_found) for `key` at `version`, or None."""
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version, key, body, paths_found):
+        size = len(body)
+        max_entry_bytes = self.max_entry_bytes if self.max_entry_bytes is not None else self.max_bytes // 8
+        if size > max_entry_bytes:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (body, paths_found)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'graph_version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+path_cache = PathResultCache()
@@ -0,0 +1,345 @@
+from collections import OrderedDict
+
+import networkx as nx
+from backend.csr_graph import CSRGraph
+
+# Above this many strongly connected components the reach bitsets (which take
+# components² bits) are not built and reachability is answered by a search
+REACH_MAX_COMPONENTS = 4096
+# Maximum number of per-source distance tables kept at once
+DISTANCE_SOURCES_CACHED = 1024
+# Tolerance when deciding if an edge lies on a shortest path
+EPSILON = 1e-9
+
+
+def _shortest_path_lengths(graph, source):
+    if isinstance(graph, CSRGraph):
+        return graph.shortest_path_lengths(source)
+    return nx.single_source_dijkstra_path_length(graph, source, weight='weight')
+
+
+def _has_path(graph, source, target):
+    # Breadth-first search, for graphs with too many components for the bitsets
+    if source == target:
+        return True
+    seen = {source}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for successor in graph.successors(node):
+                if successor == target:
+                    return True
+                if successor not in seen:
+                    seen.add(successor)
+                    next_frontier.append(successor)
+        frontier = next_frontier
+    return False
+
+
+class ReachabilityIndex:
+    """
+    Reachability and weighted shortest distance between any two nodes.
+
+    Reachability is answered in O(1) from the condensation of the graph into
+    strongly connected components: every component has a bitset of the
+    components it can reach. The bitsets take components² bits, so above
+    `max_components` they are not built and each query runs a breadth-first
+    search instead. Distances are single-source Dijkstra tables, computed
+    when a source is first asked for and cached per source.
+
+    The index follows the graph it was built from (it must be mutated under
+    the same lock), and every change only touches the components it can
+    affect:
+    - An edge between components ORs the target's bitset into the
+      components that reach the source, or merges the components of the
+      cycle it closes.
+    - Removing the last edge between two components recomputes the bitsets
+      of the components that reached the source.
+    - Removing an edge or a node inside a component checks whether that
+      component split, from its own nodes only.
+    Only the distance tables the change can affect are dropped. Component
+    ids are not reused; once there are twice as many ids as components, the
+    next query rebuilds the index to compact them.
+
+    It also works over a CSRGraph, which is read-only and so never needs the
+    maintenance hooks.
+    """
+
+    def __init__(self, graph, max_components=REACH_MAX_COMPONENTS, max_sources=DISTANCE_SOURCES_CACHED):
+        self._graph = graph
+        self._max_components = max_components
+        self._max_sources = max_sources
+        self._distances = OrderedDict()
+        self._build()
+
+    def _build(self):
+        graph = self._graph
+        if isinstance(graph, CSRGraph):
+            component_of, successors, order = graph.condensation()
+            count = len(order)
+            links = {component: dict.fromkeys(successors[component], 1) for component in range(count)}
+        else:
+            component_of = {}
+            count = 0
+            for members in nx.strongly_connected_components(graph):
+                for node in members:
+                    component_of[node] = count
+                count += 1
+            links = {component: {} for component in range(count)}
+            for source, target in graph.edges():
+                source_component = component_of[source]
+                target_component = component_of[target]
+                if source_component != target_component:
+                    successors = links[source_component]
+                    successors[target_component] = successors.get(target_component, 0) + 1
+        self._stale = False
+        if count > self._max_components:
+            self._reach = None
+            self._component_of = self._members = self._succ = self._pred = None
+            return
+
+        members = {component: set() for component in range(count)}
+        for node, component in component_of.items():
+            members[component].add(node)
+        pred = {component: {} for component in range(count)}
+        for component, successors in links.items():
+            for successor, edges in successors.items():
+                pred[successor][component] = edges
+        self._component_of = component_of
+        self._members = members
+        # Number of graph edges from each component to each other component, both ways
+        self._succ = links
+        self._pred = pred
+        self._next_id = count
+        self._reach = {}
+        self._recompute(set(range(count)))
+
+    def _recompute(self, components):
+        # Rebuild the bitsets of `components` from their successors'; the
+        # bitsets of any other component are taken as they are
+        reach = self._reach
+        done = {}
+        for root in components:
+            if root in done:
+                continue
+            stack = [(root, iter(self._succ[root]))]
+            while stack:
+                component, successors = stack[-1]
+                for successor in successors:
+                    if successor in components and successor not in done:
+                        stack.append((successor, iter(self._succ[successor])))
+                        break
+                else:
+                    stack.pop()
+                    bits = 1 << component
+                    for successor in self._succ[component]:
+                        bits |= done[successor] if successor in components else reach[successor]
+                    done[component] = bits
+        reach.update(done)
+
+    def _ancestors(self, component):
+        # Components that reach `component`, itself included
+        return {other for other, bits in self._reach.items() if bits >> component & 1}
+
+    def _add_component(self, members):
+        component = self._next_id
+        self._next_id += 1
+        self._members[component] = members
+        self._succ[component] = {}
+        self._pred[component] = {}
+        for node in members:
+            self._component_of[node] = component
+        if self._next_id > 2 * len(self._members) + 64:
+            self._stale = True
+        return component
+
+    def _remove_component(self, component):
+        for successor in self._succ.pop(component):
+            del self._pred[successor][component]
+        for predecessor in self._pred.pop(component):
+            del self._succ[predecessor][component]
+        del self._members[component]
+        del self._reach[component]
+
+    def _link(self, source, target, delta):
+        # Returns True if the two components stopped being linked
+        edges = self._succ[source].get(target, 0) + delta
+        if edges > 0:
+            self._succ[source][target] = self._pred[target][source] = edges
+            return False
+        self._succ[source].pop(target, None)
+        self._pred[target].pop(source, None)
+        return True
+
+    def _split(self, component):
+        # Recompute the components of the nodes of `component`, after an edge
+        # or node inside it was removed; returns False if it is still one
+        members = self._members[component]
+        pieces = list(nx.strongly_connected_components(self._graph.subgraph(members)))
+        if len(pieces) == 1:
+            return False
+        ancestors = self._ancestors(component)
+        self._remove_component(component)
+        ancestors.discard(component)
+        new_components = {self._add_component(piece) for piece in pieces}
+        graph = self._graph
+        for node in members:
+            node_component = self._component_of[node]
+            for successor in graph.successors(node):
+                successor_component = self._component_of[successor]
+                if successor_component != node_component:
+                    self._link(node_component, successor_component, 1)
+            for predecessor in graph.predecessors(node):
+                predecessor_component = self._component_of[predecessor]
+                if predecessor_component not in new_components:
+                    self._link(predecessor_component, node_component, 1)
+        self._recompute(ancestors | new_components)
+        return True
+
+    def _merge(self, components, source_component):
+        # Merge the components on a cycle closed by a new edge from `source_component`;
+        # whatever reaches one of them reaches the source
+        ancestors = self._ancestors(source_component)
+        merged = set().union(*(self._members[component] for component in components))
+        outside = {}
+        for component in components:
+            for successor, edges in self._succ[component].items():
+                if successor not in components:
+                    outside[False, successor] = outside.get((False, successor), 0) + edges
+            for predecessor, edges in self._pred[component].items():
+                if predecessor not in components:
+                    outside[True, predecessor] = outside.get((True, predecessor), 0) + edges
+        for component in components:
+            self._remove_component(component)
+        new_component = self._add_component(merged)
+        for (incoming, other), edges in outside.items():
+            if incoming:
+                self._link(other, new_component, edges)
+            else:
+                self._link(new_component, other, edges)
+        self._recompute((ancestors - components) | {new_component})
+
+    def reachable(self, source, target):
+        if self._stale:
+            self._build()
+        if self._reach is None:
+            return source in self._graph and target in self._graph and _has_path(self._graph, source, target)
+        source_component = self._component_of.get(source)
+        target_component = self._component_of.get(target)
+        if source_component is None or target_component is None:
+            return False
+        return bool(self._reach[source_component] >> target_component & 1)
+
+    def distance(self, source, target):
+        """Weighted shortest distance from source to target, or None if unreachable."""
+        if not self.reachable(source, target):
+            return None
+        lengths = self._distances.get(source)
+        if lengths is None:
+            lengths = _shortest_path_lengths(self._graph, source)
+            self._distances[source] = lengths
+            if len(self._distances) > self._max_sources:
+                self._distances.popitem(last=False)
+        else:
+            self._distances.move_to_end(source)
+        return lengths.get(target)
+
+    def _edge_shortened(self, source, target, weight):
+        # Only tables where the edge gives a shorter way to `target` change
+        for node, lengths in list(self._distances.items()):
+            via_edge = lengths.get(source)
+            if via_edge is not None and via_edge + weight < lengths.get(target, float('inf')):
+                del self._distances[node]
+
+    def _edge_lengthened(self, source, target, weight):
+        # Only tables where the edge was on a shortest path change
+        for node, lengths in list(self._distances.items()):
+            via_edge = lengths.get(source)
+            if via_edge is not None and target in lengths and via_edge + weight <= lengths[target] + EPSILON:
+                del self._distances[node]
+
+    # Maintenance hooks, called after the graph itself was changed
+
+    def node_added(self, node):
+        if self._stale or self._reach is None or node in self._component_of:
+            return
+        component = self._add_component({node})
+        self._reach[component] = 1 << component
+        if len(self._members) > self._max_components:
+            self._stale = True
+
+    def node_removed(self, node, edges):
+        """`edges`: the (source, target, weight) edges removed along with the node."""
+        for source, target, weight in edges:
+            self._edge_lengthened(source, target, weight)
+        self._distances.pop(node, None)
+        if self._stale or self._reach is None:
+            return
+        component = self._component_of.pop(node, None)
+        if component is None:
+            return
+        self._members[component].discard(node)
+        for source, target, _ in edges:
+            other = target if source == node else source
+            other_component = self._component_of.get(other)
+            if other_component is None or other_component == component:
+                continue
+            if source == node:
+                self._link(component, other_component, -1)
+            else:
+                self._link(other_component, component, -1)
+        if self._members[component]:
+            if not self._split(component):
+                self._recompute(self._ancestors(component))
+        else:
+            ancestors = self._ancestors(component)
+            ancestors.discard(component)
+            self._remove_component(component)
+            self._recompute(ancestors)
+
+    def edge_added(self, source, target, weight):
+        self._edge_shortened(source, target, weight)
+        self.node_added(source)
+        self.node_added(target)
+        if self._stale or self._reach is None:
+            return
+        source_component = self._component_of[source]
+        target_component = self._component_of[target]
+        if source_component == target_component:
+            return
+        self._link(source_component, target_component, 1)
+        reach = self._reach
+        if reach[source_component] >> target_component & 1:
+            pass  # Already reachable, nothing changes
+        elif reach[target_component] >> source_component & 1:
+            # The edge closes a cycle: everything the target reaches that reaches the source
+            self._merge({component for component, bits in reach.items()
+                         if reach[target_component] >> component & 1 and bits >> source_component & 1},
+                        source_component)
+        else:
+            source_bit = 1 << source_component
+            added = reach[target_component]
+            for component, bits in reach.items():
+                if bits & source_bit:
+                    reach[component] = bits | added
+
+    def edge_removed(self, source, target, weight):
+        self._edge_lengthened(source, target, weight)
+        if self._stale or self._reach is None:
+            return
+        source_component = self._component_of.get(source)
+        target_component = self._component_of.get(target)
+        if source_component is None or target_component is None:
+            return
+        if source_component == target_component:
+            self._split(source_component)
+        elif self._link(source_component, target_component, -1):
+            self._recompute(self._ancestors(source_component))
+
+    def edge_weight_changed(self, source, target, old_weight, new_weight):
+        # Reachability is unaffected, only distances change
+        if new_weight < old_weight:
+            self._edge_shortened(source, target, new_weight)
+        elif new_weight > old_weight:
+            self._edge_lengthened(source, target, old_weight)
@@ -0,0 +1,290 @@
+import atexit
+import logging
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from pathlib import Path
+
+from backend.csr_graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+# Extra time a worker gets past its own deadline before it is killed
+KILL_GRACE_SECONDS = 1.0
+# Snapshot files kept per process, so a search queued on the previous version can still load it
+SNAPSHOTS_KEPT = 2
+
+
+class SearchTimeout(Exception):
+    """The path search did not finish within its timeout and was cancelled."""
+
+
+class SearchFailed(Exception):
+    """The worker process could not run the search."""
+
+
+def _run_search(graph, json_provider, start_node_id, end_node_id, k, max_depth, timeout):
+    from backend.utils import find_k_shortest_paths, format_paths, iter_simple_paths
+
+    stats = {}
+    deadline = time.monotonic() + timeout
+    if k is not None:
+        mode = 'k_shortest'
+        paths = find_k_shortest_paths(graph, start_node_id, end_node_id, k, max_depth, deadline, stats)
+    else:
+        mode = 'all'
+        paths = list(iter_simple_paths(graph, start_node_id, end_node_id, max_depth, deadline, stats))
+    if stats.get('timed_out'):
+        return None
+    # Encoded here exactly as jsonify() would, so the web process only forwards the bytes
+    body = json_provider.response(format_paths(paths, graph)).get_data()
+    return body, mode, len(paths), stats.get('nodes_expanded')
+
+
+def _worker_main(connection):
+    from flask import Flask
+    from backend.serialization import FastJSONProvider
+
+    # The provider only keeps a weak reference to its app
+    worker_app = Flask(__name__)
+    json_provider = FastJSONProvider(worker_app)
+    graph = None
+    loaded = None
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        snapshot_path, start_node_id, end_node_id, k, max_depth, timeout = job
+        try:
+            if snapshot_path != loaded:
+                # Se libera el grafo anterior antes de cargar el nuevo
+                graph = None
+                with open(snapshot_path, 'rb') as file:
+                    graph = pickle.load(file)
+                loaded = snapshot_path
+            result = _run_search(graph, json_provider, start_node_id, end_node_id, k, max_depth, timeout)
+            connection.send(('ok', result))
+        except Exception as error:
+            connection.send(('error', f"{type(error).__name__}: {error}"))
+
+
+class SearchPool:
+    """
+    Worker processes that run path searches outside the web process.
+
+    Path enumeration is CPU-bound pure Python, so in a threaded worker one
+    long search holds the GIL and slows every other request. Here each
+    search is sent to a separate process and the request thread just waits
+    on a socket, which releases the GIL for the other handlers.
+
+    The graph is not sent with each job: once per graph version it is
+    written as a pickled CSRGraph to `snapshot_dir`, and every worker loads
+    it the first time it gets a job for that version. The worker formats
+    and encodes the result, so the web process only forwards the bytes.
+
+    Each call has a timeout covering the wait for an idle worker and the
+    search. Searches stop themselves at the deadline; one still running
+    shortly after it (e.g. stuck in a single step of a huge graph) is
+    cancelled by killing its worker, which is replaced on demand.
+
+    Workers are started lazily, in the process that uses them, so a server
+    that forks its workers after importing the app gets one pool per process.
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self.timeout = 30.0
+        self.snapshot_dir = None
+        self.searches = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._idle_available = threading.Condition(self._lock)
+        self._idle = []
+        self._started = 0
+        self._pid = os.getpid()
+        self._snapshot_lock = threading.Lock()
+        self._snapshots = {}
+        atexit.register(self.stop)
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def configure(self, workers, snapshot_dir, timeout=30.0):
+        self.workers = workers
+        self.snapshot_dir = snapshot_dir
+        self.timeout = timeout
+        if workers:
+            os.makedirs(snapshot_dir, exist_ok=True)
+
+    def busy(self):
+        """Number of workers running a search right now."""
+        with self._lock:
+            return self._started - len(self._idle) if self._pid == os.getpid() else 0
+
+    # Snapshots
+
+    def _snapshot_path(self, graph, version):
+        with self._snapshot_lock:
+            path = self._snapshots.get(version)
+            if path is not None:
+                return path
+            snapshot = graph if isinstance(graph, CSRGraph) else CSRGraph.from_networkx(graph)
+            path = os.path.join(self.snapshot_dir, f"graph-{os.getpid()}-{version}.pickle")
+            temporary = path + '.tmp'
+            with open(temporary, 'wb') as file:
+                pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+            self._snapshots[version] = path
+            for old_version in sorted(self._snapshots)[:-SNAPSHOTS_KEPT]:
+                self._remove_snapshot(self._snapshots.pop(old_version))
+            return path
+
+    def _remove_snapshot(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # Workers
+
+    def _spawn(self):
+        parent, child = socket.socketpair()
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'backend.search_pool', str(child.fileno())],
+                cwd=SRC_DIR, pass_fds=(child.fileno(),), stdin=subprocess.DEVNULL
+            )
+        except OSError:
+            parent.close()
+            raise
+        finally:
+            child.close()
+        return process, Connection(parent.detach())
+
+    def _check_fork(self):
+        # Workers and snapshots of the parent process are not ours to use
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._started = 0
+            self._snapshots = {}
+
+    def _acquire(self, deadline):
+        with self._idle_available:
+            while not self._idle and self._started >= self.workers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._idle_available.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            return self._spawn()
+        except OSError:
+            with self._idle_available:
+                self._started -= 1
+                self._idle_available.notify()
+            raise
+
+    def _release(self, worker):
+        with self._idle_available:
+            self._idle.append(worker)
+            self._idle_available.notify()
+
+    def _discard(self, worker):
+        process, connection = worker
+        process.kill()
+        process.wait()
+        connection.close()
+        with self._idle_available:
+            self._started -= 1
+            self.restarts += 1
+            self._idle_available.notify()
+
+    def search(self, graph, version, start_node_id, end_node_id, k, max_depth, timeout=None):
+        """
+        Run a path search in a worker process.
+
+        Parameters:
+        - graph, version: The graph cache snapshot to search and its version
+        - start_node_id, end_node_id: Node IDs
+        - k: Number of cheapest paths, or None for every simple path
+        - max_depth: Path length cutoff; optional when k is set
+        - timeout: Seconds for the whole call, by default `self.timeout`
+
+        Returns:
+        - (body, mode, paths_found, nodes_expanded), body being the encoded
+          JSON list of formatted paths, cheapest first
+
+        Raises:
+        - SearchTimeout when no worker was free in time or the search ran out of time
+        - SearchFailed when the worker could not run the search
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._check_fork()
+        snapshot_path = self._snapshot_path(graph, version)
+        worker = self._acquire(deadline)
+        if worker is None:
+            self.timeouts += 1
+            raise SearchTimeout(f"No path search worker was free within {timeout} s")
+
+        process, connection = worker
+        try:
+            connection.send((snapshot_path, start_node_id, end_node_id, k, max_depth,
+                             max(deadline - time.monotonic(), 0)))
+            # poll() blocks without the GIL, so other request threads keep running
+            if not connection.poll(max(deadline - time.monotonic(), 0) + KILL_GRACE_SECONDS):
+                self._discard(worker)
+                self.timeouts += 1
+                raise SearchTimeout(f"Path search cancelled after {timeout} s")
+            status, result = connection.recv()
+        except (EOFError, OSError) as error:
+            self._discard(worker)
+            raise SearchFailed(f"Path search worker {process.pid} died: {error}") from error
+        self._release(worker)
+
+        self.searches += 1
+        if status != 'ok':
+            raise SearchFailed(result)
+        if result is None:
+            self.timeouts += 1
+            raise SearchTimeout(f"Path search stopped after {timeout} s")
+        return result
+
+    def stop(self):
+        """Stop the worker processes and remove the snapshot files of this process."""
+        with self._idle_available:
+            if self._pid != os.getpid():
+                return
+            workers, self._idle = self._idle, []
+            self._started -= len(workers)
+        for process, connection in workers:
+            connection.close()
+            try:
+                process.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        with self._snapshot_lock:
+            for path in self._snapshots.values():
+                self._remove_snapshot(path)
+            self._snapshots = {}
+
+
+search_pool = SearchPool()
+
+
+if __name__ == '__main__':
+    # Worker process: python -m backend.search_pool <socket fd>
+    _worker_main(Connection(int(sys.argv[1])))
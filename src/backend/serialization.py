@@ -0,0 +1,61 @@
+import json
+import math
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el módulo json estándar
+    orjson = None
+
+# Datetimes go through the provider's default() so they keep Flask's HTTP date format
+ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+COMPACT_SEPARATORS = (',', ':')
+
+
+def _has_non_finite(obj):
+    # orjson writes NaN and infinities as null, where the json module writes NaN/Infinity
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float) and not math.isfinite(value):
+            return True
+    return False
+
+
+def dumps_line(obj):
+    """Encode one NDJSON line (with its trailing newline), keeping the key order of `obj`."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE).decode('utf-8')
+    return json.dumps(obj) + '\n'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes compact output with orjson when it is installed.
+
+    Only dumps() is replaced; response() is Flask's, which asks for compact
+    output unless the app is in debug mode. The result decodes to the same
+    values as the default provider's: keys are sorted, datetimes and the
+    types orjson does not know go through default(), and a payload that
+    orjson cannot encode the same way (NaN or infinite floats, integers
+    beyond 64 bits) is encoded by the default provider instead. Non-ASCII
+    characters are written as UTF-8 rather than escaped. Without orjson
+    this behaves exactly like the default provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs != {'separators': COMPACT_SEPARATORS}:
+            return super().dumps(obj, **kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            body = None
+        # Non-finite floats come out as null, so only payloads with a null need checking
+        if body is None or (b'null' in body and _has_non_finite(obj)):
+            return super().dumps(obj, separators=COMPACT_SEPARATORS)
+        return body.decode('utf-8')
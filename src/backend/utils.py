@@ -1,12 +1,19 @@
+import time
+from heapq import heappop, heappush
+from itertools import count, islice
+
 import networkx as nx
-from backend.models import db, Node, Edge
+from backend.csr_graph import CSRGraph
+
+# Default maximum path length, in edges, for simple path enumeration
+DEFAULT_PATH_CUTOFF = 10
 
-def find_all_paths(graph, start_node, end_node, cutoff=10):
+def find_all_paths(graph, start_node, end_node, cutoff=DEFAULT_PATH_CUTOFF):
     """
     Find all simple paths from start_node to end_node in the graph.
     
     Parameters:
-    - graph: NetworkX DiGraph
+    - graph: NetworkX DiGraph or CSRGraph
     - start_node: Starting node ID
     - end_node: Ending node ID
     - cutoff: Maximum path length to consider (to prevent infinite paths in cyclic graphs)
@@ -14,6 +21,8 @@ def find_all_paths(graph, start_node, end_node, cutoff=10):
     Returns:
     - List of paths, where each path is a list of node IDs
     """
+    if isinstance(graph, CSRGraph):
+        return list(graph.simple_paths(start_node, end_node, cutoff))
     try:
         # Use NetworkX's built-in function to find all simple paths
         paths = list(nx.all_simple_paths(graph, start_node, end_node, cutoff=cutoff))
@@ -25,44 +34,310 @@ def find_all_paths(graph, start_node, end_node, cutoff=10):
         # One of the nodes doesn't exist
         return []
 
-def format_paths(paths):
+def iter_simple_paths(graph, start_node, end_node, cutoff=DEFAULT_PATH_CUTOFF, deadline=None, stats=None):
+    """
+    Lazily generate the simple paths from start_node to end_node.
+
+    Paths are produced in the same order as nx.all_simple_paths, but the
+    depth-first search also checks a wall-clock deadline while it explores,
+    so a search with few or no hits still stops on time.
+
+    Parameters:
+    - graph: NetworkX DiGraph or CSRGraph
+    - start_node: Starting node ID
+    - end_node: Ending node ID
+    - cutoff: Maximum path length to consider
+    - deadline: Optional time.monotonic() value after which the search stops
+    - stats: Optional dict that receives 'nodes_expanded' and, when the
+      deadline is hit, 'timed_out' = True
+
+    Returns:
+    - Generator of paths, where each path is a list of node IDs
+    """
+    if isinstance(graph, CSRGraph):
+        yield from graph.simple_paths(start_node, end_node, cutoff, deadline, stats)
+        return
+    if stats is None:
+        stats = {}
+    stats.setdefault('nodes_expanded', 0)
+    if start_node not in graph or end_node not in graph:
+        return
+    if start_node == end_node:
+        yield [start_node]
+        return
+    if cutoff < 1:
+        return
+
+    adj = graph.adj
+    path = [start_node]
+    on_path = {start_node}
+    stack = [iter(adj[start_node])]
+    steps = 0
+
+    while stack:
+        steps += 1
+        # Consultar el reloj cada tanto para no penalizar la búsqueda
+        if deadline is not None and steps % 256 == 0 and time.monotonic() > deadline:
+            stats['timed_out'] = True
+            return
+
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            on_path.discard(path.pop())
+            continue
+        if child in on_path:
+            continue
+        if child == end_node:
+            yield path + [child]
+            continue
+        if len(path) < cutoff:
+            path.append(child)
+            on_path.add(child)
+            stack.append(iter(adj[child]))
+            stats['nodes_expanded'] += 1
+
+def _weighted_adjacency(graph):
+    # Successors of a node with their weights, in adjacency order, read once per search;
+    # edges without a weight are hidden, as networkx does with weight='weight'
+    adjacency = {}
+
+    def successors(node):
+        edges = adjacency.get(node)
+        if edges is None:
+            edges = adjacency[node] = {successor: data.get('weight', 1)
+                                       for successor, data in graph.adj[node].items()
+                                       if data.get('weight', 1) is not None}
+        return edges
+    return successors
+
+
+def _hop_limited_shortest_path(successors, source, target, max_hops, ignore_nodes, ignore_edges):
+    """
+    Cheapest path from source to target with at most `max_hops` edges.
+
+    Bellman-Ford by number of edges: layer h holds the nodes reached with h
+    edges for less than with fewer. Keeping only those improvements also
+    keeps the paths simple, since weights are not negative. O(max_hops * E).
+
+    Returns:
+    - (length, path) or None if no such path exists
+    """
+    best = {source: 0}
+    layer = {source: 0}
+    parents = []
+    found = None
+    for hops in range(1, max_hops + 1):
+        next_layer = {}
+        parent = {}
+        for node, length in layer.items():
+            if node == target:
+                continue
+            for successor, weight in successors(node).items():
+                if successor in ignore_nodes or (node, successor) in ignore_edges:
+                    continue
+                candidate = length + weight
+                if candidate < best.get(successor, float('inf')) and \
+                        candidate < next_layer.get(successor, float('inf')):
+                    next_layer[successor] = candidate
+                    parent[successor] = node
+        if not next_layer:
+            break
+        best.update(next_layer)
+        parents.append(parent)
+        if target in next_layer:
+            found = next_layer[target], hops
+        layer = next_layer
+    if found is None:
+        return None
+    length, hops = found
+    path = [target]
+    for parent in reversed(parents[:hops]):
+        path.append(parent[path[-1]])
+    path.reverse()
+    return length, path
+
+
+def _depth_limited_shortest_paths(graph, start_node, end_node, max_depth, deadline, stats):
+    # Yen's algorithm, as nx.shortest_simple_paths, but every spur path is the
+    # cheapest one that keeps the whole path within max_depth edges, so longer
+    # paths are never enumerated
+    if start_node not in graph or end_node not in graph:
+        return
+    if start_node == end_node:
+        yield [start_node]
+        return
+    successors = _weighted_adjacency(graph)
+    accepted = []
+    candidates = []
+    candidate_keys = set()
+    counter = count()
+
+    def push(length, path):
+        key = tuple(path)
+        if key not in candidate_keys:
+            heappush(candidates, (length, next(counter), path))
+            candidate_keys.add(key)
+
+    previous = None
+    while True:
+        if previous is None:
+            found = _hop_limited_shortest_path(successors, start_node, end_node, max_depth, set(), set())
+            if found is None:
+                return
+            push(*found)
+        else:
+            ignore_nodes = set()
+            ignore_edges = set()
+            root_length = 0
+            for i in range(1, len(previous)):
+                root = previous[:i]
+                if i > 1:
+                    root_length += successors(previous[i - 2])[previous[i - 1]]
+                for path in accepted:
+                    if path[:i] == root:
+                        ignore_edges.add((path[i - 1], path[i]))
+                found = _hop_limited_shortest_path(successors, root[-1], end_node, max_depth - (i - 1),
+                                                   ignore_nodes, ignore_edges)
+                if found is not None:
+                    length, spur = found
+                    push(root_length + length, root[:-1] + spur)
+                ignore_nodes.add(root[-1])
+                if deadline is not None and time.monotonic() > deadline:
+                    if stats is not None:
+                        stats['timed_out'] = True
+                    return
+
+        if not candidates:
+            return
+        _, _, path = heappop(candidates)
+        candidate_keys.remove(tuple(path))
+        yield path
+        accepted.append(path)
+        previous = path
+
+
+def iter_shortest_paths(graph, start_node, end_node, max_depth=None, deadline=None, stats=None):
+    """
+    Lazily generate the simple paths from start_node to end_node, cheapest first.
+
+    With max_depth, the spur paths of Yen's algorithm are searched within
+    the remaining number of edges, so the cost stays polynomial however
+    many longer paths the graph has.
+
+    Parameters:
+    - graph: NetworkX DiGraph or CSRGraph
+    - start_node: Starting node ID
+    - end_node: Ending node ID
+    - max_depth: Optional maximum path length, in edges
+    - deadline: Optional time.monotonic() value after which the search
+      stops, checked after every path (and every spur search with max_depth)
+    - stats: Optional dict that receives 'timed_out' = True when the
+      deadline is hit
+
+    Returns:
+    - Generator of paths in order of increasing total weight
+    """
+    if max_depth is not None:
+        yield from _depth_limited_shortest_paths(graph, start_node, end_node, max_depth, deadline, stats)
+        return
+    if deadline is not None:
+        for path in iter_shortest_paths(graph, start_node, end_node):
+            yield path
+            if time.monotonic() > deadline:
+                if stats is not None:
+                    stats['timed_out'] = True
+                return
+        return
+    if isinstance(graph, CSRGraph):
+        yield from graph.shortest_simple_paths(start_node, end_node)
+        return
+    try:
+        # Yen's algorithm: each path is only computed when it is requested
+        yield from nx.shortest_simple_paths(graph, start_node, end_node, weight='weight')
+    except nx.NetworkXNoPath:
+        # No path exists
+        return
+    except nx.NodeNotFound:
+        # One of the nodes doesn't exist
+        return
+
+def find_k_shortest_paths(graph, start_node, end_node, k, max_depth=None, deadline=None, stats=None):
+    """
+    Find the k cheapest simple paths from start_node to end_node.
+
+    The search stops as soon as k paths have been found instead of
+    enumerating every simple path first.
+
+    Parameters:
+    - graph: NetworkX DiGraph or CSRGraph
+    - start_node: Starting node ID
+    - end_node: Ending node ID
+    - k: Maximum number of paths to return
+    - max_depth, deadline, stats: As for iter_shortest_paths()
+
+    Returns:
+    - List of up to k paths, cheapest first, where each path is a list of node IDs
     """
-    Format the paths into a more readable format.
+    return list(islice(iter_shortest_paths(graph, start_node, end_node, max_depth, deadline, stats), k))
+
+def format_path(path, graph):
+    """
+    Format a single path into a more readable format.
+
+    Node names and edge data are read from the attributes stored on the
+    graph, so formatting does not query the database.
+
+    Parameters:
+    - path: List of node IDs
+    - graph: NetworkX DiGraph the path was found in
+
+    Returns:
+    - Dict with the path steps and its total weight
+    """
+    path_steps = []
+
+    for i in range(len(path)):
+        node_id = path[i]
+        edge = None
+        # Agregar información de arista (excepto para el último nodo)
+        if i < len(path) - 1:
+            next_node_id = path[i + 1]
+            data = graph.edges[node_id, next_node_id]
+            edge = {
+                'id': data['id'],
+                'source_id': node_id,
+                'target_id': next_node_id,
+                'name': data['name'],
+                'weight': data['weight'],
+                'created_at': data['created_at'],
+                'updated_at': data['updated_at']
+            }
+
+        path_steps.append({
+            'node_id': node_id,
+            'node_name': graph.nodes[node_id]['name'],
+            'outbound_edge': edge,
+            'weight': edge['weight'] if edge else 0
+        })
+
+    return {
+        'steps': path_steps,
+        'total_weight': sum(step['weight'] for step in path_steps),
+    }
+
+def format_paths(paths, graph):
+    """
+    Format the paths into a more readable format, cheapest first.
 
     Parameters:
     - paths: List of paths, where each path is a list of node IDs
+    - graph: NetworkX DiGraph the paths were found in
 
     Returns:
     - List of formatted paths
     """
-    formatted_paths = []
     # Formatear las rutas
-    formatted_paths = []
-    for path in paths:
-        path_steps = []
-
-        for i in range(len(path)):
-            node_id = path[i]
-            node = db.session.get(Node, node_id)
-            edge = None
-            # Agregar información de arista (excepto para el último nodo)
-            if i < len(path) - 1:
-                next_node_id = path[i + 1]
-                edge = db.session.execute(db.select(Edge).filter_by(
-                    source_id=node_id,
-                    target_id=next_node_id
-                )).scalar_one_or_none()
-
-            path_steps.append({
-                'node_id': node.id,
-                'node_name': node.name,
-                'outbound_edge': edge.to_dict() if edge else None,
-                'weight': edge.weight if edge else 0
-            })
-
-        formatted_paths.append({
-            'steps': path_steps,
-            'total_weight': sum(step['weight'] for step in path_steps),
-        })
+    formatted_paths = [format_path(path, graph) for path in paths]
     formatted_paths.sort(key=lambda path: path['total_weight'])
-    return formatted_paths
\ No newline at end of file
+    return formatted_paths
@@ -0,0 +1,188 @@
+"""
+Memory and path-search speed of the networkx and CSR graph backends.
+
+For every graph kind and size it builds both in-memory representations of
+a synthetic graph (see synthetic.py) from the same rows the graph cache
+loads, measures what each one allocates, and times the searches the API
+runs on them:
+
+    simple paths (up to --max-depth edges), k cheapest paths, distance
+
+Every search is run on both backends and their results are compared, so
+the run fails if the CSR routines ever return something different.
+
+Usage:
+    python src/benchmarks/bench_graph_backends.py --sizes 10000,100000 --output results.json
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+import networkx as nx
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(SRC_DIR))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from synthetic import KINDS, generate_graph
+from backend.csr_graph import CSRGraph
+from backend.graph_cache import _edge_attributes
+from backend.utils import find_k_shortest_paths, iter_simple_paths
+
+
+def graph_rows(records):
+    """Turn import records into the (nodes, edges) rows the graph cache reads from the database."""
+    ids = {}
+    nodes = []
+    for record in records:
+        if record['type'] == 'node':
+            ids[record['name']] = len(ids) + 1
+            nodes.append((ids[record['name']], record['name']))
+    created_at = datetime(2025, 1, 1)
+    edges = [
+        (edge_id, ids[record['source']], ids[record['target']], record['name'], record['weight'],
+         created_at + timedelta(seconds=edge_id), created_at + timedelta(seconds=edge_id))
+        for edge_id, record in enumerate((record for record in records if record['type'] == 'edge'), start=1)
+    ]
+    return nodes, edges
+
+
+def build_networkx(nodes, edges):
+    # Lo que guarda la caché: el grafo vivo, su copia congelada y los extremos de cada arista
+    graph = nx.DiGraph()
+    for node_id, name in nodes:
+        graph.add_node(node_id, name=name)
+    edge_endpoints = {}
+    for edge_id, source_id, target_id, name, weight, created_at, updated_at in edges:
+        graph.add_edge(source_id, target_id, **_edge_attributes(edge_id, name, weight, created_at, updated_at))
+        edge_endpoints[edge_id] = (source_id, target_id)
+    return graph, nx.freeze(graph.copy()), edge_endpoints
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def bench_graph(kind, size, args):
+    records = generate_graph(kind, size, edges=size * args.edge_factor, min_weight=args.min_weight,
+                             max_weight=args.max_weight, seed=args.seed)
+    nodes, edges = graph_rows(records)
+    (_, snapshot, _), networkx_bytes = measure(build_networkx, nodes, edges)
+    csr, csr_bytes = measure(CSRGraph, nodes, edges)
+    graphs = {'networkx': snapshot, 'csr': csr}
+
+    rng = random.Random(args.seed)
+    node_ids = [node_id for node_id, _ in nodes]
+    pairs = [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(args.repeat)]
+    searches = {
+        'simple_paths': lambda graph, source, target: list(
+            islice(iter_simple_paths(graph, source, target, args.max_depth), args.max_paths)),
+        'k_shortest': lambda graph, source, target: find_k_shortest_paths(graph, source, target, args.k),
+    }
+
+    operations = {}
+    for operation, search in searches.items():
+        totals = {}
+        results = {}
+        for backend, graph in graphs.items():
+            results[backend], totals[backend] = timed(lambda: [search(graph, *pair) for pair in pairs])
+        if results['networkx'] != results['csr']:
+            raise RuntimeError(f"{operation} differs between backends on the {kind} graph of {size} nodes")
+        operations[operation] = {
+            'paths_found': sum(len(paths) for paths in results['csr']),
+            'networkx_ms': round(totals['networkx'], 3),
+            'csr_ms': round(totals['csr'], 3),
+            'speedup': round(totals['networkx'] / totals['csr'], 2) if totals['csr'] else None,
+        }
+
+    sources = [source for source, _ in pairs]
+    lengths = {}
+    totals = {}
+    lengths['networkx'], totals['networkx'] = timed(
+        lambda: [nx.single_source_dijkstra_path_length(snapshot, source, weight='weight') for source in sources])
+    lengths['csr'], totals['csr'] = timed(lambda: [csr.shortest_path_lengths(source) for source in sources])
+    if lengths['networkx'] != lengths['csr']:
+        raise RuntimeError(f"distances differ between backends on the {kind} graph of {size} nodes")
+    operations['single_source_distances'] = {
+        'networkx_ms': round(totals['networkx'], 3),
+        'csr_ms': round(totals['csr'], 3),
+        'speedup': round(totals['networkx'] / totals['csr'], 2) if totals['csr'] else None,
+    }
+
+    return {
+        'nodes': csr.number_of_nodes(),
+        'edges': csr.number_of_edges(),
+        'memory': {
+            'networkx_bytes': networkx_bytes,
+            'csr_bytes': csr_bytes,
+            'reduction': round(networkx_bytes / csr_bytes, 2),
+        },
+        'operations': operations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kinds', default=','.join(KINDS), help="Comma separated graph kinds")
+    parser.add_argument('--sizes', default='1000,10000', help="Comma separated node counts")
+    parser.add_argument('--edge-factor', type=int, default=3, help="Edges per node of the random graphs")
+    parser.add_argument('--min-weight', type=float, default=1.0)
+    parser.add_argument('--max-weight', type=float, default=10.0)
+    parser.add_argument('--max-depth', type=int, default=6, help="Path length cutoff of the simple path search")
+    parser.add_argument('--max-paths', type=int, default=10000, help="Simple paths kept per search")
+    parser.add_argument('--k', type=int, default=10, help="Paths per k-shortest search")
+    parser.add_argument('--repeat', type=int, default=10, help="Node pairs searched per operation")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        parser.error(f"unknown graph kinds: {', '.join(unknown)}")
+
+    runs = []
+    for kind in kinds:
+        for size in (int(size) for size in args.sizes.split(',') if size.strip()):
+            print(f"{kind} graph, {size} nodes...", file=sys.stderr)
+            result = bench_graph(kind, size, args)
+            runs.append(dict(graph=kind, size=size, **result))
+            memory = result['memory']
+            print(f"    memory: networkx {memory['networkx_bytes'] / 1e6:.1f} MB, "
+                  f"csr {memory['csr_bytes'] / 1e6:.1f} MB ({memory['reduction']}x smaller)", file=sys.stderr)
+            for operation, stats in result['operations'].items():
+                print(f"    {operation:<25} networkx {stats['networkx_ms']:>10.1f} ms   csr {stats['csr_ms']:>10.1f} ms"
+                      f"   {stats['speedup']}x", file=sys.stderr)
+
+    results = {
+        'created_at': datetime.utcnow().isoformat(),
+        'parameters': {name: value for name, value in vars(args).items() if name != 'output'},
+        'runs': runs,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Query plans and latency of the hot lookups, before and after the secondary indexes.
+
+Builds a throwaway SQLite database from db-scripts/create-db.sql without its
+indexes, fills it with synthetic nodes, edges, visitors, movements and logs,
+and times the queries behind move_visitor, get_visitor_history, get_logs and
+the node-delete cascade. Then it applies db-scripts/add-indexes.sql and runs
+the same queries again.
+
+Usage:
+    python src/benchmarks/bench_indexes.py --movements 1000000 --output results.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'db-scripts'
+
+QUERIES = {
+    'move_visitor_edge_lookup': (
+        "SELECT * FROM edges WHERE source_id = :source_id AND name = :edge_name"
+    ),
+    'node_delete_incoming_edges': (
+        "SELECT * FROM edges WHERE target_id = :node_id"
+    ),
+    'node_delete_visitors': (
+        "SELECT * FROM visitors WHERE current_node_id = :node_id"
+    ),
+    'visitor_history': (
+        "SELECT * FROM visitor_movements WHERE visitor_id = :visitor_id ORDER BY timestamp"
+    ),
+    'logs_newest_page': (
+        "SELECT * FROM operation_logs ORDER BY timestamp DESC, id DESC LIMIT 50"
+    ),
+    'logs_by_type_page': (
+        "SELECT * FROM operation_logs WHERE operation_type = :operation_type "
+        "ORDER BY timestamp DESC, id DESC LIMIT 50"
+    ),
+}
+
+
+def create_schema(conn):
+    # Only the tables: the indexes are what is being measured
+    script = (SCRIPTS_DIR / 'create-db.sql').read_text(encoding='utf-8')
+    script = re.sub(r'create index .*?;', '', script, flags=re.IGNORECASE | re.DOTALL)
+    conn.executescript(script)
+
+
+def populate(conn, nodes, edges_per_node, visitors, movements, logs, seed):
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    stamp = lambda offset: (now + timedelta(milliseconds=offset)).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+    conn.executemany("INSERT INTO nodes (id, name) VALUES (?, ?)", ((i, f'node-{i}') for i in range(1, nodes + 1)))
+
+    edges = set()
+    for source in range(1, nodes + 1):
+        for _ in range(edges_per_node):
+            target = rng.randint(1, nodes)
+            if target != source:
+                edges.add((source, target))
+    conn.executemany(
+        "INSERT INTO edges (source_id, target_id, name, weight) VALUES (?, ?, ?, ?)",
+        ((source, target, f'edge-{source}-{target}', rng.uniform(1, 5)) for source, target in edges)
+    )
+    conn.executemany(
+        "INSERT INTO visitors (id, name, current_node_id) VALUES (?, ?, ?)",
+        ((i, f'visitor-{i}', rng.randint(1, nodes)) for i in range(1, visitors + 1))
+    )
+    conn.executemany(
+        "INSERT INTO visitor_movements (visitor_id, node_id, edge_id, timestamp) VALUES (?, ?, ?, ?)",
+        ((rng.randint(1, visitors), rng.randint(1, nodes), None, stamp(i)) for i in range(movements))
+    )
+    types = ['MOVE_VISITOR', 'GET_ALL_NODES', 'FIND_PATHS', 'GET_VISITOR_HISTORY', 'CREATE_EDGE']
+    conn.executemany(
+        "INSERT INTO operation_logs (operation_type, details, timestamp) VALUES (?, ?, ?)",
+        ((rng.choice(types), '{}', stamp(i)) for i in range(logs))
+    )
+    conn.commit()
+    return sorted(edges)
+
+
+def run_queries(conn, params_list, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params_list[0])]
+        timings = []
+        for i in range(repeat):
+            params = params_list[i % len(params_list)]
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'plan': plan,
+            'median_ms': round(statistics.median(timings), 4),
+            'p95_ms': round(sorted(timings)[int(len(timings) * 0.95) - 1], 4),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=10000)
+    parser.add_argument('--edges-per-node', type=int, default=5)
+    parser.add_argument('--visitors', type=int, default=1000)
+    parser.add_argument('--movements', type=int, default=1000000)
+    parser.add_argument('--logs', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, 'bench.db'))
+        conn.row_factory = sqlite3.Row
+        create_schema(conn)
+
+        print(f"Populating {args.nodes} nodes, {args.movements} movements and {args.logs} logs...")
+        edges = populate(conn, args.nodes, args.edges_per_node, args.visitors, args.movements, args.logs, args.seed)
+        rng = random.Random(args.seed)
+        params_list = []
+        for _ in range(args.repeat):
+            source, target = rng.choice(edges)
+            params_list.append({
+                'source_id': source,
+                'edge_name': f'edge-{source}-{target}',
+                'node_id': rng.randint(1, args.nodes),
+                'visitor_id': rng.randint(1, args.visitors),
+                'operation_type': 'FIND_PATHS',
+            })
+
+        before = run_queries(conn, params_list, args.repeat)
+        started = time.perf_counter()
+        conn.executescript((SCRIPTS_DIR / 'add-indexes.sql').read_text(encoding='utf-8'))
+        index_build_s = time.perf_counter() - started
+        after = run_queries(conn, params_list, args.repeat)
+        conn.close()
+
+    print(f"\nIndexes built in {index_build_s:.2f}s\n")
+    print(f"{'query':<30} {'before ms':>12} {'after ms':>12} {'speedup':>10}")
+    for name in QUERIES:
+        speedup = before[name]['median_ms'] / max(after[name]['median_ms'], 1e-6)
+        print(f"{name:<30} {before[name]['median_ms']:>12.3f} {after[name]['median_ms']:>12.3f} {speedup:>9.1f}x")
+        print(f"    before: {' | '.join(before[name]['plan'])}")
+        print(f"    after:  {' | '.join(after[name]['plan'])}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({
+                'parameters': vars(args),
+                'index_build_s': round(index_build_s, 3),
+                'before': before,
+                'after': after,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Latency of the core operations on synthetic graphs of several shapes and sizes.
+
+For every graph kind and size it builds a fresh SQLite database in a
+temporary directory, loads a synthetic graph (see synthetic.py), a set of
+visitors, a long movement history and a pre-filled operation log, and then
+times these operations through Flask's test client:
+
+    find_all_paths + format_paths, create_edge, move_visitor,
+    get_visitor_history, get_logs
+
+Results are written as JSON, one entry per (graph, size, operation), so two
+runs can be compared with --compare.
+
+Usage:
+    python src/benchmarks/bench_operations.py --kinds random,grid,scale_free --sizes 100,1000,10000 --output results.json
+    python src/benchmarks/bench_operations.py --compare before.json after.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(SRC_DIR))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from synthetic import KINDS, generate_graph
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        'iterations': len(timings),
+        'mean_ms': round(statistics.mean(timings), 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(ordered[math.ceil(len(ordered) * 0.95) - 1], 4),
+        'min_ms': round(ordered[0], 4),
+    }
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def check(response, *statuses):
+    if response.status_code not in statuses:
+        raise RuntimeError(f"{response.request.method} {response.request.path} returned {response.status_code}: "
+                           f"{response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def load_database(app, records, visitors, history, logs, rng):
+    """Replace the database contents with the synthetic graph, visitors, history and logs."""
+    from sqlalchemy import insert
+    from backend.graph_cache import graph_cache
+    from backend.graph_io import import_graph
+    from backend.models import db, log_writer, Node, Visitor, VisitorMovement, OperationLog
+
+    log_writer.flush()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        import_graph(records)
+        graph_cache.invalidate()
+
+        node_ids = db.session.execute(db.select(Node.id)).scalars().all()
+        db.session.execute(insert(Visitor), [
+            {'name': f'visitor-{i}', 'current_node_id': rng.choice(node_ids)} for i in range(visitors)
+        ])
+        # Visitor 1 carries the long history measured by get_visitor_history
+        start = datetime(2025, 1, 1)
+        db.session.execute(insert(VisitorMovement), [
+            {'visitor_id': 1, 'node_id': rng.choice(node_ids), 'edge_id': None,
+             'timestamp': start + timedelta(seconds=i)} for i in range(history)
+        ])
+        types = ['MOVE_VISITOR', 'GET_ALL_NODES', 'FIND_PATHS', 'GET_VISITOR_HISTORY', 'CREATE_EDGE']
+        db.session.execute(insert(OperationLog), [
+            {'operation_type': rng.choice(types), 'details': '{}', 'timestamp': start + timedelta(milliseconds=i)}
+            for i in range(logs)
+        ])
+        db.session.commit()
+        return {
+            visitor_id: node_id for visitor_id, node_id in db.session.execute(db.select(Visitor.id, Visitor.current_node_id))
+        }
+
+
+def bench_graph(app, client, kind, size, args):
+    from backend.graph_cache import graph_cache
+    from backend.utils import find_all_paths, format_paths
+
+    rng = random.Random(args.seed)
+    records = generate_graph(kind, size, edges=size * args.edge_factor, min_weight=args.min_weight,
+                             max_weight=args.max_weight, seed=args.seed)
+    positions = load_database(app, records, args.visitors, args.history, args.logs, rng)
+    with app.app_context():
+        graph = graph_cache.get_graph()
+    nodes = list(graph.nodes)
+    results = {}
+
+    # Búsqueda de rutas sobre la copia en memoria, sin pasar por HTTP
+    timings = []
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(args.repeat)]
+    for source, target in pairs:
+        _, elapsed = timed(lambda: format_paths(find_all_paths(graph, source, target, cutoff=args.max_depth), graph))
+        timings.append(elapsed)
+    results['find_all_paths+format_paths'] = summarize(timings)
+
+    timings = []
+    for i in range(args.repeat):
+        while True:
+            source, target = rng.choice(nodes), rng.choice(nodes)
+            if source != target and not graph.has_edge(source, target):
+                break
+        response, elapsed = timed(client.post, '/api/edges', json={
+            'source_id': source, 'target_id': target, 'name': f'bench-{i}', 'weight': 1.0
+        })
+        check(response, 201)
+        timings.append(elapsed)
+    results['create_edge'] = summarize(timings)
+
+    with app.app_context():
+        graph = graph_cache.get_graph()
+    timings = []
+    visitor_ids = list(positions)
+    for _ in range(args.repeat):
+        visitor_id = rng.choice(visitor_ids)
+        targets = list(graph.successors(positions[visitor_id]))
+        while not targets:
+            # Sin salida: se reubica al visitante fuera de la medición
+            node_id = rng.choice(nodes)
+            check(client.put(f'/api/visitors/{visitor_id}', json={'current_node_name': graph.nodes[node_id]['name']}), 200)
+            positions[visitor_id] = node_id
+            targets = list(graph.successors(node_id))
+        target = rng.choice(targets)
+        response, elapsed = timed(client.post, f'/api/visitors/{visitor_id}/move', json={
+            'edge_name': graph.edges[positions[visitor_id], target]['name'],
+            'target_node_name': graph.nodes[target]['name'],
+        })
+        check(response, 200)
+        positions[visitor_id] = target
+        timings.append(elapsed)
+    results['move_visitor'] = summarize(timings)
+
+    timings = []
+    for _ in range(args.repeat):
+        response, elapsed = timed(client.get, '/api/visitors/1/history')
+        check(response, 200)
+        timings.append(elapsed)
+    results['get_visitor_history'] = summarize(timings)
+
+    timings = []
+    for _ in range(args.repeat):
+        response, elapsed = timed(client.get, '/api/logs?limit=50')
+        check(response, 200)
+        timings.append(elapsed)
+    results['get_logs'] = summarize(timings)
+
+    return {'nodes': graph.number_of_nodes(), 'edges': graph.number_of_edges(), 'operations': results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SRC_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # La app lee la ubicación de la base de datos al importarse
+        os.environ['GRAPHTRACKER_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        os.environ['GRAPHTRACKER_DB_PROFILE'] = args.profile
+        from integrated_app import app
+        from backend.graph_cache import graph_cache
+        from backend.models import log_writer
+        graph_cache.enable_sync(os.path.join(tmp_dir, 'graph-cache.stamp'))
+        client = app.test_client()
+
+        runs = []
+        for kind in args.kinds:
+            for size in args.sizes:
+                print(f"{kind} graph, {size} nodes...", file=sys.stderr)
+                result = bench_graph(app, client, kind, size, args)
+                runs.append(dict(graph=kind, size=size, **result))
+                for operation, stats in result['operations'].items():
+                    print(f"    {operation:<30} median {stats['median_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms",
+                          file=sys.stderr)
+        log_writer.stop()
+
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {name: value for name, value in vars(args).items() if name not in ('output', 'compare')},
+        'runs': runs,
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path, encoding='utf-8') as file:
+        before = json.load(file)
+    with open(after_path, encoding='utf-8') as file:
+        after = json.load(file)
+
+    def medians(results):
+        return {(run['graph'], run['size'], operation): stats['median_ms']
+                for run in results['runs'] for operation, stats in run['operations'].items()}
+
+    old, new = medians(before), medians(after)
+    print(f"before: {before.get('commit')}  after: {after.get('commit')}")
+    print(f"{'graph':<12} {'size':>7} {'operation':<30} {'before ms':>11} {'after ms':>11} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        graph, size, operation = key
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{graph:<12} {size:>7} {operation:<30} {old[key]:>11.3f} {new[key]:>11.3f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kinds', default=','.join(KINDS), help="Comma separated graph kinds")
+    parser.add_argument('--sizes', default='100,1000', help="Comma separated node counts")
+    parser.add_argument('--edge-factor', type=int, default=3, help="Edges per node of the random graphs")
+    parser.add_argument('--min-weight', type=float, default=1.0)
+    parser.add_argument('--max-weight', type=float, default=10.0)
+    parser.add_argument('--max-depth', type=int, default=6, help="Path length cutoff of the path search")
+    parser.add_argument('--visitors', type=int, default=100)
+    parser.add_argument('--history', type=int, default=10000, help="Movements in the measured visitor history")
+    parser.add_argument('--logs', type=int, default=100000, help="Operation logs in the database")
+    parser.add_argument('--repeat', type=int, default=30, help="Timed calls per operation")
+    parser.add_argument('--profile', default='development', help="Database profile (see backend/engine.py)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    args.kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    args.sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    unknown = [kind for kind in args.kinds if kind not in KINDS]
+    if unknown:
+        parser.error(f"unknown graph kinds: {', '.join(unknown)}")
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Synthetic graphs for the benchmarks.
+
+Every generator returns plain import records (see backend/graph_io.py), so a
+graph of any shape and size can be loaded with import_graph() or written to
+an NDJSON file for bulk_graph.py.
+"""
+import math
+import random
+
+import networkx as nx
+
+KINDS = ('random', 'grid', 'scale_free')
+
+
+def _structure(kind, nodes, edges, seed):
+    if kind == 'random':
+        return nx.gnm_random_graph(nodes, edges, seed=seed, directed=True)
+    if kind == 'grid':
+        # Calles en ambos sentidos; el número de aristas lo fija la cuadrícula
+        side = max(2, math.isqrt(nodes))
+        grid = nx.grid_2d_graph(side, math.ceil(nodes / side))
+        grid = nx.convert_node_labels_to_integers(grid.subgraph(list(grid.nodes)[:nodes]))
+        return grid.to_directed()
+    if kind == 'scale_free':
+        graph = nx.DiGraph(nx.scale_free_graph(nodes, seed=seed))
+        graph.remove_edges_from(list(nx.selfloop_edges(graph)))
+        return graph
+    raise ValueError(f"kind must be one of {KINDS}")
+
+
+def generate_graph(kind, nodes, edges=None, min_weight=1.0, max_weight=10.0, seed=42):
+    """
+    Build a synthetic directed graph as import records.
+
+    Parameters:
+    - kind: 'random' (uniform G(n, m)), 'grid' (two-way streets on a square
+      grid) or 'scale_free' (preferential attachment, a few hub nodes)
+    - nodes: Number of nodes
+    - edges: Number of edges for 'random'; defaults to 3 per node. The other
+      kinds get the edge count their structure implies.
+    - min_weight, max_weight: Range of the uniformly drawn edge weights
+    - seed: Makes the graph and its weights reproducible
+
+    Returns:
+    - List of node records followed by edge records
+    """
+    graph = _structure(kind, nodes, edges if edges is not None else nodes * 3, seed)
+    rng = random.Random(seed)
+    records = [{'type': 'node', 'name': f'n{node}', 'description': None} for node in graph.nodes]
+    records.extend({
+        'type': 'edge',
+        'name': f'n{source}-n{target}',
+        'source': f'n{source}',
+        'target': f'n{target}',
+        'weight': round(rng.uniform(min_weight, max_weight), 2),
+    } for source, target in graph.edges)
+    return records
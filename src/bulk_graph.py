@@ -0,0 +1,65 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add the script directory to sys.path to allow imports
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from integrated_app import app
+from backend.graph_cache import graph_cache
+from backend.graph_io import (DEFAULT_BATCH_SIZE, FORMATS, InvalidEncoding, decode_lines, export_graph, import_graph,
+                              read_records)
+from backend.models import log_operation
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'csv' if str(path).lower().endswith('.csv') else 'ndjson'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import or export the graph as NDJSON or CSV")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Load nodes and edges from a file ('-' for stdin)")
+    import_parser.add_argument('file')
+    import_parser.add_argument('--format', choices=FORMATS)
+    import_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    export_parser = subparsers.add_parser('export', help="Write the whole graph to a file ('-' for stdout)")
+    export_parser.add_argument('file')
+    export_parser.add_argument('--format', choices=FORMATS)
+
+    args = parser.parse_args()
+    fmt = detect_format(args.file, args.format)
+
+    with app.app_context():
+        if args.command == 'import':
+            stream = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+            invalid = None
+            with stream:
+                try:
+                    summary = import_graph(read_records(decode_lines(stream), fmt), batch_size=args.batch_size)
+                except InvalidEncoding as error:
+                    invalid, summary = error, error.summary
+            graph_cache.invalidate()
+            log_operation('BULK_IMPORT', {key: value for key, value in summary.items() if key != 'errors'})
+            print(f"Nodes: {summary['nodes_created']} created, {summary['nodes_skipped']} skipped")
+            print(f"Edges: {summary['edges_created']} created, {summary['edges_skipped']} skipped")
+            for error in summary['errors']:
+                print(f"Error: {error}", file=sys.stderr)
+            if summary['error_count'] > len(summary['errors']):
+                print(f"... {summary['error_count'] - len(summary['errors'])} more errors", file=sys.stderr)
+            if invalid is not None:
+                print(f"Error: {invalid}; the import stopped there", file=sys.stderr)
+                sys.exit(1)
+        else:
+            stream = sys.stdout if args.file == '-' else open(args.file, 'w', encoding='utf-8', newline='')
+            with stream:
+                for chunk in export_graph(fmt):
+                    stream.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
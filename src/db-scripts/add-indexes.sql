@@ -0,0 +1,22 @@
+-- Adds the secondary indexes of the hot lookup paths to an existing database.
+-- Safe to run more than once.
+
+create index if not exists ix_edges_target_id
+    on edges (target_id);
+
+create index if not exists ix_edges_source_id_name
+    on edges (source_id, name);
+
+create index if not exists ix_visitors_current_node_id
+    on visitors (current_node_id);
+
+create index if not exists ix_visitor_movements_visitor_id_timestamp
+    on visitor_movements (visitor_id, timestamp);
+
+create index if not exists ix_operation_logs_timestamp
+    on operation_logs (timestamp);
+
+create index if not exists ix_operation_logs_operation_type_timestamp
+    on operation_logs (operation_type, timestamp);
+
+analyze;
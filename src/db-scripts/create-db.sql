@@ -33,6 +33,7 @@ create table visitors
     id              INTEGER      not null primary key,
     name            VARCHAR(100) not null,
     current_node_id INTEGER      not null references nodes,
+    version         INTEGER      default 1 not null,
     created_at      DATETIME,
     updated_at      DATETIME
 );
@@ -46,5 +47,51 @@ create table visitor_movements
     timestamp  DATETIME
 );
 
+create index ix_operation_logs_timestamp
+    on operation_logs (timestamp);
 
+create index ix_operation_logs_operation_type_timestamp
+    on operation_logs (operation_type, timestamp);
 
+create index ix_edges_target_id
+    on edges (target_id);
+
+create index ix_edges_source_id_name
+    on edges (source_id, name);
+
+create index ix_visitors_current_node_id
+    on visitors (current_node_id);
+
+create index ix_visitor_movements_visitor_id_timestamp
+    on visitor_movements (visitor_id, timestamp);
+
+create table node_visit_stats
+(
+    node_id      INTEGER  not null,
+    bucket_start DATETIME not null,
+    visits       INTEGER  not null,
+    primary key (node_id, bucket_start)
+);
+
+create index ix_node_visit_stats_bucket_start
+    on node_visit_stats (bucket_start);
+
+create table edge_traversal_stats
+(
+    edge_id      INTEGER  not null,
+    bucket_start DATETIME not null,
+    traversals   INTEGER  not null,
+    total_weight FLOAT    not null,
+    primary key (edge_id, bucket_start)
+);
+
+create index ix_edge_traversal_stats_bucket_start
+    on edge_traversal_stats (bucket_start);
+
+create table visitor_stats
+(
+    visitor_id   INTEGER not null primary key,
+    moves        INTEGER not null,
+    total_weight FLOAT   not null,
+    last_move_at DATETIME
+);
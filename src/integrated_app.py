@@ -1,4 +1,7 @@
-from flask import Flask, jsonify, request, abort, render_template, redirect, url_for
+from flask import Flask, Response, jsonify, request, abort, render_template, redirect, url_for, stream_with_context
+import hashlib
+import os
+import time
 import sys
 from pathlib import Path
 
@@ -6,19 +9,215 @@ from pathlib import Path
 current_dir = Path(__file__).resolve().parent
 sys.path.append(str(current_dir))
 
-from backend.models import db, Node, Edge, Visitor, VisitorMovement, OperationLog, log_operation, init_db
-from backend.utils import find_all_paths, format_paths
-import networkx as nx
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
+from backend.models import db, Node, Edge, Visitor, VisitorMovement, OperationLog, log_operation, log_writer, init_db
+from backend.utils import DEFAULT_PATH_CUTOFF, find_k_shortest_paths, format_path, format_paths, iter_shortest_paths, iter_simple_paths
+from backend.engine import configure_engine
+from backend.graph_cache import graph_cache
+from backend.graph_io import FORMATS, InvalidEncoding, decode_lines, export_graph, import_graph, read_records
+from backend.moves import MAX_BATCH_MOVES, move_visitors
+from backend.analytics import BUCKETS, edge_traversal_rollup, node_visit_rollup, record_movements, visitor_totals
+from backend.log_store import query_archived_logs, query_logs
+from backend.compression import etag_variants, init_compression
+from backend.serialization import FastJSONProvider, dumps_line
+from backend.metrics import metrics
+from backend.path_cache import path_cache
+from backend.search_pool import SearchFailed, SearchTimeout, search_pool
+from backend.admission import Overloaded, path_admission, path_flights
+from backend.events import EVENT_TYPES, EventFilter, event_broker
+from backend.pagination import (
+    DEFAULT_PAGE_SIZE, decode_cursor, parse_after, parse_fields, parse_limit, parse_timestamp,
+    select_entities_page, select_rows_page
+)
 
 app = Flask(__name__)
 app.config['TEMPLATES_AUTO_RELOAD'] = True
+# Usa orjson para las respuestas JSON si está instalado
+app.json = FastJSONProvider(app)
 
 # Database configuration - using SQLite
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///graph.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('GRAPHTRACKER_DATABASE_URI', 'sqlite:///graph.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# 'development' keeps SQLite's defaults; 'production' enables WAL, tuned pragmas
+# and a connection pool (see backend/engine.py). Use it under a multi-process
+# WSGI server.
+app.config['DATABASE_PROFILE'] = os.environ.get('GRAPHTRACKER_DB_PROFILE', 'development')
+
+# Files shared by the workers at run time (the locks, stamps, archives and
+# snapshots below) go in the instance folder, or in GRAPHTRACKER_RUNTIME_DIR;
+# each one can also be moved on its own with its variable
+runtime_dir = Path(os.environ.get('GRAPHTRACKER_RUNTIME_DIR', app.instance_path))
+
+# Workers starting together create and upgrade the schema one at a time
+app.config['SCHEMA_LOCK_FILE'] = os.environ.get('GRAPHTRACKER_SCHEMA_LOCK_FILE',
+                                                str(runtime_dir / 'schema-upgrade.lock'))
+
+# Each process keeps its own graph cache; this stamp file tells the others to reload
+app.config['GRAPH_CACHE_SYNC_FILE'] = os.environ.get('GRAPHTRACKER_GRAPH_CACHE_SYNC_FILE',
+                                                     str(runtime_dir / 'graph-cache.stamp'))
+app.config['GRAPH_CACHE_SYNC_INTERVAL'] = 1.0
+# 'networkx' (default) or 'csr': a compact read-only graph for large maps that
+# change rarely; it is reloaded from the database after every node or edge write
+app.config['GRAPH_BACKEND'] = os.environ.get('GRAPHTRACKER_GRAPH_BACKEND', 'networkx')
+
+# Operation logs are queued and written in batches by a background thread.
+# When the queue is full, 'block' waits for room and 'drop' discards the record.
+app.config['OPERATION_LOG_ASYNC'] = True
+app.config['OPERATION_LOG_QUEUE_SIZE'] = 10000
+app.config['OPERATION_LOG_BATCH_SIZE'] = 500
+app.config['OPERATION_LOG_FLUSH_INTERVAL'] = 1.0
+app.config['OPERATION_LOG_FULL_POLICY'] = 'block'
+
+# Retention: archive_logs.py moves older logs into compressed segments here
+app.config['OPERATION_LOG_RETENTION_DAYS'] = 30
+app.config['OPERATION_LOG_ARCHIVE_DIR'] = os.environ.get('GRAPHTRACKER_LOG_ARCHIVE_DIR',
+                                                         str(runtime_dir / 'log-archive'))
+
+# gzip (or brotli, if installed) for clients that send Accept-Encoding
+app.config['COMPRESSION_ENABLED'] = True
+app.config['COMPRESSION_MIN_SIZE'] = 1024
+app.config['COMPRESSION_LEVEL'] = 6
+app.config['COMPRESSION_BROTLI_QUALITY'] = 4
+
+# Repeated path searches are answered from an LRU cache of encoded results,
+# bounded in bytes and dropped whenever the graph changes; 0 disables it
+app.config['PATH_CACHE_MAX_BYTES'] = 64 * 1024 * 1024
+
+# Non-streamed path searches run in this many worker processes, so a long
+# enumeration does not hold the GIL of the web process and stall cheap requests
+# such as visitor moves; 0 runs them in the request thread without a timeout
+app.config['PATH_SEARCH_WORKERS'] = int(os.environ.get('GRAPHTRACKER_PATH_SEARCH_WORKERS', '2'))
+app.config['PATH_SEARCH_TIMEOUT'] = 30.0
+app.config['PATH_SEARCH_SNAPSHOT_DIR'] = os.environ.get('GRAPHTRACKER_SEARCH_SNAPSHOT_DIR',
+                                                        str(runtime_dir / 'search-snapshots'))
+# Identical concurrent path searches share one computation. At most
+# PATH_SEARCH_MAX_CONCURRENT searches run at once per process; up to
+# PATH_SEARCH_MAX_QUEUED more wait PATH_SEARCH_QUEUE_TIMEOUT seconds for a slot.
+# Beyond that, requests get a 429 (queue full) or 503 (wait timed out) with Retry-After.
+app.config['PATH_SEARCH_MAX_CONCURRENT'] = app.config['PATH_SEARCH_WORKERS'] or 4
+app.config['PATH_SEARCH_MAX_QUEUED'] = 32
+app.config['PATH_SEARCH_QUEUE_TIMEOUT'] = 5.0
+
+# Event stream (/api/events/stream and the /api/events long-poll) of visitor
+# movements and graph changes, read from the operation log every
+# EVENT_STREAM_POLL_INTERVAL seconds. A subscriber more than
+# EVENT_STREAM_QUEUE_SIZE events behind catches up from the log table instead.
+app.config['EVENT_STREAM_POLL_INTERVAL'] = 0.5
+app.config['EVENT_STREAM_QUEUE_SIZE'] = 1000
+app.config['EVENT_STREAM_MAX_SUBSCRIBERS'] = 100
+# Seconds between keep-alive comments on an idle stream, and the longest long-poll wait
+app.config['EVENT_STREAM_HEARTBEAT'] = 15.0
+app.config['EVENT_POLL_MAX_WAIT'] = 30.0
+
+# Requests slower than this many milliseconds are logged with their slowest SQL
+# statements; None turns the slow-request log off
+slow_request_ms = os.environ.get('GRAPHTRACKER_SLOW_REQUEST_MS')
+app.config['METRICS_SLOW_REQUEST_MS'] = float(slow_request_ms) if slow_request_ms else None
+
 # Initialize database
+configure_engine(app)
 init_db(app)
+os.makedirs(os.path.dirname(app.config['GRAPH_CACHE_SYNC_FILE']), exist_ok=True)
+graph_cache.set_backend(app.config['GRAPH_BACKEND'])
+graph_cache.enable_sync(app.config['GRAPH_CACHE_SYNC_FILE'], app.config['GRAPH_CACHE_SYNC_INTERVAL'])
+# Registered before compression so request timings include it
+with app.app_context():
+    metrics.init_app(app, db.engine)
+init_compression(app)
+path_cache.max_bytes = app.config['PATH_CACHE_MAX_BYTES']
+search_pool.configure(app.config['PATH_SEARCH_WORKERS'], app.config['PATH_SEARCH_SNAPSHOT_DIR'],
+                      app.config['PATH_SEARCH_TIMEOUT'])
+path_admission.configure(app.config['PATH_SEARCH_MAX_CONCURRENT'], app.config['PATH_SEARCH_MAX_QUEUED'],
+                         app.config['PATH_SEARCH_QUEUE_TIMEOUT'])
+event_broker.configure(app, app.config['EVENT_STREAM_POLL_INTERVAL'], app.config['EVENT_STREAM_QUEUE_SIZE'],
+                       app.config['EVENT_STREAM_MAX_SUBSCRIBERS'])
+metrics.add_gauge('graphtracker_operation_log_queue_depth', "Operation log records waiting to be written",
+                  log_writer.queue_depth)
+metrics.add_gauge('graphtracker_operation_log_written_total', "Operation log records written in the background",
+                  lambda: log_writer.written, kind='counter')
+metrics.add_gauge('graphtracker_operation_log_dropped_total', "Operation log records dropped because the queue was full",
+                  lambda: log_writer.dropped, kind='counter')
+metrics.add_gauge('graphtracker_path_cache_hits_total', "Path searches answered from the result cache",
+                  lambda: path_cache.hits, kind='counter')
+metrics.add_gauge('graphtracker_path_cache_misses_total', "Path searches not found in the result cache",
+                  lambda: path_cache.misses, kind='counter')
+metrics.add_gauge('graphtracker_path_cache_evictions_total', "Path results evicted to stay within the size bound",
+                  lambda: path_cache.evictions, kind='counter')
+metrics.add_gauge('graphtracker_path_search_workers_busy', "Path search worker processes running a search",
+                  search_pool.busy)
+metrics.add_gauge('graphtracker_path_search_timeouts_total', "Path searches cancelled for running out of time",
+                  lambda: search_pool.timeouts, kind='counter')
+metrics.add_gauge('graphtracker_path_search_active', "Path searches holding an admission slot",
+                  lambda: path_admission.stats()['active'])
+metrics.add_gauge('graphtracker_path_search_queued', "Path searches waiting for an admission slot",
+                  lambda: path_admission.stats()['queued'])
+metrics.add_gauge('graphtracker_path_search_rejected_total', "Path searches rejected with 429 because the queue was full",
+                  lambda: path_admission.rejected, kind='counter')
+metrics.add_gauge('graphtracker_path_search_queue_timeouts_total', "Path searches rejected with 503 after waiting for a slot",
+                  lambda: path_admission.timed_out, kind='counter')
+metrics.add_gauge('graphtracker_path_search_coalesced_total', "Path searches answered by an identical search in flight",
+                  lambda: path_flights.coalesced, kind='counter')
+metrics.add_gauge('graphtracker_event_subscribers', "Open event stream and long-poll subscriptions",
+                  lambda: event_broker.stats()['subscribers'])
+metrics.add_gauge('graphtracker_events_published_total', "Events read from the operation log and fanned out",
+                  lambda: event_broker.published, kind='counter')
+metrics.add_gauge('graphtracker_event_overflows_total', "Times a slow subscriber fell back to reading the log table",
+                  lambda: event_broker.overflows, kind='counter')
+metrics.add_gauge('graphtracker_path_cache_bytes', "Size of the cached path results",
+                  lambda: path_cache.stats()['bytes'])
+metrics.add_gauge('graphtracker_graph_cache_version', "Version of this process' graph cache",
+                  lambda: graph_cache.version)
+
+def add_next_page_headers(response, next_cursor, param='cursor'):
+    """Point the client to the next page with X-Next-Cursor and a Link header."""
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args[param] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{url_for(request.endpoint, _external=True, **request.view_args, **args)}>; rel="next"'
+    return response
+
+def parse_list_args(model, args, default_limit=None):
+    """Read the `limit`/`after` paging and `fields` projection of the list endpoints."""
+    try:
+        return {
+            'fields': parse_fields(model, args.get('fields')),
+            'after': parse_after(args.get('after')),
+            'limit': parse_limit(args.get('limit'), default=default_limit),
+        }
+    except ValueError as e:
+        abort(400, description=str(e))
+
+def not_modified(etag):
+    """
+    Answer a conditional GET before any work is done.
+
+    Returns an empty 304 response if the client's If-None-Match already holds
+    `etag`, or None if the full response has to be built.
+    """
+    # A compressed response carries the tag with its coding appended
+    for variant in etag_variants(etag):
+        if variant in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(variant)
+            return response
+    return None
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    return response
+
+def list_rows(model, operation_type, etag=None):
+    if etag is not None and (cached := not_modified(etag)):
+        return cached
+    page = parse_list_args(model, request.args)
+    rows, next_after = select_rows_page(model, **page)
+    log_operation(operation_type, {'count': len(rows)})
+    response = add_next_page_headers(jsonify(rows), next_after, param='after')
+    return with_etag(response, etag) if etag is not None else response
 
 # API Routes
 @app.route('/api/', methods=['GET'])
@@ -27,16 +226,22 @@ def api_index():
         "status": "online",
         "message": "Graph Management System API is running",
         "endpoints": [
-            "/api/nodes", "/api/edges", "/api/visitors", "/api/logs", 
-            "/api/paths"
+            "/api/nodes", "/api/nodes/<id>/neighbors", "/api/edges", "/api/visitors",
+            "/api/visitors/<id>/moves", "/api/analytics/nodes", "/api/analytics/edges",
+            "/api/analytics/visitors", "/api/logs",
+            "/api/logs/archive", "/api/paths", "/api/distance", "/api/graph/import", "/api/graph/export",
+            "/api/events", "/api/events/stream"
         ]
     })
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Formato de texto de Prometheus
+    return metrics.response()
+
 @app.route('/api/nodes', methods=['GET'])
 def get_all_nodes():
-    nodes = db.session.execute(db.select(Node)).scalars().all()
-    log_operation('GET_ALL_NODES', {'count': len(nodes)})
-    return jsonify([node.to_dict() for node in nodes])
+    return list_rows(Node, 'GET_ALL_NODES', etag=graph_cache.etag())
 
 @app.route('/api/nodes', methods=['POST'])
 def create_node():
@@ -51,6 +256,7 @@ def create_node():
     
     db.session.add(new_node)
     db.session.commit()
+    graph_cache.node_saved(new_node)
     
     log_operation('CREATE_NODE', {'node_id': new_node.id, 'name': new_node.name})
     return jsonify(new_node.to_dict()), 201
@@ -60,8 +266,11 @@ def node_operations(node_id):
     node = db.get_or_404(Node, node_id)
     
     if request.method == 'GET':
+        etag = f"node-{node.id}-{node.updated_at.isoformat() if node.updated_at else ''}"
+        if cached := not_modified(etag):
+            return cached
         log_operation('GET_NODE', {'node_id': node_id})
-        return jsonify(node.to_dict())
+        return with_etag(jsonify(node.to_dict()), etag)
     
     elif request.method == 'PUT':
         data = request.json
@@ -74,6 +283,7 @@ def node_operations(node_id):
             node.description = data['description']
         
         db.session.commit()
+        graph_cache.node_saved(node)
         log_operation('UPDATE_NODE', {'node_id': node.id, 'name': node.name})
         return jsonify(node.to_dict())
     
@@ -81,14 +291,27 @@ def node_operations(node_id):
         node_name = node.name
         db.session.delete(node)
         db.session.commit()
+        graph_cache.node_deleted(node_id)
         log_operation('DELETE_NODE', {'node_id': node_id, 'name': node_name})
         return jsonify({'message': f'Node {node_id} deleted successfully'})
 
+@app.route('/api/nodes/<int:node_id>/neighbors', methods=['GET'])
+def get_node_neighbors(node_id):
+    etag = graph_cache.etag()
+    if cached := not_modified(etag):
+        return cached
+
+    # Se lee de la adyacencia en memoria, sin consultas SQL
+    neighbors = graph_cache.neighbors(node_id)
+    if neighbors is None:
+        abort(404, description="Node not found")
+
+    log_operation('GET_NODE_NEIGHBORS', {'node_id': node_id, 'count': len(neighbors)})
+    return with_etag(jsonify(neighbors), etag)
+
 @app.route('/api/edges', methods=['GET'])
 def get_all_edges():
-    edges = db.session.execute(db.select(Edge)).scalars().all()
-    log_operation('GET_ALL_EDGES', {'count': len(edges)})
-    return jsonify([edge.to_dict() for edge in edges])
+    return list_rows(Edge, 'GET_ALL_EDGES', etag=graph_cache.etag())
 
 @app.route('/api/edges', methods=['POST'])
 def create_edge():
@@ -121,6 +344,7 @@ def create_edge():
     
     db.session.add(new_edge)
     db.session.commit()
+    graph_cache.edge_saved(new_edge)
     
     log_operation('CREATE_EDGE', {
         'edge_id': new_edge.id, 
@@ -177,6 +401,7 @@ def edge_operations(edge_id):
             edge.weight = data['weight']
 
         db.session.commit()
+        graph_cache.edge_saved(edge)
 
         log_operation('UPDATE_EDGE', {
             'edge_id': edge.id,
@@ -191,6 +416,7 @@ def edge_operations(edge_id):
 
         db.session.delete(edge)
         db.session.commit()
+        graph_cache.edge_deleted(edge_id)
 
         log_operation('DELETE_EDGE', {
             'edge_id': edge_id,
@@ -200,11 +426,50 @@ def edge_operations(edge_id):
         })
         return jsonify({'message': f'Edge {edge_id} deleted successfully'})
 
+def parse_graph_format():
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    if fmt not in FORMATS:
+        abort(400, description=f"format must be one of {', '.join(FORMATS)}")
+    return fmt
+
+@app.route('/api/graph/import', methods=['POST'])
+def bulk_import_graph():
+    fmt = parse_graph_format()
+    batch_size = parse_positive_int(request.args.get('batch_size'), 'batch_size')
+
+    # Leer el cuerpo como flujo para no cargar el archivo completo en memoria
+    lines = decode_lines(request.stream)
+    try:
+        summary = import_graph(read_records(lines, fmt), **({'batch_size': batch_size} if batch_size else {}))
+    except InvalidEncoding as error:
+        summary = error.summary
+        graph_cache.invalidate()
+        log_operation('BULK_IMPORT', dict({key: value for key, value in summary.items() if key != 'errors'},
+                                          error=str(error)))
+        # Lo anterior a la línea ya se importó: se informa junto con el error
+        return jsonify(dict(summary, error='Bad Request', message=str(error), line=error.line_number)), 400
+    graph_cache.invalidate()
+
+    log_operation('BULK_IMPORT', {key: value for key, value in summary.items() if key != 'errors'})
+    return jsonify(summary), 200
+
+@app.route('/api/graph/export', methods=['GET'])
+def bulk_export_graph():
+    fmt = parse_graph_format()
+    log_operation('BULK_EXPORT', {'format': fmt})
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(export_graph(fmt)), mimetype=mimetype)
+
 @app.route('/api/visitors', methods=['GET'])
 def get_all_visitors():
-    visitors = db.session.execute(db.select(Visitor)).scalars().all()
-    log_operation('GET_ALL_VISITORS', {'count': len(visitors)})
-    return jsonify([visitor.to_dict() for visitor in visitors])
+    # Los visitantes no están en el grafo en memoria: cada cambio sube su versión,
+    # así que los ids y versiones de la página identifican su contenido
+    page = parse_list_args(Visitor, request.args)
+    versions, next_after = select_rows_page(Visitor, ['id', 'version'], page['after'], page['limit'])
+    digest = hashlib.blake2b(repr((versions, next_after)).encode(), digest_size=16).hexdigest()
+    return list_rows(Visitor, 'GET_ALL_VISITORS', etag=f"visitors-{digest}")
 
 
 @app.route('/api/visitors', methods=['POST'])
@@ -223,17 +488,16 @@ def create_visitor():
         current_node_id=node.id
     )
 
-    db.session.add(new_visitor)
-    db.session.commit()
-
-    # Registrar ubicación inicial (sin arista)
+    # Registrar ubicación inicial (sin arista) en la misma transacción
     movement = VisitorMovement(
-        visitor_id=new_visitor.id,
-        node_id=new_visitor.current_node_id,
+        visitor=new_visitor,
+        node_id=node.id,
         edge_id=None  # Sin arista para la ubicación inicial
     )
 
-    db.session.add(movement)
+    db.session.add_all([new_visitor, movement])
+    db.session.flush()
+    record_movements([(new_visitor.id, node.id, None, None, movement.timestamp)])
     db.session.commit()
 
     log_operation('CREATE_VISITOR', {
@@ -245,6 +509,29 @@ def create_visitor():
     return jsonify(new_visitor.to_dict()), 201
 
 
+def check_visitor_version(visitor, data):
+    """Reject the write with 409 if the client sent a `version` that is no longer current."""
+    if data.get('version') is not None and data['version'] != visitor.version:
+        abort(409, description=f"El visitante {visitor.id} está en la versión {visitor.version}, no en la {data['version']}")
+
+def commit_visitor_write(movements=()):
+    """
+    Commit a visitor write, answering 409 if another request changed the visitor first.
+
+    `movements` are (VisitorMovement, edge weight) pairs added by the write;
+    they are counted in the traversal analytics in the same transaction.
+    """
+    try:
+        if movements:
+            # El flush asigna las marcas de tiempo de los movimientos
+            db.session.flush()
+            record_movements([(movement.visitor_id, movement.node_id, movement.edge_id, weight, movement.timestamp)
+                              for movement, weight in movements])
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        abort(409, description="El visitante fue modificado por otra solicitud, vuelva a intentarlo")
+
 @app.route('/api/visitors/<int:visitor_id>', methods=['GET', 'PUT'])
 def visitor_operations(visitor_id):
     visitor = db.get_or_404(Visitor, visitor_id)
@@ -265,10 +552,12 @@ def visitor_operations(visitor_id):
         data = request.json
         if not data:
             abort(400, description="No se proporcionaron datos")
+        check_visitor_version(visitor, data)
 
         if 'name' in data:
             visitor.name = data['name']
 
+        movements = []
         if 'current_node_name' in data:
             # Si se proporciona el nombre del nodo, hay que buscarlo
             node = Node.query.filter_by(name=data['current_node_name']).first()
@@ -285,8 +574,9 @@ def visitor_operations(visitor_id):
             )
 
             db.session.add(movement)
+            movements.append((movement, None))
 
-        db.session.commit()
+        commit_visitor_write(movements)
 
         # Obtener datos actualizados incluyendo el nodo
         updated_visitor = visitor.to_dict()
@@ -302,6 +592,27 @@ def visitor_operations(visitor_id):
 
         return jsonify(updated_visitor)
 
+@app.route('/api/visitors/<int:visitor_id>/moves', methods=['GET'])
+def get_visitor_moves(visitor_id):
+    # Solo se lee la ubicación del visitante; las aristas salen de la adyacencia en memoria
+    current_node_id = db.session.execute(
+        db.select(Visitor.current_node_id).where(Visitor.id == visitor_id)
+    ).scalar_one_or_none()
+    if current_node_id is None:
+        abort(404, description="Visitor not found")
+    etag = f"moves-{visitor_id}-{current_node_id}-{graph_cache.etag()}"
+    if cached := not_modified(etag):
+        return cached
+
+    moves = graph_cache.neighbors(current_node_id) or []
+
+    log_operation('GET_VISITOR_MOVES', {'visitor_id': visitor_id, 'node_id': current_node_id, 'count': len(moves)})
+    return with_etag(jsonify({
+        'visitor_id': visitor_id,
+        'current_node_id': current_node_id,
+        'moves': moves
+    }), etag)
+
 @app.route('/api/visitors/<int:visitor_id>/move', methods=['POST'])
 def move_visitor(visitor_id):
     visitor = db.get_or_404(Visitor, visitor_id)
@@ -309,10 +620,10 @@ def move_visitor(visitor_id):
 
     if not data or 'edge_name' not in data or 'target_node_name' not in data:
         abort(400, description="Se requiere el nombre de la arista y el nombre del nodo destino")
+    check_visitor_version(visitor, data)
 
     edge_name = data['edge_name']
     target_node_name = data['target_node_name']
-    print(target_node_name)
     # Obtener el nodo destino por nombre
     target_node = db.session.execute(db.select(Node).filter_by(name=target_node_name)).scalar_one_or_none()
     if not target_node:
@@ -329,12 +640,10 @@ def move_visitor(visitor_id):
         abort(404,
               description=f"No existe una arista llamada '{edge_name}' desde la ubicación actual hacia '{target_node_name}'")
 
-    # Actualizar la ubicación del visitante
+    # Actualizar la ubicación del visitante y registrar el movimiento en una sola transacción
     old_node_id = visitor.current_node_id
     visitor.current_node_id = target_node.id
-    db.session.commit()
 
-    # Registrar el movimiento
     movement = VisitorMovement(
         visitor_id=visitor.id,
         node_id=target_node.id,
@@ -342,7 +651,7 @@ def move_visitor(visitor_id):
     )
 
     db.session.add(movement)
-    db.session.commit()
+    commit_visitor_write([(movement, edge.weight)])
 
     log_operation('MOVE_VISITOR', {
         'visitor_id': visitor.id,
@@ -360,39 +669,217 @@ def move_visitor(visitor_id):
         'message': f"Visitante '{visitor.name}' movido al nodo '{target_node.name}' por la arista '{edge.name}'"
     }), 200
 
-# Path finding endpoint
-@app.route('/api/paths/<int:start_node_id>/<int:end_node_id>', methods=['GET'])
-def find_paths(start_node_id, end_node_id):
-    # Check if nodes exist
-    db.get_or_404(Node, start_node_id)
-    db.get_or_404(Node, end_node_id)
+@app.route('/api/visitors/move:batch', methods=['POST'])
+def move_visitors_batch():
+    data = request.json
+    moves = data.get('moves') if isinstance(data, dict) else data
 
-    # Build a directed graph
-    G = nx.DiGraph()
+    if not isinstance(moves, list) or not moves:
+        abort(400, description="Se requiere una lista de movimientos")
+    if len(moves) > MAX_BATCH_MOVES:
+        abort(400, description=f"No se permiten más de {MAX_BATCH_MOVES} movimientos por lote")
 
-    # Add all nodes and edges
-    nodes = db.session.execute(db.select(Node)).scalars().all()
-    edges = db.session.execute(db.select(Edge)).scalars().all()
+    try:
+        results = move_visitors(moves)
+    except StaleDataError:
+        db.session.rollback()
+        abort(409, description="Un visitante del lote fue modificado por otra solicitud, vuelva a intentarlo")
+    applied = sum(1 for result in results if result['status'] == 200)
 
-    for node in nodes:
-        G.add_node(node.id, name=node.name)
+    return jsonify({
+        'results': results,
+        'applied': applied,
+        'failed': len(results) - applied
+    }), 200
 
-    for edge in edges:
-        G.add_edge(edge.source_id, edge.target_id, id=edge.id, name=edge.name, weight=edge.weight)
+def parse_positive_int(value, name):
+    """Validate an optional positive integer request parameter."""
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        abort(400, description=f"{name} must be a positive integer")
+    if isinstance(value, bool) or number < 1:
+        abort(400, description=f"{name} must be a positive integer")
+    return number
+
+def parse_path_options(params):
+    """
+    Read the path search options from the query string or the JSON body.
+
+    max_depth defaults to DEFAULT_PATH_CUTOFF when every path is wanted; with
+    k it is only applied if given. max_paths and time_budget_ms cut a
+    streamed search short and are rejected without stream.
+    """
+    stream = params.get('stream', False)
+    if isinstance(stream, str):
+        stream = stream.lower() in ('1', 'true', 'yes')
+    options = {
+        'k': parse_positive_int(params.get('k', params.get('limit')), 'k'),
+        'max_depth': parse_positive_int(params.get('max_depth'), 'max_depth'),
+        'max_paths': parse_positive_int(params.get('max_paths'), 'max_paths'),
+        'time_budget_ms': parse_positive_int(params.get('time_budget_ms'), 'time_budget_ms'),
+        'stream': bool(stream) or request.accept_mimetypes.best == 'application/x-ndjson',
+    }
+    if options['k'] is None and options['max_depth'] is None:
+        options['max_depth'] = DEFAULT_PATH_CUTOFF
+    if not options['stream'] and (options['max_paths'] is not None or options['time_budget_ms'] is not None):
+        abort(400, description="max_paths and time_budget_ms only apply to streamed searches (stream=1)")
+    return options
+
+def search_paths(G, start_node_id, end_node_id, options):
+    # Sin camino posible no hace falta buscar
+    if not graph_cache.reachable(start_node_id, end_node_id):
+        metrics.observe_path_search('unreachable', 0)
+        return []
+    # Same time limit as a search in the worker pool
+    timeout = app.config['PATH_SEARCH_TIMEOUT']
+    deadline = time.monotonic() + timeout
+    stats = {}
+    # Con k se devuelven solo las k rutas más baratas, sin enumerarlas todas
+    if options['k'] is not None:
+        mode = 'k_shortest'
+        paths = find_k_shortest_paths(G, start_node_id, end_node_id, options['k'], options['max_depth'],
+                                      deadline, stats)
+    else:
+        mode = 'all'
+        paths = list(iter_simple_paths(G, start_node_id, end_node_id, options['max_depth'], deadline, stats))
+    if stats.get('timed_out'):
+        metrics.observe_path_search(mode, 0, truncated='timeout')
+        abort(504, description=f"Path search stopped after {timeout} s; narrow the search with k or max_depth, "
+                               "or use stream=1 with time_budget_ms")
+    metrics.observe_path_search(mode, len(paths), stats.get('nodes_expanded'))
+    return paths
+
+def pooled_search(G, version, start_node_id, end_node_id, options):
+    """Run search_paths() in the search pool; returns the encoded body and the number of paths."""
+    if not graph_cache.reachable(start_node_id, end_node_id):
+        metrics.observe_path_search('unreachable', 0)
+        return jsonify([]).get_data(), 0
+    try:
+        body, mode, paths_found, nodes_expanded = search_pool.search(
+            G, version, start_node_id, end_node_id, options['k'], options['max_depth'])
+    except SearchTimeout as error:
+        metrics.observe_path_search('k_shortest' if options['k'] is not None else 'all', 0, truncated='timeout')
+        abort(504, description=f"{error}; narrow the search with k or max_depth, or use stream=1 with time_budget_ms")
+    except SearchFailed as error:
+        abort(503, description=str(error))
+    metrics.observe_path_search(mode, paths_found, nodes_expanded)
+    return body, paths_found
+
+def stream_paths(G, start_node_id, end_node_id, options, log_details):
+    """
+    Stream paths as NDJSON, one line per path as soon as it is found.
+
+    The last line is a trailer reporting how many paths were sent and whether
+    the search was cut short by max_paths or by the time budget. The search
+    holds an admission slot until the response is closed.
+    """
+    token = path_admission.acquire()
+    started = time.monotonic()
+    deadline = None
+    if options['time_budget_ms'] is not None:
+        deadline = started + options['time_budget_ms'] / 1000
+    max_paths = options['max_paths']
+    # Llegar a k rutas es lo pedido, no un corte de la búsqueda
+    k_is_limit = options['k'] is not None and (max_paths is None or options['k'] <= max_paths)
+    if options['k'] is not None:
+        max_paths = min(max_paths or options['k'], options['k'])
+
+    def generate():
+        stats = {}
+        if not graph_cache.reachable(start_node_id, end_node_id):
+            mode, paths = 'unreachable', iter(())
+        elif options['k'] is not None:
+            mode = 'k_shortest'
+            paths = iter_shortest_paths(G, start_node_id, end_node_id, options['max_depth'], deadline, stats)
+        else:
+            mode, paths = 'all', iter_simple_paths(G, start_node_id, end_node_id, options['max_depth'], deadline, stats)
+
+        paths_found = 0
+        truncated = None
+        for path in paths:
+            yield dumps_line(format_path(path, G))
+            paths_found += 1
+            if max_paths is not None and paths_found >= max_paths:
+                truncated = None if k_is_limit else 'max_paths'
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                truncated = 'time_budget'
+                break
+        if stats.get('timed_out'):
+            truncated = 'time_budget'
+        metrics.observe_path_search(mode, paths_found, stats.get('nodes_expanded'), truncated)
+
+        log_operation('FIND_PATHS', dict(log_details, paths_found=paths_found, truncated=truncated))
+        yield dumps_line({
+            'done': True,
+            'paths_found': paths_found,
+            'truncated': truncated is not None,
+            'reason': truncated,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 3),
+        })
 
-    # Find all paths
-    paths = find_all_paths(G, start_node_id, end_node_id)
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(lambda: path_admission.release(token))
+    return response
+
+def compute_paths(G, version, key, start_node_id, end_node_id, options):
+    """Run an admitted path search and cache its encoded result; returns (body, paths_found)."""
+    with path_admission.slot():
+        if search_pool.enabled:
+            body, paths_found = pooled_search(G, version, start_node_id, end_node_id, options)
+        else:
+            # Find all paths, or only the k cheapest ones
+            paths = search_paths(G, start_node_id, end_node_id, options)
+            formatted_paths = format_paths(paths, G)
+            paths_found = len(formatted_paths)
+            body = jsonify(formatted_paths).get_data()
+    path_cache.put(version, key, body, paths_found)
+    return body, paths_found
+
+def paths_response(start_node_id, end_node_id, options, log_details):
+    """
+    Search paths and answer with the JSON list, reusing the cached result of
+    an identical search on the same graph version, or sharing the one that
+    is already running.
+    """
+    G, version = graph_cache.get_snapshot()
+    key = (start_node_id, end_node_id, options['k'], options['max_depth'])
+    cached = path_cache.get(version, key)
+    coalesced = False
+    if cached is not None:
+        body, paths_found = cached
+    else:
+        (body, paths_found), coalesced = path_flights.do(
+            (version,) + key, lambda: compute_paths(G, version, key, start_node_id, end_node_id, options))
+
+    log_operation('FIND_PATHS', dict(log_details, paths_found=paths_found, cached=cached is not None,
+                                     coalesced=coalesced))
+    return app.response_class(body, mimetype=app.json.mimetype)
 
-    # Format the paths
-    formatted_paths = format_paths(paths)
+# Path finding endpoint
+@app.route('/api/paths/<int:start_node_id>/<int:end_node_id>', methods=['GET'])
+def find_paths(start_node_id, end_node_id):
+    options = parse_path_options(request.args)
+    etag = graph_cache.etag()
+    if cached := not_modified(etag):
+        return cached
 
-    log_operation('FIND_PATHS', {
+    # Check if nodes exist
+    if not graph_cache.has_node(start_node_id) or not graph_cache.has_node(end_node_id):
+        abort(404, description="Start or end node not found")
+
+    log_details = {
         'start_node_id': start_node_id,
         'end_node_id': end_node_id,
-        'paths_found': len(formatted_paths)
-    })
+        'k': options['k'],
+    }
+    if options['stream']:
+        return with_etag(stream_paths(graph_cache.get_graph(), start_node_id, end_node_id, options, log_details), etag)
 
-    return jsonify(formatted_paths)
+    return with_etag(paths_response(start_node_id, end_node_id, options, log_details), etag)
 
 
 @app.route('/api/paths', methods=['POST'])
@@ -403,56 +890,251 @@ def find_paths_by_name():
 
     start_node_name = data['start_node_name']
     end_node_name = data['end_node_name']
+    options = parse_path_options(data)
 
     # Obtener los nodos por nombre
-    start_node = db.session.execute(db.select(Node).filter_by(name=start_node_name)).scalar_one_or_none()
-    end_node = db.session.execute(db.select(Node).filter_by(name=end_node_name)).scalar_one_or_none()
+    start_node_id = graph_cache.get_node_id(start_node_name)
+    end_node_id = graph_cache.get_node_id(end_node_name)
 
-    if not start_node:
+    if start_node_id is None:
         abort(404, description=f"Could not find source node '{start_node_name}'")
 
-    if not end_node:
+    if end_node_id is None:
         abort(404, description=f"Could not find target node '{end_node_name}'")
 
-    # Construir el grafo dirigido
-    G = nx.DiGraph()
+    log_details = {
+        'start_node_name': start_node_name,
+        'end_node_name': end_node_name,
+        'k': options['k'],
+    }
+    if options['stream']:
+        return stream_paths(graph_cache.get_graph(), start_node_id, end_node_id, options, log_details)
 
-    # Agregar todos los nodos y aristas
-    nodes = db.session.execute(db.select(Node)).scalars().all()
-    edges = db.session.execute(db.select(Edge)).scalars().all()
+    return paths_response(start_node_id, end_node_id, options, log_details)
 
-    for node in nodes:
-        G.add_node(node.id, name=node.name)
+@app.route('/api/paths/cache', methods=['GET'])
+def get_path_cache_stats():
+    return jsonify(dict(path_cache.stats(), admission=path_admission.stats(), coalesced=path_flights.coalesced))
 
-    for edge in edges:
-        G.add_edge(edge.source_id, edge.target_id, id=edge.id, name=edge.name, weight=edge.weight)
+@app.route('/api/distance/<int:start_node_id>/<int:end_node_id>', methods=['GET'])
+def get_distance(start_node_id, end_node_id):
+    etag = graph_cache.etag()
+    if cached := not_modified(etag):
+        return cached
 
-    # Encontrar todas las rutas
-    paths = find_all_paths(G, start_node.id, end_node.id)
+    if not graph_cache.has_node(start_node_id) or not graph_cache.has_node(end_node_id):
+        abort(404, description="Start or end node not found")
 
-    formatted_paths = format_paths(paths)
+    distance = graph_cache.distance(start_node_id, end_node_id)
 
-    log_operation('FIND_PATHS', {
-        'start_node_name': start_node_name,
-        'end_node_name': end_node_name,
-        'paths_found': len(formatted_paths)
+    log_operation('GET_DISTANCE', {
+        'start_node_id': start_node_id,
+        'end_node_id': end_node_id,
+        'distance': distance
     })
 
-    return jsonify(formatted_paths)
+    return with_etag(jsonify({
+        'start_node_id': start_node_id,
+        'end_node_id': end_node_id,
+        'reachable': distance is not None,
+        'distance': distance
+    }), etag)
 
 @app.route('/api/visitors/<int:visitor_id>/history', methods=['GET'])
 def get_visitor_history(visitor_id):
-    db.get_or_404(Visitor, visitor_id)
-    movements = db.session.execute(db.select(VisitorMovement).filter_by(visitor_id=visitor_id).order_by(VisitorMovement.timestamp)).scalars().all()
+    visitor = db.get_or_404(Visitor, visitor_id)
+
+    # El historial solo crece: basta con la versión, el número de movimientos y el último id
+    count, last_id = db.session.execute(
+        db.select(func.count(), func.max(VisitorMovement.id)).where(VisitorMovement.visitor_id == visitor_id)
+    ).one()
+    etag = f"history-{visitor_id}-{visitor.version}-{count}-{last_id}"
+    if cached := not_modified(etag):
+        return cached
+
+    # Una sola consulta con los nombres de nodo y arista, en vez de dos cargas por movimiento
+    movements = db.session.execute(
+        db.select(VisitorMovement.id, VisitorMovement.visitor_id, VisitorMovement.node_id, Node.name,
+                  VisitorMovement.edge_id, Edge.name, VisitorMovement.timestamp)
+        .join(Node, VisitorMovement.node_id == Node.id)
+        .outerjoin(Edge, VisitorMovement.edge_id == Edge.id)
+        .where(VisitorMovement.visitor_id == visitor_id)
+        .order_by(VisitorMovement.timestamp)
+    ).all()
     log_operation('GET_VISITOR_HISTORY', {'visitor_id': visitor_id})
 
-    return jsonify([movement.to_dict() for movement in movements])
+    return with_etag(jsonify([{
+        'id': movement_id,
+        'visitor_id': movement_visitor_id,
+        'node_id': node_id,
+        'node_name': node_name,
+        'edge_id': edge_id,
+        'edge_name': edge_name,
+        'timestamp': timestamp.isoformat() if timestamp else None
+    } for movement_id, movement_visitor_id, node_id, node_name, edge_id, edge_name, timestamp in movements]), etag)
+
+def parse_rollup_args(args):
+    """
+    Read the `bucket` granularity and the since/until range of the analytics endpoints.
+
+    Counters are kept per hour, so the range is applied to whole hours:
+    `since` is rounded down to the start of its hour and the hour `until`
+    falls in is included whole.
+    """
+    bucket = args.get('bucket') or 'total'
+    if bucket not in BUCKETS:
+        abort(400, description=f"bucket must be one of: {', '.join(BUCKETS)}")
+    try:
+        return {
+            'granularity': bucket,
+            'since': parse_timestamp(args.get('since')),
+            'until': parse_timestamp(args.get('until')),
+        }
+    except ValueError as e:
+        abort(400, description=str(e))
+
+@app.route('/api/analytics/nodes', methods=['GET'])
+def get_node_analytics():
+    rollup = node_visit_rollup(**parse_rollup_args(request.args))
+    log_operation('GET_NODE_ANALYTICS', {'count': len(rollup)})
+    return jsonify(rollup)
+
+@app.route('/api/analytics/edges', methods=['GET'])
+def get_edge_analytics():
+    rollup = edge_traversal_rollup(**parse_rollup_args(request.args))
+    log_operation('GET_EDGE_ANALYTICS', {'count': len(rollup)})
+    return jsonify(rollup)
+
+@app.route('/api/analytics/visitors', methods=['GET'])
+def get_visitor_analytics():
+    totals = visitor_totals()
+    log_operation('GET_VISITOR_ANALYTICS', {'count': len(totals)})
+    return jsonify(totals)
+
+@app.route('/api/analytics/visitors/<int:visitor_id>', methods=['GET'])
+def get_single_visitor_analytics(visitor_id):
+    totals = visitor_totals(visitor_id)
+    if not totals:
+        abort(404, description="Visitor not found")
+    log_operation('GET_VISITOR_ANALYTICS', {'visitor_id': visitor_id})
+    return jsonify(totals[0])
+
+def parse_log_filters(args, default_limit=None):
+    """Read the filters and keyset cursor of the log endpoints from the query string."""
+    try:
+        cursor = args.get('cursor')
+        return {
+            'operation_type': args.get('operation_type') or None,
+            'since': parse_timestamp(args.get('since')),
+            'until': parse_timestamp(args.get('until')),
+            'cursor': decode_cursor(cursor) if cursor else None,
+            'limit': parse_limit(args.get('limit'), default=default_limit),
+        }
+    except ValueError as e:
+        abort(400, description=str(e))
 
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
-    logs = db.session.execute(db.select(OperationLog).order_by(OperationLog.timestamp.desc())).scalars().all()
+    # Make queued records visible before reading
+    log_writer.flush()
+    logs, next_cursor = query_logs(**parse_log_filters(request.args), as_dicts=True)
     log_operation('GET_LOGS', {'count': len(logs)})
-    return jsonify([log.to_dict() for log in logs])
+    return add_next_page_headers(jsonify(logs), next_cursor)
+
+@app.route('/api/logs/archive', methods=['GET'])
+def get_archived_logs():
+    # Archived logs are read from compressed segments, so they are always paged
+    filters = parse_log_filters(request.args, default_limit=DEFAULT_PAGE_SIZE)
+    logs, next_cursor = query_archived_logs(app.config['OPERATION_LOG_ARCHIVE_DIR'], **filters)
+    log_operation('GET_ARCHIVED_LOGS', {'count': len(logs)})
+    return add_next_page_headers(jsonify(logs), next_cursor)
+
+def parse_event_id(value, name):
+    """Validate an optional event id, a non-negative integer."""
+    if value is None or value == '':
+        return None
+    try:
+        event_id = int(value)
+    except (TypeError, ValueError):
+        abort(400, description=f"{name} must be a non-negative integer")
+    if event_id < 0:
+        abort(400, description=f"{name} must be a non-negative integer")
+    return event_id
+
+def parse_event_filter(args):
+    """Read the event types and the visitor, node or edge filter of an event subscription."""
+    types = [name.strip().upper() for name in args.get('types', '').split(',') if name.strip()]
+    unknown = [name for name in types if name not in EVENT_TYPES]
+    if unknown:
+        abort(400, description=f"Unknown event types: {', '.join(unknown)}; expected some of {', '.join(EVENT_TYPES)}")
+    return EventFilter(
+        types=types,
+        visitor_id=parse_positive_int(args.get('visitor_id'), 'visitor_id'),
+        node_id=parse_positive_int(args.get('node_id'), 'node_id'),
+        edge_id=parse_positive_int(args.get('edge_id'), 'edge_id'),
+    )
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps_line(event)}\n"
+
+@app.route('/api/events/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-sent events of visitor movements and graph changes.
+
+    Each event carries its operation log id, so a client that reconnects
+    with Last-Event-ID (or ?last_event_id=) gets everything it missed.
+    Filters: types=MOVE_VISITOR,CREATE_VISITOR,..., visitor_id, node_id, edge_id.
+    """
+    event_filter = parse_event_filter(request.args)
+    last_event_id = parse_event_id(request.headers.get('Last-Event-ID', request.args.get('last_event_id')),
+                                   'Last-Event-ID')
+    subscription = event_broker.subscribe(event_filter, last_event_id)
+    log_operation('STREAM_EVENTS', {'types': list(event_filter.types), 'last_event_id': last_event_id})
+    heartbeat = app.config['EVENT_STREAM_HEARTBEAT']
+
+    def generate():
+        # Reconexión del EventSource tras 3 s
+        yield "retry: 3000\n\n"
+        while True:
+            events = subscription.next_events(heartbeat)
+            if not events:
+                # Keeps proxies from closing an idle stream and detects closed clients
+                yield ": keep-alive\n\n"
+            for event in events:
+                yield format_sse(event)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+    return response
+
+@app.route('/api/events', methods=['GET'])
+def poll_events():
+    """
+    Long-poll fallback of the event stream.
+
+    Answers with the events after ?after= as soon as there is at least one,
+    or with an empty list after ?wait= seconds. Pass the returned
+    last_event_id as `after` in the next call. Without `after` it waits for
+    the next new event.
+    """
+    event_filter = parse_event_filter(request.args)
+    after = parse_event_id(request.args.get('after'), 'after')
+    wait = parse_positive_int(request.args.get('wait'), 'wait')
+    wait = min(wait if wait is not None else app.config['EVENT_POLL_MAX_WAIT'], app.config['EVENT_POLL_MAX_WAIT'])
+
+    subscription = event_broker.subscribe(event_filter, after)
+    log_operation('POLL_EVENTS', {'types': list(event_filter.types), 'after': after})
+    try:
+        events = subscription.next_events(wait)
+    finally:
+        event_broker.unsubscribe(subscription)
+    return jsonify({
+        'events': events,
+        'last_event_id': events[-1]['id'] if events else subscription.last_id,
+    })
 
 # Web interface routes
 @app.route('/')
@@ -461,8 +1143,9 @@ def index():
 
 @app.route('/nodes')
 def nodes_page():
-    nodes = db.session.execute(db.select(Node)).scalars().all()
-    return render_template('nodes.html', nodes=nodes)
+    page = parse_list_args(Node, request.args, default_limit=DEFAULT_PAGE_SIZE)
+    nodes, next_after = select_entities_page(Node, page['after'], page['limit'])
+    return render_template('nodes.html', nodes=nodes, next_after=next_after, limit=page['limit'])
 
 @app.route('/nodes/new', methods=['GET', 'POST'])
 def new_node():
@@ -474,6 +1157,7 @@ def new_node():
             new_node = Node(name=name, description=description)
             db.session.add(new_node)
             db.session.commit()
+            graph_cache.node_saved(new_node)
             log_operation('CREATE_NODE', {'node_id': new_node.id, 'name': new_node.name})
             return redirect(url_for('nodes_page'))
     
@@ -489,6 +1173,7 @@ def edit_node(node_id):
             node.name = name
             node.description = request.form.get('description')
             db.session.commit()
+            graph_cache.node_saved(node)
             log_operation('EDIT_NODE', {'node_id': node.id, 'name': node.name, 'description': node.description })
             return redirect(url_for('nodes_page'))
 
@@ -500,13 +1185,17 @@ def delete_node(node_id):
     node = db.get_or_404(Node, node_id)
     db.session.delete(node)
     db.session.commit()
+    graph_cache.node_deleted(node_id)
     log_operation('DELETE_NODE', {'node_id': node.id, 'name': node.name})
     return redirect(url_for('nodes_page'))
 
 @app.route('/edges')
 def edges_page():
-    edges = db.session.execute(db.select(Edge)).scalars().all()
-    return render_template('edges.html', edges=edges)
+    page = parse_list_args(Edge, request.args, default_limit=DEFAULT_PAGE_SIZE)
+    # La plantilla muestra los nombres de origen y destino de cada arista
+    edges, next_after = select_entities_page(Edge, page['after'], page['limit'],
+                                             options=(joinedload(Edge.source), joinedload(Edge.target)))
+    return render_template('edges.html', edges=edges, next_after=next_after, limit=page['limit'])
 
 @app.route('/edges/new', methods=['GET', 'POST'])
 def new_edge():
@@ -526,6 +1215,7 @@ def new_edge():
             new_edge = Edge(source_id=source_id, target_id=target_id, name=name, weight=weight)
             db.session.add(new_edge)
             db.session.commit()
+            graph_cache.edge_saved(new_edge)
             log_operation('CREATE_EDGE', {
                 'edge_id': new_edge.id, 
                 'name': new_edge.name,
@@ -560,6 +1250,7 @@ def edit_edge(edge_id):
             edge.target_id = target_id
             edge.weight = weight
             db.session.commit()
+            graph_cache.edge_saved(edge)
             log_operation('EDIT_EDGE', {
                 'edge_id': edge.id,
                 'name': edge.name,
@@ -575,6 +1266,7 @@ def delete_edge(edge_id):
     edge = db.get_or_404(Edge, edge_id)
     db.session.delete(edge)
     db.session.commit()
+    graph_cache.edge_deleted(edge_id)
     log_operation('DELETE_EDGE', {
         'edge_id': edge.id,
         'name': edge.name,
@@ -584,13 +1276,17 @@ def delete_edge(edge_id):
     return redirect(url_for('edges_page'))
 @app.route('/visitors')
 def visitors_page():
-    visitors = db.session.execute(db.select(Visitor)).scalars().all()
-    return render_template('visitors.html', visitors=visitors)
+    page = parse_list_args(Visitor, request.args, default_limit=DEFAULT_PAGE_SIZE)
+    visitors, next_after = select_entities_page(Visitor, page['after'], page['limit'],
+                                                options=(joinedload(Visitor.current_node),))
+    return render_template('visitors.html', visitors=visitors, next_after=next_after, limit=page['limit'])
 
 @app.route('/logs')
 def logs_page():
-    logs = db.session.execute(db.select(OperationLog).order_by(OperationLog.timestamp.desc())).scalars().all()
-    return render_template('logs.html', logs=logs)
+    log_writer.flush()
+    filters = parse_log_filters(request.args, default_limit=DEFAULT_PAGE_SIZE)
+    logs, next_cursor = query_logs(**filters)
+    return render_template('logs.html', logs=logs, next_cursor=next_cursor, filters=request.args.to_dict())
 
 # Error handlers
 @app.errorhandler(400)
@@ -600,6 +1296,37 @@ def bad_request(error):
         'message': str(error.description)
     }), 400
 
+@app.errorhandler(409)
+def conflict(error):
+    return jsonify({
+        'error': 'Conflict',
+        'message': str(error.description)
+    }), 409
+
+@app.errorhandler(Overloaded)
+def overloaded(error):
+    response = jsonify({
+        'error': 'Too Many Requests' if error.status == 429 else 'Service Unavailable',
+        'message': error.message
+    })
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@app.errorhandler(503)
+def service_unavailable(error):
+    return jsonify({
+        'error': 'Service Unavailable',
+        'message': str(error.description)
+    }), 503
+
+@app.errorhandler(504)
+def gateway_timeout(error):
+    return jsonify({
+        'error': 'Gateway Timeout',
+        'message': str(error.description)
+    }), 504
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
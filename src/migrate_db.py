@@ -0,0 +1,38 @@
+import os
+import sys
+from pathlib import Path
+
+# Add the script directory to sys.path to allow imports
+sys.path.append(str(Path(__file__).resolve().parent))
+
+
+def migrate_database(db_path=None):
+    """
+    Bring an existing database up to date with the models, exactly as the app
+    does on startup: missing tables, columns and indexes, and the tables
+    rebuilt with AUTOINCREMENT (see backend.migrations.upgrade_schema).
+    """
+    script_dir = Path(__file__).resolve().parent  # Directorio donde está migrate_db.py
+    db_path = Path(db_path or script_dir.parent / 'instance' / 'graph.db').resolve()
+
+    if not db_path.exists():
+        print(f"Error: Base de datos no encontrada en {db_path}")
+        sys.exit(1)
+
+    print(f"Conectando a la base de datos: {db_path}")
+    os.environ['GRAPHTRACKER_DATABASE_URI'] = f"sqlite:///{db_path}"
+    # Loading the app already upgrades the schema; it is run again here so the
+    # script does not depend on that, under the same lock as the workers
+    from integrated_app import app
+    from backend.migrations import schema_lock, upgrade_schema
+    from backend.models import db
+
+    with app.app_context():
+        with schema_lock(app.config['SCHEMA_LOCK_FILE']):
+            db.create_all()
+            upgrade_schema(db)
+    print("Migración completada exitosamente.")
+
+
+if __name__ == "__main__":
+    migrate_database(sys.argv[1] if len(sys.argv) > 1 else None)
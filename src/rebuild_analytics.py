@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+# Add the script directory to sys.path to allow imports
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from integrated_app import app
+from backend.analytics import rebuild_stats
+
+
+def main():
+    with app.app_context():
+        count = rebuild_stats()
+    print(f"Rebuilt traversal analytics from {count} movements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SRC_DIR))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    # The app reads its configuration on import, so the environment is set first
+    os.environ['GRAPHTRACKER_DATABASE_URI'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'graph.db'}"
+    os.environ['GRAPHTRACKER_PATH_SEARCH_WORKERS'] = '0'
+    # Schema lock, graph cache stamp, log archive and search snapshots, out of the source tree
+    os.environ['GRAPHTRACKER_RUNTIME_DIR'] = str(tmp_path_factory.mktemp('instance'))
+    import integrated_app
+
+    integrated_app.app.config['TESTING'] = True
+    return integrated_app.app
+
+
+@pytest.fixture
+def empty_db(app):
+    """Delete every row and drop the cached graph, so each test starts from an empty map."""
+    from backend.graph_cache import graph_cache
+    from backend.models import db, log_writer
+    from backend.path_cache import path_cache
+
+    log_writer.flush()
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+    graph_cache.invalidate()
+    path_cache.clear()
+    yield
+    graph_cache.set_backend('networkx')
+
+
+@pytest.fixture
+def seeded_db(app, empty_db):
+    """Load db-scripts/seed.sql, the sample map the app ships with."""
+    from backend.graph_cache import graph_cache
+    from backend.models import db
+
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            connection.executescript((SRC_DIR / 'db-scripts' / 'seed.sql').read_text(encoding='utf-8'))
+            connection.commit()
+        finally:
+            connection.close()
+    graph_cache.invalidate()
@@ -0,0 +1,179 @@
+import threading
+import time
+
+import pytest
+
+from backend.admission import AdmissionController, Overloaded, SingleFlight, path_admission, path_flights
+from backend.models import db, Edge, Node
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.005)
+
+
+def run_in_threads(count, function):
+    """Run `function` in `count` threads; returns their results, or the exceptions they raised."""
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = function()
+        except Exception as error:
+            results[index] = error
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+@pytest.fixture
+def route(app, empty_db):
+    with app.app_context():
+        nodes = [Node(name='A'), Node(name='B')]
+        db.session.add_all(nodes)
+        db.session.flush()
+        db.session.add(Edge(source_id=nodes[0].id, target_id=nodes[1].id, name='ab', weight=1.0))
+        db.session.commit()
+        return nodes[0].id, nodes[1].id
+
+
+@pytest.fixture
+def admission_limits():
+    """Change path_admission's limits for one test, restoring them afterwards."""
+    saved = path_admission.max_concurrent, path_admission.max_queued, path_admission.queue_timeout
+    yield path_admission.configure
+    path_admission.configure(*saved)
+
+
+def test_single_flight_runs_identical_calls_once():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def search():
+        calls.append(1)
+        release.wait(5)
+        return ['path']
+
+    threads, results = run_in_threads(4, lambda: flights.do('key', search))
+    wait_until(lambda: flights.coalesced == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(result is results[0][0] for result, _ in results)
+
+
+def test_single_flight_followers_get_the_leaders_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def search():
+        release.wait(5)
+        raise ValueError('búsqueda fallida')
+
+    threads, results = run_in_threads(3, lambda: flights.do('key', search))
+    wait_until(lambda: flights.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+    assert all(isinstance(result, ValueError) for result in results)
+    # The key is free again for the next call
+    assert flights.do('key', lambda: 1) == (1, False)
+
+
+def test_admission_rejects_with_429_when_the_queue_is_full():
+    controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=5.0)
+    token = controller.acquire()
+    with pytest.raises(Overloaded) as rejected:
+        controller.acquire()
+    assert rejected.value.status == 429 and rejected.value.retry_after >= 1
+    controller.release(token)
+    controller.release(controller.acquire())
+    assert controller.stats()['rejected'] == 1 and controller.stats()['admitted'] == 2
+
+
+def test_admission_times_out_with_503_and_admits_queued_requests_in_turn():
+    controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+    token = controller.acquire()
+    with pytest.raises(Overloaded) as timed_out:
+        controller.acquire()
+    assert timed_out.value.status == 503 and timed_out.value.retry_after >= 1
+
+    controller.configure(1, 1, 5.0)
+    threads, results = run_in_threads(1, controller.acquire)
+    wait_until(lambda: controller.stats()['queued'] == 1)
+    controller.release(token)
+    threads[0].join(5)
+    assert controller.stats()['active'] == 1 and controller.stats()['queued'] == 0
+
+
+@pytest.mark.parametrize('max_queued, status, error', [(0, 429, 'Too Many Requests'), (1, 503, 'Service Unavailable')])
+def test_saturated_path_search_answers_with_retry_after(app, route, admission_limits, max_queued, status, error):
+    start, end = route
+    admission_limits(1, max_queued, 0.05)
+    token = path_admission.acquire()
+    try:
+        response = app.test_client().get(f'/api/paths/{start}/{end}')
+    finally:
+        path_admission.release(token)
+    assert response.status_code == status
+    assert response.json['error'] == error
+    assert int(response.headers['Retry-After']) >= 1
+    assert app.test_client().get(f'/api/paths/{start}/{end}').status_code == 200
+
+
+def test_identical_path_searches_share_one_search(app, route, monkeypatch):
+    import integrated_app
+
+    start, end = route
+    release = threading.Event()
+    calls = []
+    search_paths = integrated_app.search_paths
+
+    def slow_search(*args):
+        calls.append(1)
+        release.wait(5)
+        return search_paths(*args)
+
+    monkeypatch.setattr(integrated_app, 'search_paths', slow_search)
+    coalesced = path_flights.coalesced
+    threads, results = run_in_threads(3, lambda: app.test_client().get(f'/api/paths/{start}/{end}?k=1'))
+    wait_until(lambda: path_flights.coalesced == coalesced + 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert [response.status_code for response in results] == [200] * 3
+    assert len({response.get_data() for response in results}) == 1
+
+
+def test_a_failed_search_fails_every_coalesced_request(app, route, monkeypatch):
+    import integrated_app
+
+    start, end = route
+    release = threading.Event()
+
+    def failing_search(*args):
+        release.wait(5)
+        raise RuntimeError('worker lost')
+
+    monkeypatch.setattr(integrated_app, 'search_paths', failing_search)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    coalesced = path_flights.coalesced
+    try:
+        threads, results = run_in_threads(3, lambda: app.test_client().get(f'/api/paths/{start}/{end}?k=1'))
+        wait_until(lambda: path_flights.coalesced == coalesced + 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+            assert not thread.is_alive()
+    finally:
+        app.config['PROPAGATE_EXCEPTIONS'] = None
+    assert [response.status_code for response in results] == [500] * 3
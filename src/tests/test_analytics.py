@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from backend.analytics import edge_traversal_rollup, node_visit_rollup, record_movements
+from backend.models import db, Edge, Node, Visitor
+
+
+def move_along_first_edge(app):
+    with app.app_context():
+        edge = db.session.execute(db.select(Edge).order_by(Edge.id)).scalars().first()
+        edge_id, source_id, target_id, edge_name = edge.id, edge.source_id, edge.target_id, edge.name
+        target_name = db.session.get(Node, target_id).name
+        visitor = Visitor(name='walker', current_node_id=source_id)
+        db.session.add(visitor)
+        db.session.commit()
+        visitor_id = visitor.id
+    response = app.test_client().post(f'/api/visitors/{visitor_id}/move', json={
+        'edge_name': edge_name, 'target_node_name': target_name})
+    assert response.status_code == 200
+    return edge_id, target_id, visitor_id
+
+
+def test_rollups_keep_deleted_nodes_and_edges(app, seeded_db):
+    edge_id, target_id, visitor_id = move_along_first_edge(app)
+    client = app.test_client()
+    assert client.delete(f'/api/edges/{edge_id}').status_code in (200, 204)
+    assert client.delete(f'/api/nodes/{target_id}').status_code in (200, 204)
+
+    nodes = {row['node_id']: row for row in client.get('/api/analytics/nodes').json}
+    assert nodes[target_id]['node_name'] == f"(deleted node {target_id})"
+    assert nodes[target_id]['visits'] == 1
+
+    edges = {row['edge_id']: row for row in client.get('/api/analytics/edges').json}
+    assert edges[edge_id]['traversals'] == 1
+    assert edges[edge_id]['edge_name'] == f"(deleted edge {edge_id})"
+
+    response = client.get(f'/api/analytics/visitors/{visitor_id}')
+    assert response.status_code == 200
+    assert response.json['path_length'] == 1
+
+
+def test_until_counts_the_whole_hour_it_falls_in(app, seeded_db):
+    with app.app_context():
+        record_movements([(1, 1, None, None, datetime(2024, 5, 1, 10, 50)),
+                          (1, 1, None, None, datetime(2024, 5, 1, 11, 10))])
+        db.session.commit()
+        visits = {row['node_id']: row['visits'] for row in node_visit_rollup(until=datetime(2024, 5, 1, 10, 5))}
+        assert visits[1] == 1
+        visits = {row['node_id']: row['visits'] for row in node_visit_rollup(since=datetime(2024, 5, 1, 11, 59))}
+        assert visits[1] == 1
+        assert edge_traversal_rollup(until=datetime(2024, 5, 1, 10, 5)) == []
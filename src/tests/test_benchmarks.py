@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backend.graph_io import import_graph
+from backend.models import db, Edge, Node
+from benchmarks.bench_operations import summarize
+from benchmarks.synthetic import KINDS, generate_graph
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def split(records):
+    nodes = [record for record in records if record['type'] == 'node']
+    edges = [record for record in records if record['type'] == 'edge']
+    return nodes, edges
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_synthetic_graphs_are_reproducible_and_well_formed(kind):
+    records = generate_graph(kind, 50, min_weight=2.0, max_weight=3.0, seed=7)
+    assert records == generate_graph(kind, 50, min_weight=2.0, max_weight=3.0, seed=7)
+    nodes, edges = split(records)
+    names = {node['name'] for node in nodes}
+    assert len(nodes) == len(names) == 50
+    assert records[:len(nodes)] == nodes  # Nodes come before the edges that reference them
+    assert all(edge['source'] in names and edge['target'] in names and edge['source'] != edge['target']
+               for edge in edges)
+    assert all(2.0 <= edge['weight'] <= 3.0 for edge in edges)
+    assert len({(edge['source'], edge['target']) for edge in edges}) == len(edges)
+
+
+def test_synthetic_graph_shapes():
+    assert len(split(generate_graph('random', 40, edges=100))[1]) == 100
+    assert len(split(generate_graph('random', 40))[1]) == 120
+    grid_edges = {(edge['source'], edge['target']) for edge in split(generate_graph('grid', 16))[1]}
+    # A 4 x 4 grid has 24 streets, each one both ways
+    assert len(grid_edges) == 48 and all((target, source) in grid_edges for source, target in grid_edges)
+    with pytest.raises(ValueError):
+        generate_graph('ring', 10)
+
+
+def test_synthetic_graph_imports_completely(app, empty_db):
+    records = generate_graph('scale_free', 60)
+    nodes, edges = split(records)
+    with app.app_context():
+        summary = import_graph(records)
+        assert summary['error_count'] == 0
+        assert db.session.execute(db.select(db.func.count()).select_from(Node)).scalar() == len(nodes)
+        assert db.session.execute(db.select(db.func.count()).select_from(Edge)).scalar() == len(edges)
+
+
+def test_summary_percentiles():
+    stats = summarize([float(value) for value in range(1, 21)])
+    assert (stats['median_ms'], stats['p95_ms'], stats['min_ms']) == (10.5, 19.0, 1.0)
+    assert summarize([5.0, 1.0])['p95_ms'] == 5.0
+
+
+def test_benchmark_run_writes_comparable_results(tmp_path):
+    output = tmp_path / 'results.json'
+    # Its own process, since the run replaces the contents of the database it uses
+    environment = dict(os.environ, GRAPHTRACKER_RUNTIME_DIR=str(tmp_path), GRAPHTRACKER_PATH_SEARCH_WORKERS='0')
+    subprocess.run([sys.executable, 'benchmarks/bench_operations.py', '--kinds', 'random,grid', '--sizes', '20',
+                    '--visitors', '2', '--history', '10', '--logs', '20', '--repeat', '2', '--max-depth', '3',
+                    '--output', str(output)], cwd=SRC_DIR, env=environment, check=True, capture_output=True,
+                   timeout=120)
+    results = json.loads(output.read_text())
+    assert [(run['graph'], run['size']) for run in results['runs']] == [('random', 20), ('grid', 20)]
+    for run in results['runs']:
+        assert set(run['operations']) == {'find_all_paths+format_paths', 'create_edge', 'move_visitor',
+                                          'get_visitor_history', 'get_logs'}
+        assert all(stats['iterations'] == 2 and stats['min_ms'] <= stats['median_ms'] <= stats['p95_ms']
+                   for stats in run['operations'].values())
+
+    comparison = subprocess.run([sys.executable, 'benchmarks/bench_operations.py', '--compare', str(output),
+                                 str(output)], cwd=SRC_DIR, check=True, capture_output=True, text=True, timeout=60)
+    assert comparison.stdout.count('+0.0%') == 10
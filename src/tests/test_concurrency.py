@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import text
+
+import backend.moves
+from backend.models import db, Edge, Node, Visitor, VisitorMovement
+
+
+@pytest.fixture
+def walker(app, seeded_db):
+    """A visitor standing on the source of the first edge, and that edge's name and target."""
+    with app.app_context():
+        edge = db.session.execute(db.select(Edge).order_by(Edge.id)).scalars().first()
+        visitor = Visitor(name='walker', current_node_id=edge.source_id)
+        db.session.add(visitor)
+        db.session.commit()
+        return visitor.id, visitor.version, edge.source_id, edge.name, db.session.get(Node, edge.target_id).name
+
+
+def visitor_state(app, visitor_id):
+    with app.app_context():
+        visitor = db.session.get(Visitor, visitor_id)
+        movements = db.session.execute(
+            db.select(db.func.count()).select_from(VisitorMovement).where(VisitorMovement.visitor_id == visitor_id)
+        ).scalar_one()
+        return visitor.name, visitor.current_node_id, visitor.version, movements
+
+
+def bump_version_elsewhere(app, visitor_id):
+    # Another worker updates the visitor through its own connection
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text("UPDATE visitors SET name = 'otro', version = version + 1 WHERE id = :id"),
+                           {'id': visitor_id})
+
+
+def test_two_updates_at_the_same_version_one_wins(app, walker):
+    visitor_id, version, *_ = walker
+    first = app.test_client().put(f'/api/visitors/{visitor_id}', json={'name': 'primero', 'version': version})
+    second = app.test_client().put(f'/api/visitors/{visitor_id}', json={'name': 'segundo', 'version': version})
+    assert sorted([first.status_code, second.status_code]) == [200, 409]
+    assert first.json['version'] == version + 1
+    assert visitor_state(app, visitor_id)[0] == 'primero'
+
+
+def test_two_moves_at_the_same_version_one_wins(app, walker):
+    visitor_id, version, source_id, edge_name, target_name = walker
+    body = {'edge_name': edge_name, 'target_node_name': target_name, 'version': version}
+    first = app.test_client().post(f'/api/visitors/{visitor_id}/move', json=body)
+    second = app.test_client().post(f'/api/visitors/{visitor_id}/move', json=body)
+    assert [first.status_code, second.status_code] == [200, 409]
+    assert visitor_state(app, visitor_id)[2:] == (version + 1, 1)
+
+
+def test_update_racing_another_writer_gets_409(app, walker, monkeypatch):
+    import integrated_app
+
+    visitor_id, version, *_ = walker
+    check = integrated_app.check_visitor_version
+
+    def check_then_race(visitor, data):
+        # The visitor was read by this request; another one commits before it does
+        check(visitor, data)
+        bump_version_elsewhere(app, visitor_id)
+
+    monkeypatch.setattr(integrated_app, 'check_visitor_version', check_then_race)
+    response = app.test_client().put(f'/api/visitors/{visitor_id}', json={'name': 'tarde', 'version': version})
+    assert response.status_code == 409
+    assert visitor_state(app, visitor_id)[0] == 'otro'
+
+
+def test_batch_move_with_a_stale_version_skips_only_that_visitor(app, walker):
+    visitor_id, version, source_id, edge_name, target_name = walker
+    with app.app_context():
+        other = Visitor(name='otro', current_node_id=source_id)
+        db.session.add(other)
+        db.session.commit()
+        other_id, other_version = other.id, other.version
+    before = visitor_state(app, visitor_id)
+
+    response = app.test_client().post('/api/visitors/move:batch', json={'moves': [
+        {'visitor_id': visitor_id, 'edge_name': edge_name, 'target_node_name': target_name, 'version': version + 1},
+        {'visitor_id': other_id, 'edge_name': edge_name, 'target_node_name': target_name, 'version': other_version},
+    ]})
+    assert response.status_code == 200
+    assert [result['status'] for result in response.json['results']] == [409, 200]
+    assert (response.json['applied'], response.json['failed']) == (1, 1)
+    assert visitor_state(app, visitor_id) == before
+    assert visitor_state(app, other_id)[1:] == (response.json['results'][1]['movement']['node_id'], other_version + 1, 1)
+
+
+def test_batch_move_racing_another_writer_applies_nothing(app, walker, monkeypatch):
+    visitor_id, version, source_id, edge_name, target_name = walker
+    load_edges = backend.moves._load_edges
+
+    def load_then_race(edge_ids):
+        bump_version_elsewhere(app, visitor_id)
+        return load_edges(edge_ids)
+
+    monkeypatch.setattr(backend.moves, '_load_edges', load_then_race)
+    response = app.test_client().post('/api/visitors/move:batch', json={'moves': [
+        {'visitor_id': visitor_id, 'edge_name': edge_name, 'target_node_name': target_name},
+    ]})
+    assert response.status_code == 409
+    _, current_node_id, new_version, movements = visitor_state(app, visitor_id)
+    assert (current_node_id, new_version, movements) == (source_id, version + 1, 0)
@@ -0,0 +1,53 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from backend.engine import ENGINE_PROFILES, configure_engine, install_engine_hooks
+
+
+def configured(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    configure_engine(app)
+    return app.config
+
+
+def test_production_profile_fills_the_pool_and_pragmas():
+    config = configured(DATABASE_PROFILE='production', SQLALCHEMY_DATABASE_URI='sqlite:///graph.db')
+    assert config['SQLITE_PRAGMAS'] == ENGINE_PROFILES['production']['pragmas']
+    assert config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 10
+    assert config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] == {'check_same_thread': False, 'timeout': 5}
+
+
+def test_app_config_wins_over_the_profile():
+    config = configured(DATABASE_PROFILE='production', SQLALCHEMY_DATABASE_URI='sqlite:///graph.db',
+                        SQLITE_PRAGMAS={'busy_timeout': 100}, SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 2})
+    assert config['SQLITE_PRAGMAS']['busy_timeout'] == 100
+    assert config['SQLITE_PRAGMAS']['journal_mode'] == 'WAL'
+    assert config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 2
+    assert config['SQLALCHEMY_ENGINE_OPTIONS']['max_overflow'] == 20
+
+
+def test_in_memory_databases_get_no_pool_options():
+    config = configured(DATABASE_PROFILE='production', SQLALCHEMY_DATABASE_URI='sqlite://')
+    assert config['SQLALCHEMY_ENGINE_OPTIONS'] == {}
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match='staging'):
+        configured(DATABASE_PROFILE='staging')
+
+
+def test_every_pooled_connection_gets_the_pragmas(tmp_path):
+    config = configured(DATABASE_PROFILE='production', SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'graph.db'}")
+    engine = create_engine(config['SQLALCHEMY_DATABASE_URI'], **config['SQLALCHEMY_ENGINE_OPTIONS'])
+    install_engine_hooks(engine, config['SQLITE_PRAGMAS'])
+    try:
+        with engine.connect() as first, engine.connect() as second:
+            for connection in (first, second):
+                assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+                assert connection.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+                assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+                assert connection.execute(text('PRAGMA temp_store')).scalar() == 2  # MEMORY
+    finally:
+        engine.dispose()
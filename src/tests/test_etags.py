@@ -0,0 +1,102 @@
+import pytest
+
+from backend.models import db, Edge, Node
+
+
+@pytest.fixture
+def line(app, empty_db):
+    """A -> B -> C with weight 1 each, and a visitor standing on A."""
+    client = app.test_client()
+    ids = [client.post('/api/nodes', json={'name': name}).json['id'] for name in 'ABC']
+    for source, target in zip(ids, ids[1:]):
+        assert client.post('/api/edges', json={'source_id': source, 'target_id': target, 'name': 'paso',
+                                               'weight': 1.0}).status_code == 201
+    visitor = client.post('/api/visitors', json={'name': 'walker', 'node_name': 'A'}).json
+    return ids, visitor['id']
+
+
+def revalidate(client, url):
+    """GET `url`, then again with its ETag; returns the first response and the tag."""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    cached = client.get(url, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    return response, etag
+
+
+def changed(client, url, etag):
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    return response
+
+
+def test_find_paths_is_revalidated_until_the_graph_changes(app, line):
+    (a, b, c), _ = line
+    client = app.test_client()
+    url = f'/api/paths/{a}/{c}?k=2'
+    response, etag = revalidate(client, url)
+    assert [path['total_weight'] for path in response.json] == [2.0]
+
+    client.post('/api/edges', json={'source_id': a, 'target_id': c, 'name': 'atajo', 'weight': 5.0})
+    assert [path['total_weight'] for path in changed(client, url, etag).json] == [2.0, 5.0]
+
+
+def test_get_node_is_revalidated_until_it_is_edited(app, line):
+    (a, _, _), _ = line
+    client = app.test_client()
+    response, etag = revalidate(client, f'/api/nodes/{a}')
+    assert response.json['name'] == 'A'
+
+    client.put(f'/api/nodes/{a}', json={'name': 'Entrada'})
+    assert changed(client, f'/api/nodes/{a}', etag).json['name'] == 'Entrada'
+
+
+@pytest.mark.parametrize('url', ['/api/nodes', '/api/nodes?limit=2', '/api/nodes?fields=id,name'])
+def test_node_list_is_revalidated_until_the_graph_changes(app, line, url):
+    (a, _, _), _ = line
+    client = app.test_client()
+    response, etag = revalidate(client, url)
+    assert response.json[0]['name'] == 'A'
+
+    client.put(f'/api/nodes/{a}', json={'name': 'Entrada'})
+    assert changed(client, url, etag).json[0]['name'] == 'Entrada'
+
+
+@pytest.mark.parametrize('url', ['/api/visitors', '/api/visitors?limit=1', '/api/visitors?fields=id,name'])
+def test_visitor_list_is_revalidated_until_a_visitor_changes(app, line, url):
+    _, visitor_id = line
+    client = app.test_client()
+    response, etag = revalidate(client, url)
+    assert [visitor['name'] for visitor in response.json] == ['walker']
+
+    client.put(f'/api/visitors/{visitor_id}', json={'name': 'paseante'})
+    response = changed(client, url, etag)
+    assert [visitor['name'] for visitor in response.json] == ['paseante']
+
+    # A new visitor is either on the page or behind the next page link
+    client.post('/api/visitors', json={'name': 'otro', 'node_name': 'B'})
+    response = changed(client, url, response.headers['ETag'])
+    if 'limit=1' in url:
+        assert len(response.json) == 1 and response.headers['X-Next-Cursor'] == str(visitor_id)
+    else:
+        assert [visitor['name'] for visitor in response.json] == ['paseante', 'otro']
+
+
+def test_visitor_moves_are_revalidated_until_the_visitor_or_graph_changes(app, line):
+    (a, b, c), visitor_id = line
+    client = app.test_client()
+    url = f'/api/visitors/{visitor_id}/moves'
+    response, etag = revalidate(client, url)
+    assert [move['target_node_id'] for move in response.json['moves']] == [b]
+
+    client.post('/api/edges', json={'source_id': a, 'target_id': c, 'name': 'atajo', 'weight': 5.0})
+    response = changed(client, url, etag)
+    assert sorted(move['target_node_id'] for move in response.json['moves']) == [b, c]
+
+    client.post(f'/api/visitors/{visitor_id}/move', json={'edge_name': 'paso', 'target_node_name': 'B'})
+    response = changed(client, url, response.headers['ETag'])
+    assert response.json['current_node_id'] == b
+    assert [move['target_node_id'] for move in response.json['moves']] == [c]
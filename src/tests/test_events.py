@@ -0,0 +1,92 @@
+import threading
+from datetime import datetime
+
+import backend.events
+from backend.events import EventBroker, EventFilter
+from backend.log_writer import OperationLogWriter
+from backend.models import db, DROPPED_LOGS, OperationLog, log_writer
+
+
+def add_log(operation_type, details='{}'):
+    log = OperationLog(operation_type=operation_type, details=details)
+    db.session.add(log)
+    db.session.commit()
+    return log.id
+
+
+def test_log_ids_are_not_reused_after_the_table_is_emptied(app, empty_db):
+    with app.app_context():
+        last_id = add_log('CREATE_NODE')
+        # Lo que hace el archivado cuando todos los logs superan la retención
+        db.session.execute(db.delete(OperationLog))
+        db.session.commit()
+        assert add_log('CREATE_NODE') > last_id
+
+
+def test_long_poll_sees_events_after_the_table_is_emptied(app, empty_db):
+    with app.app_context():
+        last_id = add_log('MOVE_VISITOR', '{"visitor_id": 1}')
+        db.session.execute(db.delete(OperationLog))
+        db.session.commit()
+        new_id = add_log('MOVE_VISITOR', '{"visitor_id": 1}')
+    response = app.test_client().get(f'/api/events?after={last_id}&wait=1')
+    assert [event['id'] for event in response.json['events']] == [new_id]
+
+
+def test_every_subscriber_is_told_about_dropped_records(app, empty_db):
+    with app.app_context():
+        before = add_log('CREATE_NODE')
+        dropped_id = add_log(DROPPED_LOGS, '{"count": 3}')
+    response = app.test_client().get(f'/api/events?after={before}&types=MOVE_VISITOR&visitor_id=7&wait=1')
+    events = response.json['events']
+    assert [(event['id'], event['type'], event['data']) for event in events] == [(dropped_id, DROPPED_LOGS, {'count': 3})]
+
+
+def test_writer_notes_dropped_records_with_its_next_batch(app):
+    batches = []
+    writer = OperationLogWriter(batches.append, dropped_record=lambda count: {'dropped': count})
+    writer._app = app
+    writer.dropped = 3
+    record = {'operation_type': 'CREATE_NODE', 'details': '{}', 'timestamp': datetime.utcnow()}
+    writer._write([record])
+    writer._write([record])
+    assert batches == [[record, {'dropped': 3}], [record]]
+
+
+def test_long_poll_is_logged(app, empty_db):
+    app.test_client().get('/api/events?wait=1')
+    log_writer.flush()
+    with app.app_context():
+        assert db.session.execute(
+            db.select(OperationLog.id).where(OperationLog.operation_type == 'POLL_EVENTS')
+        ).first() is not None
+
+
+def test_resuming_ahead_of_the_broker_does_not_resend_events(app, empty_db, monkeypatch):
+    # The broker of this process has not polled yet the events a client got through another worker
+    polling = threading.Event()
+    read_events = backend.events.read_events
+
+    def gated_read_events(types, after_id, *args):
+        if types == backend.events.STREAM_TYPES and not polling.is_set():
+            return [], after_id, True
+        return read_events(types, after_id, *args)
+
+    monkeypatch.setattr(backend.events, 'read_events', gated_read_events)
+    broker = EventBroker()
+    broker.configure(app, 0.01, 100, 10)
+    with app.app_context():
+        watcher = broker.subscribe(EventFilter())
+        seen = [add_log('MOVE_VISITOR', '{"visitor_id": 1}') for _ in range(2)]
+        resumed = broker.subscribe(EventFilter(), last_event_id=seen[-1])
+        try:
+            polling.set()
+            received = []
+            while len(received) < len(seen) and (events := watcher.next_events(5)):
+                received += events
+            assert [event['id'] for event in received] == seen
+            new_id = add_log('MOVE_VISITOR', '{"visitor_id": 1}')
+            assert [event['id'] for event in resumed.next_events(5)] == [new_id]
+        finally:
+            broker.unsubscribe(watcher)
+            broker.unsubscribe(resumed)
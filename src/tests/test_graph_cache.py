@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from backend.graph_cache import graph_cache
+from backend.models import db, Edge, Node
+
+
+def graph_state():
+    graph = graph_cache.get_graph()
+    return (sorted(graph.nodes(data='name')),
+            sorted((source, target, data['id'], data['name'], data['weight'])
+                   for source, target, data in graph.edges(data=True)))
+
+
+def reloaded_state():
+    graph_cache.invalidate()
+    return graph_state()
+
+
+def test_hooks_apply_the_committed_row_when_they_run_out_of_order(app, seeded_db):
+    with app.app_context():
+        graph_cache.get_graph()
+        edge = db.session.get(Edge, 1)
+        # Writer A commits weight 5, then writer B commits weight 7...
+        edge.weight = 5.0
+        db.session.commit()
+        stale = SimpleNamespace(id=edge.id, source_id=edge.source_id, target_id=edge.target_id, name=edge.name,
+                                weight=5.0, created_at=edge.created_at, updated_at=edge.updated_at)
+        edge.weight = 7.0
+        db.session.commit()
+        # ...but B's hook runs first and A's, with its now stale values, last
+        graph_cache.edge_saved(edge)
+        graph_cache.edge_saved(stale)
+        assert graph_cache.get_graph().edges[edge.source_id, edge.target_id]['weight'] == 7.0
+        assert graph_state() == reloaded_state()
+
+
+def test_save_hook_after_a_later_delete_removes_the_row(app, seeded_db):
+    with app.app_context():
+        graph_cache.get_graph()
+        node = db.session.get(Node, 1)
+        node.name = 'Renamed'
+        db.session.commit()
+        stale = SimpleNamespace(id=node.id, name='Renamed')
+        db.session.delete(node)
+        db.session.commit()
+        graph_cache.node_deleted(stale.id)
+        graph_cache.node_saved(stale)
+        assert not graph_cache.has_node(stale.id)
+        assert graph_cache.get_node_id('Renamed') is None
+        assert graph_state() == reloaded_state()
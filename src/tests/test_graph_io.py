@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from backend.models import db, Node
+
+
+def node_line(name):
+    return json.dumps({'type': 'node', 'name': name}, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def node_names(app):
+    with app.app_context():
+        return sorted(db.session.execute(db.select(Node.name)).scalars())
+
+
+def test_import_reports_malformed_lines_and_keeps_going(app, empty_db):
+    body = node_line('Plaza') + b'{not json\n' + node_line('Café')
+    response = app.test_client().post('/api/graph/import', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.json['nodes_created'] == 2
+    assert response.json['errors'] == ['line 2: invalid JSON']
+    assert node_names(app) == ['Café', 'Plaza']
+
+
+@pytest.mark.parametrize('fmt, body', [
+    ('ndjson', node_line('Plaza') + node_line('Café') + b'{"type": "node", "name": "\xff"}\n' + node_line('Fuente')),
+    ('csv', b'type,name\nnode,Plaza\nnode,Caf\xc3\xa9\nnode,\xe9t\xe9\nnode,Fuente\n'),
+])
+def test_import_stops_with_400_at_a_line_that_is_not_utf8(app, empty_db, fmt, body):
+    response = app.test_client().post(f'/api/graph/import?format={fmt}&batch_size=1', data=body)
+    assert response.status_code == 400
+    line = 3 if fmt == 'ndjson' else 4
+    assert response.json['message'] == f"line {line}: invalid UTF-8"
+    assert response.json['line'] == line
+    # What came before the line was imported, nothing after it
+    assert response.json['nodes_created'] == 2
+    assert node_names(app) == ['Café', 'Plaza']
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from backend.log_writer import OperationLogWriter
+from backend.models import db, OperationLog, log_writer
+
+
+def started_writer(app, write=None, **options):
+    batches = []
+
+    def write_batch(batch):
+        if write is not None:
+            write()
+        batches.append([record['n'] for record in batch])
+
+    writer = OperationLogWriter(write_batch, **options)
+    writer.start(app)
+    return writer, batches
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.005)
+
+
+def test_records_are_written_in_batches_of_batch_size(app):
+    writer, batches = started_writer(app, batch_size=3, flush_interval=10)
+    for number in range(7):
+        writer.submit({'n': number})
+    writer.flush(5)
+    writer.stop()
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert writer.written == 7
+
+
+def test_a_partial_batch_is_written_after_the_flush_interval(app):
+    writer, batches = started_writer(app, batch_size=100, flush_interval=0.05)
+    writer.submit({'n': 1})
+    wait_until(lambda: writer.written == 1)
+    writer.stop()
+    assert batches == [[1]]
+
+
+def test_stop_writes_every_pending_record(app):
+    writer, batches = started_writer(app, batch_size=100, flush_interval=10)
+    for number in range(5):
+        writer.submit({'n': number})
+    writer.stop()
+    assert not writer.running
+    assert sum(batches, []) == list(range(5))
+
+
+@pytest.mark.parametrize('policy, block_timeout', [('drop', None), ('block', 0.1)])
+def test_a_full_queue_drops_records_per_policy(app, policy, block_timeout):
+    writing = threading.Event()
+    release = threading.Event()
+
+    def stuck():
+        writing.set()
+        release.wait(5)
+
+    writer, batches = started_writer(app, write=stuck, queue_size=2, batch_size=1, flush_interval=10,
+                                     full_policy=policy, block_timeout=block_timeout,
+                                     dropped_record=lambda count: {'n': f'dropped {count}'})
+    try:
+        assert writer.submit({'n': 0})
+        writing.wait(5)
+        # The worker is busy with record 0, so the queue holds two more
+        assert writer.submit({'n': 1}) and writer.submit({'n': 2})
+        started = time.monotonic()
+        assert not writer.submit({'n': 3})
+        waited = time.monotonic() - started
+        assert waited >= 0.1 if policy == 'block' else waited < 0.1
+        assert writer.dropped == 1
+    finally:
+        release.set()
+        writer.stop()
+    # The loss is noted along with the next batch written
+    assert sum(batches, []) == [0, 1, 'dropped 1', 2]
+
+
+def test_requests_leave_their_log_records_to_the_writer(app, empty_db):
+    assert log_writer.running
+    thread = threading.get_ident()
+    inserts = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread and statement.lstrip().upper().startswith('INSERT'):
+            inserts.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        assert app.test_client().get('/api/nodes').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert inserts == []
+
+    log_writer.flush()
+    with app.app_context():
+        assert db.session.execute(
+            db.select(OperationLog.id).where(OperationLog.operation_type == 'GET_ALL_NODES')
+        ).first() is not None
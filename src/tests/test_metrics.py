@@ -0,0 +1,41 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from flask import Response
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from backend import metrics as metrics_module
+from backend.metrics import MAX_LOGGED_STATEMENTS, metrics
+from backend.models import db
+
+
+def test_failed_statement_does_not_leave_its_start_time(app, empty_db):
+    with app.app_context(), db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+        assert connection.info.get('metrics_started') == []
+        connection.execute(text('SELECT 1'))
+        assert connection.info['metrics_started'] == []
+
+
+def test_slow_request_log_keeps_the_slowest_statements(app, monkeypatch, caplog):
+    durations = [1] * 30 + [500, 900] + [2] * 30 + [700]
+    clock = SimpleNamespace(now=0)
+    monkeypatch.setattr(metrics_module, 'time', SimpleNamespace(perf_counter=lambda: clock.now))
+    monkeypatch.setattr(metrics, 'slow_request_ms', 0)
+    connection = SimpleNamespace(info={})
+    with app.test_request_context('/api/nodes'):
+        metrics._before_request()
+        for index, duration in enumerate(durations):
+            metrics._before_cursor_execute(connection, None, f'SELECT {index}', None, None, False)
+            clock.now += duration
+            metrics._after_cursor_execute(connection, None, f'SELECT {index}', None, None, False)
+        kept = sorted(metrics_module.g.metrics_statements, reverse=True)
+        assert len(kept) == MAX_LOGGED_STATEMENTS
+        assert [seconds for seconds, _ in kept] == [900, 700, 500] + [2] * (MAX_LOGGED_STATEMENTS - 3)
+
+        with caplog.at_level(logging.WARNING, logger='backend.metrics'):
+            metrics._after_request(Response())
+    assert 'SELECT 31' in caplog.text and 'SELECT 62' in caplog.text and 'SELECT 30' in caplog.text
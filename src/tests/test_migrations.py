@@ -0,0 +1,58 @@
+import sqlite3
+import threading
+
+from flask import Flask
+from sqlalchemy import inspect
+
+from backend.migrations import schema_lock, upgrade_schema
+from backend.models import db, OperationLog
+
+WORKERS = 8
+
+
+def old_database(path):
+    """A database from before nodes.description and AUTOINCREMENT on the operation logs."""
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE nodes (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL UNIQUE,
+                            created_at DATETIME, updated_at DATETIME);
+        CREATE TABLE operation_logs (id INTEGER PRIMARY KEY, operation_type VARCHAR(50) NOT NULL,
+                                     details TEXT, timestamp DATETIME NOT NULL);
+        INSERT INTO operation_logs (operation_type, details, timestamp) VALUES ('CREATE_NODE', '{}', '2024-01-01');
+    """)
+    connection.close()
+
+
+def test_workers_starting_together_upgrade_the_schema_once(app, tmp_path):
+    path = tmp_path / 'old.db'
+    old_database(path)
+    worker_app = Flask('worker', instance_path=str(tmp_path))
+    worker_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(worker_app)
+    start = threading.Barrier(WORKERS)
+    errors = []
+
+    def start_worker():
+        try:
+            with worker_app.app_context():
+                start.wait()
+                with schema_lock(str(tmp_path / 'schema-upgrade.lock')):
+                    db.create_all()
+                    upgrade_schema(db)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=start_worker) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    with worker_app.app_context():
+        inspector = inspect(db.engine)
+        assert 'description' in {column['name'] for column in inspector.get_columns('nodes')}
+        assert {column.name for column in OperationLog.__table__.columns} == \
+            {column['name'] for column in inspector.get_columns('operation_logs')}
+        assert db.session.execute(db.select(OperationLog.operation_type)).scalars().all() == ['CREATE_NODE']
+        db.engine.dispose()
@@ -0,0 +1,69 @@
+from backend.graph_cache import graph_cache
+from backend.models import db, Edge, Node, Visitor
+
+
+def add_visitor(app, node_id):
+    with app.app_context():
+        visitor = Visitor(name='walker', current_node_id=node_id)
+        db.session.add(visitor)
+        db.session.commit()
+        return visitor.id
+
+
+def first_edge(app):
+    with app.app_context():
+        edge = db.session.execute(db.select(Edge).order_by(Edge.id)).scalars().first()
+        return edge.id, edge.source_id, edge.name, db.session.get(Node, edge.target_id).name
+
+
+def move(app, visitor_id, edge_name, target_node_name):
+    response = app.test_client().post('/api/visitors/move:batch', json={'moves': [
+        {'visitor_id': visitor_id, 'edge_name': edge_name, 'target_node_name': target_node_name}
+    ]})
+    assert response.status_code == 200
+    return response.json['results'][0]
+
+
+def test_batch_move_applies_like_a_single_move(app, seeded_db):
+    edge_id, source_id, edge_name, target_name = first_edge(app)
+    visitor_id = add_visitor(app, source_id)
+    result = move(app, visitor_id, edge_name, target_name)
+    assert result['status'] == 200
+    assert result['movement']['edge_id'] == edge_id
+    assert result['movement']['node_name'] == target_name
+
+
+def test_batch_move_rejects_an_edge_deleted_behind_the_cache(app, seeded_db):
+    edge_id, source_id, edge_name, target_name = first_edge(app)
+    visitor_id = add_visitor(app, source_id)
+    with app.app_context():
+        graph_cache.get_graph()
+        # Another process deletes the edge; this process' cache has not caught up yet
+        db.session.execute(db.delete(Edge).where(Edge.id == edge_id))
+        db.session.commit()
+        assert graph_cache.get_graph().has_edge(source_id, graph_cache.get_node_id(target_name))
+    result = move(app, visitor_id, edge_name, target_name)
+    assert result['status'] == 404
+    assert 'arista' in result['error']
+
+
+def test_batch_move_accepts_an_edge_created_behind_the_cache(app, seeded_db):
+    with app.app_context():
+        source = db.session.get(Node, 1)
+        target = Node(name='Nuevo destino')
+        db.session.add(target)
+        db.session.flush()
+        graph_cache.get_graph()
+        db.session.add(Edge(source_id=source.id, target_id=target.id, name='Atajo', weight=1.0))
+        db.session.commit()
+        source_id = source.id
+    visitor_id = add_visitor(app, source_id)
+    assert move(app, visitor_id, 'Atajo', 'Nuevo destino')['status'] == 200
+
+
+def test_batch_move_reports_a_missing_target_node(app, seeded_db):
+    _, source_id, edge_name, _ = first_edge(app)
+    visitor_id = add_visitor(app, source_id)
+    result = move(app, visitor_id, edge_name, 'No existe')
+    assert result['status'] == 404
+    assert 'nodo destino' in result['error']
@@ -0,0 +1,64 @@
+import threading
+
+from sqlalchemy import event
+
+from backend.models import db
+
+
+def neighbors(client, node_id):
+    response = client.get(f'/api/nodes/{node_id}/neighbors')
+    assert response.status_code == 200
+    return sorted((move['edge_name'], move['target_node_name'], move['weight']) for move in response.json)
+
+
+def test_neighbors_follow_node_and_edge_writes(app, empty_db):
+    client = app.test_client()
+    a, b, c = (client.post('/api/nodes', json={'name': name}).json['id'] for name in 'ABC')
+    ab = client.post('/api/edges', json={'source_id': a, 'target_id': b, 'name': 'ab', 'weight': 1.5}).json['id']
+    client.post('/api/edges', json={'source_id': a, 'target_id': c, 'name': 'ac', 'weight': 2.0})
+    client.post('/api/edges', json={'source_id': b, 'target_id': a, 'name': 'ba', 'weight': 1.0})
+    assert neighbors(client, a) == [('ab', 'B', 1.5), ('ac', 'C', 2.0)]
+
+    client.put(f'/api/edges/{ab}', json={'name': 'atajo', 'weight': 0.5})
+    client.put(f'/api/nodes/{c}', json={'name': 'Centro'})
+    assert neighbors(client, a) == [('ac', 'Centro', 2.0), ('atajo', 'B', 0.5)]
+
+    client.delete(f'/api/edges/{ab}')
+    assert neighbors(client, a) == [('ac', 'Centro', 2.0)]
+    client.delete(f'/api/nodes/{c}')
+    assert neighbors(client, a) == []
+    assert client.get(f'/api/nodes/{c}/neighbors').status_code == 404
+
+
+def test_moves_are_the_neighbors_of_the_visitors_node(app, seeded_db):
+    client = app.test_client()
+    visitor_id = client.post('/api/visitors', json={'name': 'walker', 'node_name': 'Obelisco'}).json['id']
+    response = client.get(f'/api/visitors/{visitor_id}/moves')
+    assert response.json['current_node_id'] == 1
+    assert response.json['moves'] == client.get('/api/nodes/1/neighbors').json
+    assert client.get('/api/visitors/999999/moves').status_code == 404
+
+
+def test_neighbor_reads_do_not_query_the_database(app, seeded_db):
+    client = app.test_client()
+    visitor_id = client.post('/api/visitors', json={'name': 'walker', 'node_name': 'Obelisco'}).json['id']
+    client.get('/api/nodes/1/neighbors')
+    thread = threading.get_ident()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for node_id in range(1, 12):
+            client.get(f'/api/nodes/{node_id}/neighbors')
+        assert statements == []
+        client.get(f'/api/visitors/{visitor_id}/moves')
+        # Only the visitor's location is read
+        assert len(statements) == 1
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2025, 4, 26, 23, 20, 23, 902895)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == [timestamp, 42]
+
+
+@pytest.mark.parametrize('cursor', [
+    'WzFd',  # [1]
+    raw_cursor([1, 2]),
+    raw_cursor(['2025-01-01T00:00:00', 2]),
+    raw_cursor([{'dt': 'yesterday'}, 2]),
+    raw_cursor([{'dt': '2025-01-01T00:00:00+02:00'}, 2]),
+    raw_cursor([{'dt': '2025-01-01T00:00:00'}, '2']),
+    raw_cursor([{'dt': '2025-01-01T00:00:00'}, True]),
+    raw_cursor([{'dt': '2025-01-01T00:00:00'}, 2, 3]),
+    raw_cursor({'dt': '2025-01-01T00:00:00', 'id': 2}),
+    'not base64!',
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('path', ['/api/logs', '/api/logs/archive'])
+def test_tampered_cursor_is_a_bad_request(app, path):
+    response = app.test_client().get(f'{path}?cursor=WzFd')
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def archived_logs(app, empty_db, tmp_path, monkeypatch):
+    """130 logs, two per timestamp, archived in segments of 20; returns them newest first."""
+    from backend.log_store import archive_logs
+    from backend.models import db, OperationLog
+
+    monkeypatch.setitem(app.config, 'OPERATION_LOG_ARCHIVE_DIR', str(tmp_path))
+    with app.app_context():
+        db.session.add_all([OperationLog(operation_type='MOVE_VISITOR' if index % 3 else 'CREATE_NODE',
+                                         details='{}', timestamp=datetime(2024, 1, 1) + timedelta(minutes=index // 2))
+                            for index in range(130)])
+        db.session.commit()
+        rows = db.session.execute(db.select(OperationLog.id, OperationLog.operation_type, OperationLog.timestamp)
+                                  .order_by(OperationLog.timestamp.desc(), OperationLog.id.desc())).all()
+        assert archive_logs(str(tmp_path), datetime(2025, 1, 1), segment_size=20) == 130
+    return rows
+
+
+def read_pages(client, query):
+    logs, cursor, pages = [], None, 0
+    while True:
+        response = client.get(f'/api/logs/archive?{query}' + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        logs.extend(response.json)
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return logs, pages
+
+
+def test_archive_is_paged_by_default(app, archived_logs):
+    client = app.test_client()
+    first = client.get('/api/logs/archive')
+    assert len(first.json) == DEFAULT_PAGE_SIZE
+    assert first.headers['X-Next-Cursor']
+
+    logs, pages = read_pages(client, '')
+    assert pages == 3
+    assert [log['id'] for log in logs] == [row.id for row in archived_logs]
+
+
+def test_archive_pages_match_the_filters(app, archived_logs):
+    logs, _ = read_pages(app.test_client(), 'limit=7&operation_type=MOVE_VISITOR&until=2024-01-01T01:00:00')
+    assert [log['id'] for log in logs] == [row.id for row in archived_logs
+                                           if row.operation_type == 'MOVE_VISITOR'
+                                           and row.timestamp < datetime(2024, 1, 1, 1)]
+
+
+def test_archive_page_only_reads_the_segments_it_needs(app, archived_logs, monkeypatch):
+    from backend import log_store
+
+    opened = []
+    gzip_open = log_store.gzip.open
+    monkeypatch.setattr(log_store.gzip, 'open', lambda path, *args, **kwargs: (opened.append(path),
+                                                                               gzip_open(path, *args, **kwargs))[1])
+    response = app.test_client().get('/api/logs/archive?limit=5')
+    assert [log['id'] for log in response.json] == [row.id for row in archived_logs[:5]]
+    assert len(opened) == 1
+
+
+@pytest.mark.parametrize('path', ['/api/nodes', '/api/edges', '/api/visitors'])
+def test_list_pages_walk_every_row_once(app, seeded_db, path):
+    client = app.test_client()
+    for number in range(7):
+        client.post('/api/visitors', json={'name': f'visitante {number}', 'node_name': 'Obelisco'})
+    every_row = client.get(path).json
+    assert len(every_row) > 6
+    rows, url = [], f'{path}?limit=3'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200 and len(response.json) <= 3
+        rows += response.json
+        url = response.headers.get('Link', '').partition('>')[0].lstrip('<') or None
+    assert rows == every_row
+    assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+
+
+def test_fields_projects_the_list_rows(app, seeded_db):
+    client = app.test_client()
+    response = client.get('/api/edges?fields=id,name,weight&limit=2&after=1')
+    assert response.status_code == 200
+    assert response.json == [{'id': 2, 'name': 'Av. Rotaria Alta al Norte', 'weight': 2.0},
+                             {'id': 3, 'name': 'Av. Rotaria Baja al Sur', 'weight': 1.0}]
+    assert response.headers['X-Next-Cursor'] == '3'
+    for query in ['fields=id,secret', 'limit=0', 'after=abc']:
+        assert client.get(f'/api/nodes?{query}').status_code == 400
+
+
+def test_html_lists_are_paged(app, seeded_db):
+    client = app.test_client()
+    first = client.get('/nodes?limit=4').get_data(as_text=True)
+    assert 'Obelisco' in first and 'Catedral' not in first
+    assert 'after=4' in first
+    second = client.get('/nodes?limit=4&after=4').get_data(as_text=True)
+    assert 'Catedral' in second and 'Obelisco' not in second
@@ -0,0 +1,57 @@
+from backend.path_cache import PathResultCache
+
+
+def test_cache_is_an_lru_bounded_by_bytes():
+    cache = PathResultCache(max_bytes=30, max_entry_bytes=20)
+    cache.put(1, 'a', b'x' * 10, 1)
+    cache.put(1, 'b', b'x' * 10, 1)
+    assert cache.get(1, 'a') == (b'x' * 10, 1)
+    cache.put(1, 'c', b'x' * 15, 1)  # Over 30 bytes: 'b' was used least recently
+    assert cache.get(1, 'b') is None
+    assert cache.get(1, 'a') is not None and cache.get(1, 'c') is not None
+    cache.put(1, 'd', b'x' * 21, 1)  # Too large to cache at all
+    assert cache.get(1, 'd') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (2, 25, 1)
+    assert (stats['hits'], stats['misses']) == (3, 2)
+
+
+def test_a_newer_graph_version_drops_every_entry():
+    cache = PathResultCache()
+    cache.put(1, 'a', b'[]', 0)
+    assert cache.get(2, 'a') is None
+    # A search that finished on the older version is not stored
+    cache.put(1, 'a', b'[]', 0)
+    assert cache.get(2, 'a') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_repeated_searches_are_answered_from_the_cache(app, seeded_db, monkeypatch):
+    import integrated_app
+
+    client = app.test_client()
+    first = client.get('/api/paths/1/5?k=3')
+    calls = []
+    search_paths = integrated_app.search_paths
+    monkeypatch.setattr(integrated_app, 'search_paths', lambda *args: calls.append(args) or search_paths(*args))
+    before = client.get('/api/paths/cache').json
+    for _ in range(3):
+        assert client.get('/api/paths/1/5?k=3').get_data() == first.get_data()
+    # Other limits are other entries
+    assert client.get('/api/paths/1/5?k=2').json == first.json[:2]
+    after = client.get('/api/paths/cache').json
+    assert len(calls) == 1
+    assert (after['hits'] - before['hits'], after['misses'] - before['misses']) == (3, 1)
+
+
+def test_a_graph_mutation_is_never_answered_from_the_cache(app, seeded_db):
+    client = app.test_client()
+    cheapest = client.get('/api/paths/1/5?k=1').json[0]
+    shortcut = client.post('/api/edges', json={'source_id': 1, 'target_id': 5, 'name': 'Atajo', 'weight': 0.1})
+    assert client.get('/api/paths/1/5?k=1').json[0]['total_weight'] == 0.1
+
+    client.put(f"/api/edges/{shortcut.json['id']}", json={'weight': 50})
+    assert client.get('/api/paths/1/5?k=1').json[0] == cheapest
+    client.put('/api/nodes/5', json={'name': 'Catedral Metropolitana'})
+    assert client.get('/api/paths/1/5?k=1').json[0]['steps'][-1]['node_name'] == 'Catedral Metropolitana'
+    assert client.get('/api/paths/cache').json['invalidations'] >= 3
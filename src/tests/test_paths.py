@@ -0,0 +1,131 @@
+import json
+import random
+import time
+
+import networkx as nx
+import pytest
+
+from backend.models import db, Edge, Node
+from backend.utils import find_k_shortest_paths
+
+
+@pytest.fixture
+def two_routes(app, empty_db):
+    """A -> B -> C -> D, three edges of weight 1, and the direct but dearer A -> D."""
+    with app.app_context():
+        nodes = [Node(name=name) for name in 'ABCD']
+        db.session.add_all(nodes)
+        db.session.flush()
+        a, b, c, d = (node.id for node in nodes)
+        db.session.add_all([Edge(source_id=a, target_id=b, name='ab', weight=1.0),
+                            Edge(source_id=b, target_id=c, name='bc', weight=1.0),
+                            Edge(source_id=c, target_id=d, name='cd', weight=1.0),
+                            Edge(source_id=a, target_id=d, name='ad', weight=10.0)])
+        db.session.commit()
+        return a, d
+
+
+def streamed(response):
+    assert response.status_code == 200
+    *paths, trailer = (json.loads(line) for line in response.get_data(as_text=True).splitlines())
+    # As a WSGI server would, so the search gives its admission slot back
+    response.close()
+    return paths, trailer
+
+
+@pytest.mark.parametrize('query', ['max_paths=1', 'time_budget_ms=100'])
+def test_stream_only_options_are_rejected_without_stream(app, two_routes, query):
+    a, d = two_routes
+    client = app.test_client()
+    assert client.get(f'/api/paths/{a}/{d}?{query}').status_code == 400
+    assert client.post('/api/paths', json={
+        'start_node_name': 'A', 'end_node_name': 'D', **dict([query.split('=')])}).status_code == 400
+    paths, trailer = streamed(client.get(f'/api/paths/{a}/{d}?stream=1&{query}'))
+    assert trailer['done'] and len(paths) >= 1
+
+
+def test_k_shortest_honours_max_depth(app, two_routes):
+    a, d = two_routes
+    client = app.test_client()
+    assert len(client.get(f'/api/paths/{a}/{d}?k=2').json) == 2
+
+    response = client.get(f'/api/paths/{a}/{d}?k=2&max_depth=1')
+    assert response.status_code == 200
+    assert len(response.json) == 1
+
+    paths, trailer = streamed(client.get(f'/api/paths/{a}/{d}?k=2&max_depth=1&stream=1'))
+    assert trailer['paths_found'] == 1
+    assert paths == response.json
+
+
+def test_k_shortest_with_max_depth_on_a_dense_graph_returns_promptly(app, empty_db):
+    # Every ordering of the other nodes is a path: an unbounded search would never end
+    with app.app_context():
+        nodes = [Node(name=f'N{index}') for index in range(14)]
+        db.session.add_all(nodes)
+        db.session.flush()
+        db.session.add_all([Edge(source_id=source.id, target_id=target.id, name=f'{source.name}-{target.name}',
+                                 weight=1.0)
+                            for source in nodes for target in nodes if source is not target])
+        db.session.commit()
+        first, second = nodes[0].id, nodes[1].id
+    client = app.test_client()
+    started = time.monotonic()
+    assert len(client.get(f'/api/paths/{first}/{second}?k=3&max_depth=1').json) == 1
+    assert len(client.get(f'/api/paths/{first}/{second}?k=20&max_depth=2').json) == 13
+    paths, trailer = streamed(client.get(f'/api/paths/{first}/{second}?k=3&max_depth=1&stream=1'))
+    assert len(paths) == 1 and not trailer['truncated']
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_k_shortest_with_max_depth_finds_the_cheapest_short_paths(seed):
+    rng = random.Random(seed)
+    graph = nx.DiGraph()
+    graph.add_nodes_from(range(7))
+    graph.add_weighted_edges_from((source, target, float(rng.randint(1, 3)))
+                                  for source in range(7) for target in range(7)
+                                  if source != target and rng.random() < 0.4)
+    max_depth = rng.randint(1, 4)
+
+    def cost(path):
+        return sum(graph[source][target]['weight'] for source, target in zip(path, path[1:]))
+
+    paths = find_k_shortest_paths(graph, 0, 6, 5, max_depth)
+    expected = sorted(cost(path) for path in nx.all_simple_paths(graph, 0, 6, cutoff=max_depth))[:5]
+    assert [cost(path) for path in paths] == expected
+    assert all(len(path) - 1 <= max_depth for path in paths)
+
+
+def test_paths_are_formatted_from_the_graph_like_the_rows(app, seeded_db):
+    from backend.graph_cache import graph_cache
+    from backend.utils import format_paths
+
+    response = app.test_client().get('/api/paths/1/5?max_depth=6')
+    assert response.status_code == 200 and len(response.json) > 1
+    with app.app_context():
+        for path in response.json:
+            for step in path['steps']:
+                assert step['node_name'] == db.session.get(Node, step['node_id']).name
+                edge = step['outbound_edge']
+                if edge is not None:
+                    assert edge == db.session.get(Edge, edge['id']).to_dict()
+                    assert step['weight'] == edge['weight']
+            assert path['total_weight'] == sum(step['weight'] for step in path['steps'])
+        graph = graph_cache.get_graph()
+    assert [path['total_weight'] for path in response.json] == sorted(path['total_weight'] for path in response.json)
+    # Formatting needs nothing but the graph: outside an app context any query would fail
+    paths = [[step['node_id'] for step in path['steps']] for path in response.json]
+    assert format_paths(paths, graph) == response.json
+
+
+@pytest.mark.parametrize('k', [1, 3, 50])
+def test_k_cheapest_paths_are_the_first_k_of_every_path(app, seeded_db, k):
+    client = app.test_client()
+    every_path = client.get('/api/paths/1/5?max_depth=10').json
+    by_id = client.get(f'/api/paths/1/5?k={k}').json
+    by_name = client.post('/api/paths', json={'start_node_name': 'Obelisco', 'end_node_name': 'Catedral',
+                                              'limit': k}).json
+    assert by_id == by_name
+    assert [path['total_weight'] for path in by_id] == [path['total_weight'] for path in every_path][:k]
+    assert len(by_id) == min(k, len(every_path))
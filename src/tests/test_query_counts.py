@@ -0,0 +1,68 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from backend.models import db, Edge, Visitor, VisitorMovement
+
+
+@contextmanager
+def count_statements(app):
+    """Count the SQL statements run by this thread; the operation log writer's own are left out."""
+    statements = []
+    thread = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_visitors(app, count, moves):
+    """Add `count` visitors, each with `moves` movements along the seed map's edges."""
+    with app.app_context():
+        edges = db.session.execute(db.select(Edge).order_by(Edge.id)).scalars().all()
+        visitor_ids = []
+        for number in range(count):
+            visitor = Visitor(name=f"visitor-{number}", current_node_id=edges[0].source_id)
+            db.session.add(visitor)
+            db.session.flush()
+            db.session.add_all(VisitorMovement(visitor_id=visitor.id, node_id=edge.target_id, edge_id=edge.id)
+                               for edge in (edges[move % len(edges)] for move in range(moves)))
+            visitor_ids.append(visitor.id)
+        db.session.commit()
+        return visitor_ids
+
+
+def statements_for(app, path):
+    client = app.test_client()
+    with count_statements(app) as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('moves', [5, 500])
+def test_visitor_history_statements_do_not_grow_with_moves(app, seeded_db, moves):
+    visitor_id, = add_visitors(app, 1, moves)
+    # Visitor, ETag aggregate and the history itself
+    assert statements_for(app, f'/api/visitors/{visitor_id}/history') <= 3
+
+
+def test_edges_page_statements_do_not_grow_with_rows(app, seeded_db):
+    assert statements_for(app, '/edges?limit=5') == statements_for(app, '/edges?limit=100')
+    assert statements_for(app, '/edges?limit=100') <= 2
+
+
+def test_visitors_page_statements_do_not_grow_with_rows(app, seeded_db):
+    add_visitors(app, 30, 1)
+    assert statements_for(app, '/visitors?limit=5') == statements_for(app, '/visitors?limit=30')
+    assert statements_for(app, '/visitors?limit=30') <= 2
@@ -0,0 +1,74 @@
+import random
+
+import networkx as nx
+import pytest
+
+from backend.reachability import ReachabilityIndex
+
+
+def check(index, graph):
+    for source in graph:
+        lengths = nx.single_source_dijkstra_path_length(graph, source, weight='weight')
+        for target in graph:
+            assert index.reachable(source, target) == (target in lengths), (source, target)
+            assert index.distance(source, target) == lengths.get(target)
+
+
+@pytest.mark.parametrize('seed', range(40))
+@pytest.mark.parametrize('max_components', [4096, 3])
+def test_index_follows_random_writes(seed, max_components, monkeypatch):
+    rng = random.Random(seed)
+    graph = nx.DiGraph()
+    for node in range(8):
+        graph.add_node(node)
+    for _ in range(12):
+        source, target = rng.sample(range(8), 2)
+        graph.add_edge(source, target, weight=float(rng.randint(1, 5)))
+    index = ReachabilityIndex(graph, max_components=max_components)
+    check(index, graph)
+
+    # Writes are applied in place: the index is only rebuilt to switch to searches
+    rebuilds = []
+    build = index._build
+    monkeypatch.setattr(index, '_build', lambda: (rebuilds.append(True), build()))
+    next_node = 8
+    for _ in range(40):
+        action = rng.random()
+        nodes = list(graph)
+        if action < 0.35 and len(nodes) >= 2:
+            source, target = rng.sample(nodes, 2)
+            weight = float(rng.randint(1, 5))
+            if graph.has_edge(source, target):
+                old_weight = graph[source][target]['weight']
+                graph[source][target]['weight'] = weight
+                index.edge_weight_changed(source, target, old_weight, weight)
+            else:
+                graph.add_edge(source, target, weight=weight)
+                index.edge_added(source, target, weight)
+        elif action < 0.7 and graph.number_of_edges():
+            source, target = rng.choice(list(graph.edges()))
+            weight = graph[source][target]['weight']
+            graph.remove_edge(source, target)
+            index.edge_removed(source, target, weight)
+        elif action < 0.85 and len(nodes) > 2:
+            node = rng.choice(nodes)
+            edges = [(source, target, data['weight']) for source, target, data in
+                     list(graph.in_edges(node, data=True)) + list(graph.out_edges(node, data=True))]
+            graph.remove_node(node)
+            index.node_removed(node, edges)
+        else:
+            graph.add_node(next_node)
+            index.node_added(next_node)
+            next_node += 1
+        check(index, graph)
+    if max_components > next_node:
+        assert rebuilds == []
+
+
+def test_large_maps_skip_the_bitsets():
+    graph = nx.path_graph(50, create_using=nx.DiGraph)
+    nx.set_edge_attributes(graph, 1.0, 'weight')
+    index = ReachabilityIndex(graph, max_components=10)
+    assert index._reach is None
+    assert index.reachable(0, 49) and not index.reachable(49, 0)
+    assert index.distance(0, 49) == 49
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+import backend.search_pool
+from backend.csr_graph import CSRGraph
+from backend.models import db, Edge, Node
+from backend.search_pool import SearchTimeout, _run_search, search_pool
+
+
+@pytest.fixture
+def dense_map(app, empty_db):
+    """Ten nodes, each with an edge to every other one: far too many paths to list."""
+    with app.app_context():
+        nodes = [Node(name=f'N{index}') for index in range(10)]
+        db.session.add_all(nodes)
+        db.session.flush()
+        db.session.add_all([Edge(source_id=source.id, target_id=target.id, name=f'{source.name}-{target.name}',
+                                 weight=1.0)
+                            for source in nodes for target in nodes if source is not target])
+        db.session.commit()
+        return nodes[0].id, nodes[1].id
+
+
+@pytest.fixture
+def pool(app, tmp_path):
+    """One worker process for the duration of a test."""
+    search_pool.configure(1, str(tmp_path), 30.0)
+    yield search_pool
+    search_pool.stop()
+    search_pool.configure(0, app.config['PATH_SEARCH_SNAPSHOT_DIR'], app.config['PATH_SEARCH_TIMEOUT'])
+
+
+@pytest.mark.parametrize('k', [10 ** 6, None])
+def test_worker_search_stops_at_its_deadline(app, dense_map, k):
+    from backend.serialization import FastJSONProvider
+
+    start, end = dense_map
+    graph = CSRGraph.from_networkx(app_snapshot(app)[0])
+    started = time.monotonic()
+    assert _run_search(graph, FastJSONProvider(app), start, end, k, None if k else 9, 0.2) is None
+    assert time.monotonic() - started < 5
+
+
+def test_timed_out_search_answers_504_and_the_pool_recovers(app, dense_map, pool, monkeypatch):
+    start, end = dense_map
+    client = app.test_client()
+    # Far less than a worker needs to start, so the search is cancelled by killing it
+    monkeypatch.setattr(backend.search_pool, 'KILL_GRACE_SECONDS', 0)
+    pool.timeout = 0.01
+    restarts = pool.restarts
+    response = client.get(f'/api/paths/{start}/{end}?k=1000000')
+    assert response.status_code == 504
+    assert 'narrow the search' in response.json['message']
+    assert pool.restarts == restarts + 1 and pool.busy() == 0
+
+    pool.timeout = 30.0
+    response = client.get(f'/api/paths/{start}/{end}?k=3&max_depth=2')
+    assert response.status_code == 200
+    assert len(response.json) == 3
+
+
+def test_worker_stopping_at_its_deadline_answers_504(app, dense_map, pool):
+    start, end = dense_map
+    # Start the worker and load the snapshot first, so the deadline is spent searching
+    assert pool.search(*app_snapshot(app), start, end, 1, None)[2] == 1
+    pool.timeout = 0.5
+    restarts = pool.restarts
+    with pytest.raises(SearchTimeout, match='stopped'):
+        pool.search(*app_snapshot(app), start, end, 10 ** 6, None)
+    assert pool.restarts == restarts
+    assert pool.search(*app_snapshot(app), start, end, 1, None, timeout=30.0)[2] == 1
+
+
+def app_snapshot(app):
+    from backend.graph_cache import graph_cache
+
+    with app.app_context():
+        return graph_cache.get_snapshot()
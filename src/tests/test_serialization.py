@@ -0,0 +1,63 @@
+import json
+import math
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from backend.serialization import FastJSONProvider
+
+pytest.importorskip('orjson')
+
+
+@pytest.fixture
+def providers():
+    app = Flask(__name__)
+    # The providers only keep a weak reference to their app
+    yield FastJSONProvider(app), DefaultJSONProvider(app)
+
+
+PAYLOAD = {
+    'created_at': datetime(2025, 4, 26, 23, 20, 23, 902895),
+    'aware': datetime(2025, 4, 26, 23, 20, tzinfo=timezone.utc),
+    'day': date(2025, 4, 26),
+    'name': 'Plaza Mayor – café',
+    'weight': 1.5,
+    'big': 12345678901234567890123,
+    'missing': None,
+    'amount': Decimal('10.25'),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'path': [{'node_id': 2, 'edge': {'id': 7, 'weight': 0.1}}, {'node_id': 1, 'edge': None}],
+}
+
+
+def test_compact_output_decodes_like_the_default_provider(providers):
+    fast, default = providers
+    fast_text = fast.dumps(PAYLOAD, separators=(',', ':'))
+    default_text = default.dumps(PAYLOAD, separators=(',', ':'))
+    assert json.loads(fast_text) == json.loads(default_text)
+    assert json.loads(fast_text)['created_at'] == 'Sat, 26 Apr 2025 23:20:23 GMT'
+    assert list(json.loads(fast_text)) == sorted(PAYLOAD)
+
+
+def test_response_body_decodes_like_the_default_provider(providers):
+    fast, default = providers
+    payload = [dict(PAYLOAD, big=1)] * 3
+    assert json.loads(fast.response(payload).get_data()) == json.loads(default.response(payload).get_data())
+
+
+@pytest.mark.parametrize('value', [math.inf, -math.inf, math.nan])
+def test_non_finite_floats_are_written_like_the_default_provider(providers, value):
+    fast, default = providers
+    payload = {'distance': value, 'missing': None}
+    assert fast.dumps(payload, separators=(',', ':')) == default.dumps(payload, separators=(',', ':'))
+
+
+def test_other_formats_are_left_to_the_default_provider(providers):
+    fast, default = providers
+    assert fast.dumps(PAYLOAD) == default.dumps(PAYLOAD)
+    assert fast.dumps(PAYLOAD, indent=2) == default.dumps(PAYLOAD, indent=2)
+    assert fast.dumps(PAYLOAD, separators=(', ', ': ')) == default.dumps(PAYLOAD, separators=(', ', ': '))
@@ -0,0 +1,8 @@
+# WSGI entry point, e.g.:
+#   GRAPHTRACKER_DB_PROFILE=production gunicorn --chdir src -w 4 --threads 8 -b 0.0.0.0:5001 wsgi:app
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from integrated_app import app